@@ -7,8 +7,10 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
+import hmac
 import os
 import sys
+import time
 from pathlib import Path
 from django.core.asgi import get_asgi_application
 
@@ -18,9 +20,14 @@ django_application = get_asgi_application()
 
 # Import the new bot application
 from core_bot.bot import application
+from core_bot.dedup import UpdateDeduplicator
+from core_bot.identity import user_cache
+from core_bot.ingest import ThroughputMeter, UpdateQueue
+from core_bot.reminders import get_reminder_scheduler
 from telegram import Update
 from contextlib import asynccontextmanager
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
+from django.conf import settings
 
 # Determine base directory (works for both script and executable)
 if getattr(sys, 'frozen', False):
@@ -30,21 +37,81 @@ else:
     # Running as script
     BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Background update queue (only used in 'queue' mode)
+update_queue = None
+if settings.TELEGRAM_UPDATE_MODE == 'queue':
+    update_queue = UpdateQueue(
+        application,
+        workers=settings.TELEGRAM_UPDATE_WORKERS,
+        maxsize=settings.TELEGRAM_UPDATE_QUEUE_SIZE,
+    )
+
+# Sends reminders at their due time
+reminder_scheduler = get_reminder_scheduler() if settings.REMINDER_TIMER else None
+
+# Throughput of updates processed inside the webhook request ('inline' mode)
+inline_throughput = ThroughputMeter()
+
+deduplicator = UpdateDeduplicator(
+    window=settings.TELEGRAM_DEDUP_WINDOW,
+    use_database=settings.TELEGRAM_DEDUP_DATABASE,
+)
+
 
 async def telegram_webhook(request):
     """Handle incoming Telegram webhook requests."""
     if request.method == "POST":
         update = Update.de_json(data=await request.json(), bot=application.bot)
-        await application.process_update(update)
+        if await deduplicator.is_duplicate(update.update_id):
+            return Response()
+        if update_queue is not None:
+            # Queue is full - let Telegram redeliver the update later
+            if not update_queue.put(update):
+                await deduplicator.release(update.update_id)
+                return Response(status_code=503)
+        else:
+            started_at = time.monotonic()
+            try:
+                await application.process_update(update)
+            except Exception:
+                # Telegram redelivers after the error response
+                await deduplicator.release(update.update_id)
+                raise
+            inline_throughput.record(1, time.monotonic() - started_at)
         return Response()
     else:
-        return Response(status=400)
+        return Response(status_code=400)
+
+
+async def telegram_stats(request):
+    """
+    Expose update processing metrics.
+
+    Requires 'Authorization: Bearer <TELEGRAM_STATS_TOKEN>'; answers 404
+    while no token is configured.
+    """
+    token = settings.TELEGRAM_STATS_TOKEN
+    if not token:
+        return Response(status_code=404)
+    if not hmac.compare_digest(request.headers.get('authorization', '').encode(), f'Bearer {token}'.encode()):
+        return Response(status_code=401, headers={'WWW-Authenticate': 'Bearer'})
+
+    return JSONResponse({
+        'mode': settings.TELEGRAM_UPDATE_MODE,
+        'queue': update_queue.stats() if update_queue is not None else None,
+        'throughput': (
+            update_queue.throughput.stats() if update_queue is not None
+            else inline_throughput.stats()
+        ),
+        'dedup': deduplicator.stats(),
+        'user_cache': user_cache.stats(),
+        'reminders': reminder_scheduler.stats() if reminder_scheduler is not None else None,
+    })
 
 # Starlette serving
 from starlette.applications import Starlette
 from starlette.routing import Mount, Route
 from starlette.staticfiles import StaticFiles
-from django.conf import settings
 
 @asynccontextmanager
 async def ptb_lifespan(app):
@@ -52,6 +119,10 @@ async def ptb_lifespan(app):
     # Initialize the application first (before setting webhook)
     await application.initialize()
     await application.start()
+    if update_queue is not None:
+        await update_queue.start()
+    if reminder_scheduler is not None:
+        await reminder_scheduler.start()
     
     # Now set webhook
     webhook_url = settings.WEBHOOK_URL or os.getenv('WEBHOOK_URL', '')
@@ -67,6 +138,10 @@ async def ptb_lifespan(app):
     yield
     
     # Cleanup
+    if reminder_scheduler is not None:
+        await reminder_scheduler.stop()
+    if update_queue is not None:
+        await update_queue.stop()
     await application.stop()
     await application.shutdown()
 
@@ -90,6 +165,7 @@ async def ptb_lifespan(app):
 # Build routes list
 routes = [
     Route("/telegram/", telegram_webhook, methods=['POST']),
+    Route("/telegram/stats/", telegram_stats, methods=['GET']),
 ]
 
 # Add static files mount if directory exists
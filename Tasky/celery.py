@@ -59,6 +59,14 @@ else:
             'task': 'core_tasks.tasks.process_pending_reminders',
             'schedule': crontab(minute='*/5'),  # Every 5 minutes
         },
+        'deliver-alerts-every-minute': {
+            'task': 'core_tasks.tasks.deliver_alerts',
+            'schedule': crontab(),  # Every minute
+        },
+        'drain-outbox-every-minute': {
+            'task': 'core_tasks.tasks.drain_outbox',
+            'schedule': crontab(),  # Every minute
+        },
         'daily-report-reminder-at-5pm': {
             'task': 'core_tasks.tasks.daily_report_reminder',
             'schedule': crontab(hour=17, minute=0),  # 5 PM daily
@@ -14,6 +14,7 @@ import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 # Handle both script and executable modes
@@ -105,32 +106,94 @@ WSGI_APPLICATION = 'Tasky.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Database profile
+# 'sqlite'     - plain SQLite file (development, default)
+# 'sqlite-wal' - SQLite tuned for the bot, webhook and Celery running
+#                together: WAL journal so readers don't wait for writers,
+#                IMMEDIATE write transactions and one writer thread per bot
+# 'postgres'   - PostgreSQL (production), configured with the POSTGRES_* and
+#                DB_POOL* settings below
+DB_PROFILE = os.getenv('DB_PROFILE', 'sqlite')
 
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.postgresql",
-#         'NAME':'Tasky',
-#         'USER': 'postgres',
+# SQLite tuning for the 'sqlite-wal' profile
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '20000'))  # wait for a lock
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))  # page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
 
-#         'PASSWORD': '',
-
-#         'HOST': 'localhost',
-
-#         'PORT': '5433',
-#     }
-# }
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         # Allow specifying database path via environment variable
         # If DB_PATH is set, use it; otherwise use BASE_DIR / 'db.sqlite3'
         'NAME': Path(os.getenv('DB_PATH', str(BASE_DIR / 'db.sqlite3'))),
+        # Opening a SQLite connection is cheap but re-runs the pragmas;
+        # keep connections for the life of the thread
+        'CONN_MAX_AGE': None,
         'OPTIONS': {
             'timeout': 20,
         },
     }
 }
 
+if DB_PROFILE == 'sqlite-wal':
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+        # Take the write lock when the transaction starts, so a transaction
+        # never fails upgrading from a read lock
+        'transaction_mode': 'IMMEDIATE',
+        # Applied to every new connection
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+            f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}',
+            f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+            'PRAGMA temp_store=MEMORY',
+        ]),
+    }
+elif DB_PROFILE == 'postgres':
+    # Django's psycopg connection pool (requires psycopg[pool]). Connections
+    # are returned to the pool after every request, Celery task and bot
+    # database call, and checked before they are handed out again.
+    DB_POOL = os.getenv('DB_POOL', 'True').lower() in ('true', '1', 'yes')
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))  # connections kept open
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '20'))  # per process
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a connection
+    # Without the pool: seconds a connection is reused (0 = new one every time)
+    DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'Tasky'),
+        'USER': os.getenv('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # Pooled connections are closed back into the pool instead
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        # Reconnect instead of failing when a reused connection was dropped
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if DB_POOL:
+        # CONN_HEALTH_CHECKS makes Django pass the pool's own connection check
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            'max_idle': 300,
+        }
+elif DB_PROFILE != 'sqlite':
+    raise ImproperlyConfigured(
+        f"Unknown DB_PROFILE '{DB_PROFILE}' (use 'sqlite', 'sqlite-wal' or 'postgres')"
+    )
+
+# Run the bot's database writes on a single thread, one at a time, instead
+# of letting concurrent handlers compete for the SQLite write lock
+DB_SINGLE_WRITER = os.getenv(
+    'DB_SINGLE_WRITER', str(DB_PROFILE == 'sqlite-wal')
+).lower() in ('true', '1', 'yes')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -185,6 +248,54 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 NGROK_AUTHTOKEN = os.getenv('NGROK_AUTHTOKEN', '')
 WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # Set dynamically or via env
 
+# Webhook update processing
+# 'inline' - process each update before answering Telegram (default)
+# 'queue'  - answer immediately and process updates with a pool of workers
+TELEGRAM_UPDATE_MODE = os.getenv('TELEGRAM_UPDATE_MODE', 'inline')
+TELEGRAM_UPDATE_WORKERS = int(os.getenv('TELEGRAM_UPDATE_WORKERS', '4'))
+TELEGRAM_UPDATE_QUEUE_SIZE = int(os.getenv('TELEGRAM_UPDATE_QUEUE_SIZE', '1000'))
+# Bearer token for GET /telegram/stats/ (empty = endpoint disabled)
+TELEGRAM_STATS_TOKEN = os.getenv('TELEGRAM_STATS_TOKEN', '')
+
+# Long polling (python manage.py run_polling / python start_bot.py --polling)
+TELEGRAM_POLLING_LIMIT = int(os.getenv('TELEGRAM_POLLING_LIMIT', '100'))
+TELEGRAM_POLLING_TIMEOUT = int(os.getenv('TELEGRAM_POLLING_TIMEOUT', '30'))
+
+# Drop redelivered updates: number of recent update ids to remember (0 = off)
+TELEGRAM_DEDUP_WINDOW = int(os.getenv('TELEGRAM_DEDUP_WINDOW', '10000'))
+# Also record update ids in the database (survives restarts, shared by workers)
+TELEGRAM_DEDUP_DATABASE = os.getenv('TELEGRAM_DEDUP_DATABASE', 'False').lower() in ('true', '1', 'yes')
+
+# Outbound message rate limits (Telegram Bot API limits)
+TELEGRAM_RATE_GLOBAL = float(os.getenv('TELEGRAM_RATE_GLOBAL', '30'))  # messages/second
+TELEGRAM_RATE_PER_CHAT = float(os.getenv('TELEGRAM_RATE_PER_CHAT', '1'))  # messages/second
+TELEGRAM_RATE_GROUP_PER_MINUTE = float(os.getenv('TELEGRAM_RATE_GROUP_PER_MINUTE', '20'))
+TELEGRAM_SEND_CONCURRENCY = int(os.getenv('TELEGRAM_SEND_CONCURRENCY', '16'))  # requests in flight
+
+# Outbox for bot-originated messages (core_tasks.outbox)
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '200'))  # messages claimed per batch
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '300'))  # reclaim after a crashed worker; keep above one batch's send time
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+ALERT_PUSH_MAX_AGE = int(os.getenv('ALERT_PUSH_MAX_AGE', '86400'))  # older unsent alerts aren't pushed (seconds)
+
+# Database access from bot handlers (core_bot.utils.ModelManager)
+# Threads running ORM queries for concurrent updates; each keeps its own
+# connection. 0 = Django's async ORM (all queries share one thread), the
+# default on plain SQLite, where concurrent writers get "database is locked".
+BOT_DB_EXECUTOR_WORKERS = int(os.getenv(
+    'BOT_DB_EXECUTOR_WORKERS',
+    '8' if DB_PROFILE in ('sqlite-wal', 'postgres') or DB_SINGLE_WRITER else '0'
+))
+
+# Cache of Telegram users resolved from updates (core_bot.identity)
+BOT_USER_CACHE_SIZE = int(os.getenv('BOT_USER_CACHE_SIZE', '10000'))  # users (0 = off)
+BOT_USER_CACHE_TTL = int(os.getenv('BOT_USER_CACHE_TTL', '300'))  # seconds
+
+# Fire reminders on time from the bot process (core_bot.reminders), without Celery beat
+REMINDER_TIMER = os.getenv('REMINDER_TIMER', 'True').lower() in ('true', '1', 'yes')
+REMINDER_TIMER_WINDOW = int(os.getenv('REMINDER_TIMER_WINDOW', '3600'))  # seconds of reminders kept in memory
+REMINDER_TIMER_REFILL = int(os.getenv('REMINDER_TIMER_REFILL', '300'))  # reload interval (other processes' changes)
+
 ASGI_APPLICATION = 'Tasky.asgi.app'
 
 # Celery Configuration (optional - for background tasks)
@@ -197,6 +308,17 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Locks that keep beat jobs from overlapping (core_tasks.jobs)
+JOB_LOCK_BACKEND = os.getenv('JOB_LOCK_BACKEND', 'auto')  # auto (Redis if installed, else db), redis or db
+JOB_LOCK_REDIS_URL = os.getenv('JOB_LOCK_REDIS_URL', CELERY_BROKER_URL)
+JOB_LOCK_TTL = int(os.getenv('JOB_LOCK_TTL', '1800'))  # lease in seconds; longer than the slowest run
+
+# Nightly cleanup of old notifications (core_tasks.retention)
+CLEANUP_BATCH_SIZE = int(os.getenv('CLEANUP_BATCH_SIZE', '1000'))  # rows deleted per transaction
+CLEANUP_BATCH_PAUSE = float(os.getenv('CLEANUP_BATCH_PAUSE', '0.05'))  # seconds between batches
+CLEANUP_TIME_LIMIT = int(os.getenv('CLEANUP_TIME_LIMIT', '900'))  # stop and continue next run
+CLEANUP_ARCHIVE_DIR = os.getenv('CLEANUP_ARCHIVE_DIR', '')  # write deleted rows to .jsonl.gz here (empty = off)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -5,7 +5,7 @@ from telegram import Update, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 from core_bot.utils import (
     get_or_create_user, ModelManager, KeyboardBuilder,
-    MessageFormatter, paginate_items
+    MessageFormatter, parse_page_callback
 )
 from datetime import datetime
 
@@ -18,16 +18,19 @@ async def list_approvals(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List pending approvals."""
     user = await get_or_create_user(update, context)
 
-    page = 0
+    page, cursor = 0, None
     if update.callback_query and ':' in update.callback_query.data:
-        page = int(update.callback_query.data.split(':')[1])
+        page, cursor = parse_page_callback(update.callback_query.data)
 
     approval_manager = ModelManager('core_tasks', 'Approval')
 
     # Get pending approvals for this user
-    all_approvals = await approval_manager.filter(approver_id=user.id, status='PENDING')
+    paginated = await approval_manager.paginate(
+        page=page, per_page=5, order_by=('-created_at',), cursor=cursor,
+        approver_id=user.id, status='PENDING'
+    )
 
-    if not all_approvals:
+    if not paginated['total_items']:
         msg = f"{MessageFormatter.EMOJI['approval']} <b>Pending Approvals</b>\n\n"
         msg += "No pending approvals.\n\n"
         msg += "You're all caught up! ✅"
@@ -41,8 +44,6 @@ async def list_approvals(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.callback_query.edit_message_text(msg, parse_mode='HTML', reply_markup=keyboard)
         return
 
-    paginated = paginate_items(all_approvals, page=page, per_page=5)
-
     msg = f"{MessageFormatter.EMOJI['approval']} <b>Pending Approvals</b>\n"
     msg += f"Showing {len(paginated['items'])} of {paginated['total_items']} approvals\n\n"
 
@@ -58,7 +59,9 @@ async def list_approvals(update: Update, context: ContextTypes.DEFAULT_TYPE):
             KeyboardBuilder.pagination_buttons(
                 paginated['current_page'],
                 paginated['total_pages'],
-                "list_approvals"
+                "list_approvals",
+                next_cursor=paginated['next_cursor'],
+                prev_cursor=paginated['prev_cursor']
             )
         )
 
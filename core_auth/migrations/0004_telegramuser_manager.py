@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:47
+
+import core_auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_auth', '0003_remove_userprojectrole_role_remove_teamgroup_leader_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='telegramuser',
+            managers=[
+                ('objects', core_auth.models.TelegramUserManager()),
+            ],
+        ),
+    ]
@@ -2,11 +2,99 @@
 Core authentication models for user management.
 Reusable across projects - uses Django's built-in Groups and Permissions.
 """
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import models, connections, router, transaction, IntegrityError
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils.translation import gettext_lazy as _
 
 
+class TelegramUserManager(UserManager):
+    """User manager with an atomic insert-or-update by telegram_id."""
+
+    # Profile fields copied from Telegram on every contact
+    TELEGRAM_PROFILE_FIELDS = ['telegram_username', 'telegram_first_name', 'telegram_last_name']
+
+    def upsert_from_telegram(self, telegram_id, username, telegram_username='',
+                             telegram_first_name='', telegram_last_name='', language_code='en'):
+        """
+        Get or create the user for a Telegram account in one statement.
+
+        Runs INSERT ... ON CONFLICT (telegram_id) DO UPDATE, so concurrent
+        first messages from the same account can't collide on the unique
+        telegram_id. The Telegram profile fields are only written when they
+        changed. Falls back to get-then-create on databases without
+        ON CONFLICT support.
+        """
+        user = self.model(
+            telegram_id=telegram_id,
+            username=username,
+            telegram_username=telegram_username,
+            telegram_first_name=telegram_first_name,
+            telegram_last_name=telegram_last_name,
+            language_code=language_code,
+        )
+        db = router.db_for_write(self.model)
+        connection = connections[db]
+
+        if not (connection.features.supports_update_conflicts_with_target
+                and connection.features.can_return_rows_from_bulk_insert):
+            return self._get_or_create_from_telegram(user)
+
+        try:
+            with transaction.atomic(using=db):
+                return self._upsert(user, db)
+        except IntegrityError:
+            # Another account already uses this username
+            user.username = f"user_{telegram_id}"
+            return self._upsert(user, db)
+
+    def _upsert(self, user, db):
+        connection = connections[db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        fields = [f for f in self.model._meta.concrete_fields if not f.primary_key and not f.generated]
+        columns = ', '.join(qn(f.column) for f in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        params = [f.get_db_prep_save(f.pre_save(user, add=True), connection) for f in fields]
+
+        updated = self.TELEGRAM_PROFILE_FIELDS + ['updated_at']
+        assignments = ', '.join(f'{qn(c)} = EXCLUDED.{qn(c)}' for c in updated)
+        changed = ' OR '.join(f'{table}.{qn(c)} <> EXCLUDED.{qn(c)}' for c in self.TELEGRAM_PROFILE_FIELDS)
+        returning = ', '.join(qn(f.column) for f in self.model._meta.concrete_fields)
+
+        upsert = (
+            f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+            f'ON CONFLICT ({qn("telegram_id")}) DO UPDATE SET {assignments} WHERE {changed} '
+            f'RETURNING {returning}'
+        )
+        if connection.vendor == 'postgresql':
+            # An unchanged row isn't returned by the upsert; read it in the same statement
+            sql = (
+                f'WITH upserted AS ({upsert}) SELECT * FROM upserted UNION ALL '
+                f'SELECT {returning} FROM {table} WHERE {qn("telegram_id")} = %s '
+                f'AND NOT EXISTS (SELECT 1 FROM upserted)'
+            )
+            rows = list(self.raw(sql, params + [user.telegram_id]).using(db))
+        else:
+            rows = list(self.raw(upsert, params).using(db))
+        if not rows:
+            # Unchanged row that the statement couldn't see (e.g. inserted
+            # concurrently, or a backend without the combined query)
+            rows = [self.using(db).get(telegram_id=user.telegram_id)]
+        return rows[0]
+
+    def _get_or_create_from_telegram(self, user):
+        try:
+            return self.get(telegram_id=user.telegram_id)
+        except self.model.DoesNotExist:
+            pass
+        try:
+            user.save(force_insert=True)
+            return user
+        except IntegrityError:
+            # Created by a concurrent request in the meantime
+            return self.get(telegram_id=user.telegram_id)
+
+
 class TelegramUser(AbstractUser):
     """
     Extended user model with Telegram integration.
@@ -45,6 +133,8 @@ class TelegramUser(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TelegramUserManager()
+
     class Meta:
         verbose_name = _('User')
         verbose_name_plural = _('Users')
@@ -88,24 +178,63 @@ class TelegramUser(AbstractUser):
             return name
         return self.telegram_username or self.username
 
+    def load_permissions(self):
+        """
+        Compile the user's effective permissions and role.
+
+        Direct and group permissions are read in one query and kept on the
+        instance as a frozenset of 'app_label.codename' strings, so later
+        checks don't touch the database. The bot does this on a user's
+        first permission check and keeps the result with the cached user
+        (see core_bot.utils.has_permission).
+        """
+        from django.contrib.auth.models import Permission
+
+        if self.pk is None:
+            permissions, role = frozenset(), 'User'
+        else:
+            permissions = frozenset(
+                f'{app_label}.{codename}'
+                for app_label, codename in Permission.objects.filter(
+                    models.Q(user=self) | models.Q(group__user=self)
+                ).values_list('content_type__app_label', 'codename').distinct()
+            )
+            role = self.groups.order_by('pk').values_list('name', flat=True).first() or 'User'
+
+        self._permission_set = permissions
+        self._role = role
+        return permissions
+
+    def get_permission_set(self) -> frozenset:
+        """Get the compiled permission set (loaded on first use)."""
+        if getattr(self, '_permission_set', None) is None:
+            self.load_permissions()
+        return self._permission_set
+
     def has_project_permission(self, permission_codename):
         """
         Check if user has a specific permission.
 
+        Uses the compiled permission set, so it follows has_perm() for
+        active users and superusers without querying every time.
+
         Args:
             permission_codename: e.g., 'manage_projects', 'view_all_tasks'
 
         Returns:
             bool: True if user has permission
         """
-        return self.has_perm(f'core_auth.{permission_codename}')
+        if not self.is_active:
+            return False
+        if self.is_superuser:
+            return True
+        return f'core_auth.{permission_codename}' in self.get_permission_set()
 
     def get_role_display(self):
         """Get user's primary role (first group name)."""
-        groups = self.groups.all()
-        if groups:
-            return groups[0].name
-        return 'User'
+        if getattr(self, '_role', None) is None:
+            self.load_permissions()
+        return self._role
 
 
 class UserProfile(models.Model):
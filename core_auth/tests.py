@@ -1,3 +1,77 @@
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core_auth.models import TelegramUser
+
+
+class UpsertFromTelegramTests(TestCase):
+    """TelegramUser.objects.upsert_from_telegram() inserts, updates changed profiles and leaves the rest alone."""
+
+    profile = {'telegram_username': 'ada', 'telegram_first_name': 'Ada', 'telegram_last_name': 'Lovelace'}
+
+    def upsert(self, telegram_id=701, username='ada', **profile):
+        return TelegramUser.objects.upsert_from_telegram(
+            telegram_id=telegram_id, username=username, language_code='en', **{**self.profile, **profile}
+        )
+
+    def user_queries(self, queries):
+        table = TelegramUser._meta.db_table
+        return [q['sql'] for q in queries if table in q['sql'] and not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+
+    def test_inserts_new_account(self):
+        user = self.upsert()
+
+        self.assertIsNotNone(user.pk)
+        stored = TelegramUser.objects.get(telegram_id=701)
+        self.assertEqual(stored.pk, user.pk)
+        self.assertEqual(
+            (stored.username, stored.telegram_first_name, stored.telegram_last_name, stored.language_code),
+            ('ada', 'Ada', 'Lovelace', 'en'),
+        )
+        self.assertTrue(stored.is_active)
+
+    def test_changed_profile_is_updated(self):
+        first = self.upsert()
+
+        user = self.upsert(telegram_first_name='Augusta', username='augusta')
+
+        self.assertEqual(user.pk, first.pk)
+        self.assertEqual(user.telegram_first_name, 'Augusta')
+        stored = TelegramUser.objects.get(pk=first.pk)
+        self.assertEqual(stored.telegram_first_name, 'Augusta')
+        self.assertGreater(stored.updated_at, first.updated_at)
+        # Only the Telegram profile is copied; the username chosen on insert stays
+        self.assertEqual(stored.username, 'ada')
+        self.assertEqual(TelegramUser.objects.count(), 1)
+
+    def test_unchanged_profile_is_not_written(self):
+        first = self.upsert()
+
+        with CaptureQueriesContext(connection) as queries:
+            user = self.upsert()
+
+        self.assertEqual(user.pk, first.pk)
+        self.assertEqual(TelegramUser.objects.get(pk=first.pk).updated_at, first.updated_at)
+        if connection.vendor == 'postgresql':
+            # The unchanged row is read back by the same statement
+            self.assertEqual(len(self.user_queries(queries.captured_queries)), 1)
+
+    def test_taken_username_falls_back_to_telegram_id(self):
+        TelegramUser.objects.create(username='ada')
+
+        user = self.upsert(telegram_id=702)
+
+        self.assertEqual(user.username, 'user_702')
+        self.assertEqual(TelegramUser.objects.get(telegram_id=702).pk, user.pk)
+
+    def test_without_on_conflict_support(self):
+        first = self.upsert()
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assertEqual(self.upsert().pk, first.pk)
+            created = self.upsert(telegram_id=703, username='grace')
 
-# Create your tests here.
+        self.assertEqual(TelegramUser.objects.get(telegram_id=703).pk, created.pk)
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class CoreBotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_bot'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.models import Group, Permission
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from core_bot.identity import invalidate_cached_user, invalidate_cached_permissions, clear_cached_users
+
+        user_model = get_user_model()
+        post_save.connect(invalidate_cached_user, sender=user_model, dispatch_uid='core_bot_user_cache_save')
+        post_delete.connect(invalidate_cached_user, sender=user_model, dispatch_uid='core_bot_user_cache_delete')
+
+        # Cached users carry their permission set
+        for through in (user_model.groups.through, user_model.user_permissions.through, Group.permissions.through):
+            m2m_changed.connect(
+                invalidate_cached_permissions, sender=through,
+                dispatch_uid=f'core_bot_user_cache_{through._meta.label_lower}'
+            )
+        for model in (Group, Permission):
+            post_delete.connect(
+                clear_cached_users, sender=model,
+                dispatch_uid=f'core_bot_user_cache_{model._meta.label_lower}'
+            )
@@ -2,8 +2,9 @@
 Bot configuration for core_bot app.
 Defines basic handlers and core functionality (start, help, menu, reports).
 """
-from telegram.ext import CommandHandler, CallbackQueryHandler
-from core_bot.utils import MessageFormatter
+from telegram import Update
+from telegram.ext import CommandHandler, CallbackQueryHandler, TypeHandler
+from core_bot.utils import MessageFormatter, resolve_user
 
 
 # App metadata
@@ -25,6 +26,9 @@ def register_handlers(application):
     from core_bot.handlers.basic import start, help_command, menu
     from core_bot.handlers.reports import daily_report, weekly_report
 
+    # Look up the user once per update, before any other handler group
+    application.add_handler(TypeHandler(Update, resolve_user), group=-1)
+
     # Basic commands
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
@@ -0,0 +1,117 @@
+"""
+Update-id deduplication for webhook redeliveries.
+Telegram redelivers an update when the webhook answers too slowly,
+so every update id is claimed once before it is processed. A claim is
+released again when the update could not be queued or handled, so the
+redelivery Telegram makes after an error response is processed.
+"""
+import logging
+from collections import deque
+
+from django.db import IntegrityError, transaction
+
+from core_bot.utils import run_write
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """
+    Sliding window of recently seen update ids.
+
+    The in-memory window is a ring buffer plus a set: the oldest id is
+    evicted from the set when the buffer is full. With use_database=True
+    ids are also claimed in the ProcessedUpdate table, which catches
+    duplicates across restarts and multiple worker processes.
+    """
+
+    # Prune the database table every N claimed ids
+    PRUNE_EVERY = 1000
+
+    def __init__(self, window: int = 10000, use_database: bool = False):
+        self.window = window
+        self.use_database = use_database
+        self._ring = deque()
+        self._seen = set()
+        self._claimed = 0
+
+        # Metrics
+        self.checked = 0
+        self.duplicates = 0
+
+    def _remember(self, update_id: int) -> bool:
+        """Add an id to the in-memory window. Returns False if already present."""
+        if update_id in self._seen:
+            return False
+
+        if len(self._ring) >= self.window:
+            self._seen.discard(self._ring.popleft())
+        self._ring.append(update_id)
+        self._seen.add(update_id)
+        return True
+
+    def _claim_in_database(self, update_id: int) -> bool:
+        """Insert the id into the database. Returns False if it was already claimed."""
+        from core_bot.models import ProcessedUpdate
+
+        try:
+            with transaction.atomic():
+                ProcessedUpdate.objects.create(update_id=update_id)
+        except IntegrityError:
+            return False
+
+        self._claimed += 1
+        if self._claimed % self.PRUNE_EVERY == 0:
+            # Update ids are sequential, so anything older than the window is safe to drop
+            ProcessedUpdate.objects.filter(update_id__lt=update_id - self.window).delete()
+        return True
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Claim an update id. Returns True if it was already seen."""
+        if self.window <= 0:
+            return False
+
+        self.checked += 1
+        duplicate = not self._remember(update_id)
+
+        if not duplicate and self.use_database:
+            try:
+                duplicate = not await run_write(self._claim_in_database, update_id)
+            except Exception as e:
+                # Never drop updates because the database is unavailable
+                logger.error(f"Error claiming update {update_id}: {e}")
+
+        if duplicate:
+            self.duplicates += 1
+            logger.info(f"♻️  Skipping duplicate update {update_id}")
+        return duplicate
+
+    def _release_in_database(self, update_id: int):
+        from core_bot.models import ProcessedUpdate
+
+        ProcessedUpdate.objects.filter(update_id=update_id).delete()
+
+    async def release(self, update_id: int):
+        """Forget a claimed update id so its redelivery is processed."""
+        if self.window <= 0:
+            return
+
+        if update_id in self._seen:
+            self._seen.discard(update_id)
+            self._ring.remove(update_id)
+
+        if self.use_database:
+            try:
+                await run_write(self._release_in_database, update_id)
+            except Exception as e:
+                logger.error(f"Error releasing update {update_id}: {e}")
+
+    def stats(self) -> dict:
+        """Get deduplication metrics."""
+        return {
+            'window': self.window,
+            'database': self.use_database,
+            'tracked': len(self._ring),
+            'checked': self.checked,
+            'duplicates': self.duplicates,
+        }
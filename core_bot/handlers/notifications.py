@@ -50,7 +50,7 @@ async def list_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE)
         alert_type_emoji = {
             'TASK_ASSIGNED': '📝',
             'DEADLINE': '⏰',
-            'OVERDUE': '⚠️',
+            'TASK_OVERDUE': '⚠️',
             'MEETING': '📅',
             'APPROVAL': '✅',
             'GENERAL': '📢'
@@ -105,7 +105,7 @@ async def notification_detail(update: Update, context: ContextTypes.DEFAULT_TYPE
     alert_type_emoji = {
         'TASK_ASSIGNED': '📝',
         'DEADLINE': '⏰',
-        'OVERDUE': '⚠️',
+        'TASK_OVERDUE': '⚠️',
         'MEETING': '📅',
         'APPROVAL': '✅',
         'GENERAL': '📢'
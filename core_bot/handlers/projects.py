@@ -40,9 +40,8 @@ async def list_projects(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     buttons = []
     for project in paginated['items']:
-        # Get progress using sync_to_async to avoid async context issues
-        from asgiref.sync import sync_to_async
-        progress = await sync_to_async(project.get_progress_percentage)()
+        # Read from the stored task counters, so this doesn't query
+        progress = project.get_progress_percentage()
         status_emoji = MessageFormatter.get_status_emoji(project.status) if hasattr(project, 'status') else ''
 
         button_text = f"{status_emoji} {project.name} ({progress}%)"
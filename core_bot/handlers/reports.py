@@ -3,8 +3,9 @@ Report handlers - daily and weekly reports.
 """
 from telegram import Update
 from telegram.ext import ContextTypes
-from core_bot.utils import get_or_create_user, ModelManager, MessageFormatter
-from datetime import date
+from core_bot.utils import get_or_create_user, ModelManager, MessageFormatter, run_sync
+from datetime import date, timedelta
+from django.utils import timezone
 
 
 async def daily_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -25,9 +26,18 @@ async def weekly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """View weekly summary."""
     user = await get_or_create_user(update, context)
     
+    from core_tasks.stats import get_task_stats
+
+    week_start = timezone.now() - timedelta(days=7)
+    stats = await run_sync(get_task_stats, completed_since=week_start, assigned_to_id=user.id)
+
     msg = f"{MessageFormatter.EMOJI['chart']} <b>Weekly Summary</b>\n\n"
-    msg += "Feature coming soon!\n"
-    msg += "This will show your weekly progress, completed tasks, and statistics."
+    if not stats['total']:
+        msg += "No tasks assigned to you yet."
+    else:
+        msg += f"{MessageFormatter.EMOJI['success']} Completed this week: {stats['completed_recently']}\n\n"
+        msg += "<b>Your tasks:</b>\n"
+        msg += MessageFormatter.format_task_stats(stats)
     
     await update.message.reply_text(msg, parse_mode='HTML')
 
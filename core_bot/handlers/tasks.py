@@ -30,8 +30,7 @@ async def list_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         all_tasks = await task_manager.all()
     
-    # Sort by priority and deadline
-    all_tasks.sort(key=lambda t: (t.priority != 'URGENT', t.priority != 'HIGH', t.deadline or datetime.max))
+    # Already ordered by priority and deadline (Task.Meta.ordering)
     
     if not all_tasks:
         msg = f"{MessageFormatter.EMOJI['info']} No tasks found."
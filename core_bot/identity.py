@@ -0,0 +1,122 @@
+"""
+In-memory cache of TelegramUser rows keyed by telegram_id.
+Lets handlers resolve the user of an update without a database query.
+Entries expire after a TTL and are dropped whenever the user is saved.
+Cached users carry their compiled permission set and role once a
+handler has checked a permission; they are dropped too when group or
+permission memberships change.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+class UserCache:
+    """Thread-safe LRU cache with a time-to-live per entry."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # telegram_id -> (expires_at, user)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int):
+        """Get a copy of the cached user, or None if missing or expired."""
+        if self.maxsize <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[telegram_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(telegram_id)
+            self.hits += 1
+            user = entry[1]
+
+        # Handlers may modify the instance; keep the cached one pristine
+        return copy.copy(user)
+
+    def set(self, telegram_id: int, user):
+        """Cache a user, evicting the least recently used entry when full."""
+        if self.maxsize <= 0 or telegram_id is None:
+            return
+
+        with self._lock:
+            self._entries[telegram_id] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._entries.move_to_end(telegram_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: int):
+        """Drop a user from the cache."""
+        with self._lock:
+            self._entries.pop(telegram_id, None)
+
+    def clear(self):
+        """Drop all users."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Get cache size and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl_s': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(
+    maxsize=settings.BOT_USER_CACHE_SIZE,
+    ttl=settings.BOT_USER_CACHE_TTL,
+)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Signal receiver: drop a TelegramUser from the cache when it is saved or deleted."""
+    if instance.telegram_id is not None:
+        user_cache.invalidate(instance.telegram_id)
+
+
+def invalidate_cached_permissions(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Signal receiver (m2m_changed): drop users whose permissions may have changed.
+
+    Handles user.groups, user.user_permissions and group.permissions.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    user_model = get_user_model()
+    if isinstance(instance, user_model):
+        # user.groups.add(...) / user.user_permissions.remove(...)
+        invalidate_cached_user(sender, instance)
+    elif model is user_model and pk_set:
+        # group.user_set.add(...) / permission.user_set.remove(...)
+        for telegram_id in user_model.objects.filter(
+            pk__in=pk_set, telegram_id__isnull=False
+        ).values_list('telegram_id', flat=True):
+            user_cache.invalidate(telegram_id)
+    else:
+        # Group permissions changed or a reverse clear: affects many users
+        user_cache.clear()
+
+
+def clear_cached_users(sender, **kwargs):
+    """Signal receiver: drop all users (a group or permission was deleted)."""
+    user_cache.clear()
@@ -0,0 +1,169 @@
+"""
+Webhook ingest queue.
+Acknowledges Telegram webhook calls immediately and processes updates
+in the background with a pool of asyncio workers.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+
+def get_chat_key(update: Update) -> int:
+    """
+    Get the ordering key for an update.
+
+    Updates sharing a key are always handled in arrival order.
+    Falls back to the user and then to the update id for updates
+    without a chat (e.g. inline queries).
+    """
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return update.update_id
+
+
+class ThroughputMeter:
+    """Counts processed updates to compare ingest paths (webhook, queue, polling)."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.updates = 0
+        self.busy_seconds = 0.0
+
+    def record(self, count: int = 1, busy_seconds: float = 0.0):
+        """Record processed updates and the time spent handling them."""
+        self.updates += count
+        self.busy_seconds += busy_seconds
+
+    def stats(self) -> dict:
+        """Get throughput metrics since the meter was created."""
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'updates': self.updates,
+            'elapsed_s': round(elapsed, 1),
+            'updates_per_sec': round(self.updates / elapsed, 2) if elapsed else 0.0,
+            'handler_ms_avg': round(self.busy_seconds / self.updates * 1000, 2) if self.updates else 0.0,
+        }
+
+
+class UpdateQueue:
+    """
+    Bounded in-process update queue drained by a pool of workers.
+
+    Every worker owns one shard and updates are routed to a shard by
+    chat, so updates from the same chat are processed one at a time and
+    in order while different chats are processed concurrently.
+    """
+
+    def __init__(self, application, workers: int = 4, maxsize: int = 1000):
+        self.application = application
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self._shard_size = max(1, -(-maxsize // self.workers))
+        self._shards = []
+        self._tasks = []
+
+        # Metrics
+        self.enqueued = 0
+        self.processed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.throughput = ThroughputMeter()
+        self._waits = deque(maxlen=1000)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        """Number of updates waiting to be processed."""
+        return sum(shard.qsize() for shard in self._shards)
+
+    async def start(self):
+        """Start the worker pool."""
+        if self.running:
+            return
+
+        self._shards = [asyncio.Queue(maxsize=self._shard_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(shard), name=f"update-worker-{i}")
+            for i, shard in enumerate(self._shards)
+        ]
+        logger.info(f"📥 Update queue started with {self.workers} workers (max {self.maxsize} updates)")
+
+    async def stop(self, timeout: float = 10.0):
+        """Drain pending updates and stop the worker pool."""
+        if not self.running:
+            return
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.join() for shard in self._shards)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️  Update queue stopped with {self.depth} updates still pending")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._shards = []
+
+    def put(self, update: Update) -> bool:
+        """
+        Enqueue an update without waiting.
+
+        Returns False when the chat's shard is full so the caller can
+        ask Telegram to redeliver the update later.
+        """
+        shard = self._shards[get_chat_key(update) % self.workers]
+        try:
+            shard.put_nowait((update, time.monotonic()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        return True
+
+    async def _worker(self, shard: asyncio.Queue):
+        """Process updates from one shard sequentially."""
+        while True:
+            update, enqueued_at = await shard.get()
+            started_at = time.monotonic()
+            self._waits.append(started_at - enqueued_at)
+            try:
+                await self.application.process_update(update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+            finally:
+                self.throughput.record(1, time.monotonic() - started_at)
+                shard.task_done()
+
+    def stats(self) -> dict:
+        """Get queue depth and wait time metrics."""
+        waits = list(self._waits)
+        return {
+            'workers': self.workers,
+            'maxsize': self.maxsize,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'wait_ms_avg': round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            'wait_ms_max': round(max(waits) * 1000, 2) if waits else 0.0,
+        }
@@ -0,0 +1,125 @@
+"""
+Management command to measure handler latency with and without connection reuse on PostgreSQL.
+"""
+import asyncio
+import copy
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark bot handler latency on PostgreSQL opening a new connection "
+        "per database call, with persistent connections (CONN_MAX_AGE) and "
+        "with Django's psycopg connection pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--handlers',
+            type=int,
+            default=500,
+            help='Number of simulated handler runs per mode'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=20,
+            help='Handlers running at the same time'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.BOT_DB_EXECUTOR_WORKERS or 8,
+            help='Bot database threads (and pool size)'
+        )
+
+    def handle(self, *args, **options):
+        base = connections['default'].settings_dict
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError('This benchmark needs PostgreSQL (DB_PROFILE=postgres)')
+
+        workers = max(1, options['workers'])
+        base_options = {key: value for key, value in base['OPTIONS'].items() if key != 'pool'}
+        # Start from the profile's own pool options, so the benchmark builds
+        # the pool the way the bot does
+        pool_options = base['OPTIONS'].get('pool') or {}
+        if pool_options is True:
+            pool_options = {}
+        modes = {
+            'new connection per call': {'CONN_MAX_AGE': 0, 'OPTIONS': base_options},
+            'persistent (CONN_MAX_AGE=60)': {'CONN_MAX_AGE': 60, 'OPTIONS': base_options},
+            f'connection pool ({workers} connections)': {
+                'CONN_MAX_AGE': 0,
+                'OPTIONS': {
+                    **base_options,
+                    'pool': {**pool_options, 'min_size': workers, 'max_size': workers},
+                },
+            },
+        }
+
+        results = {}
+        with override_settings(BOT_DB_EXECUTOR_WORKERS=workers, DB_SINGLE_WRITER=False):
+            for i, (label, overrides) in enumerate(modes.items()):
+                # Each mode gets its own alias so connections aren't shared
+                alias = f'benchmark_{i}'
+                connections.settings[alias] = {**copy.deepcopy(base), **overrides}
+                try:
+                    results[label] = asyncio.run(
+                        self._run(alias, options['handlers'], options['concurrency'])
+                    )
+                finally:
+                    if overrides['OPTIONS'].get('pool'):
+                        connections[alias].close_pool()
+                    del connections.settings[alias]
+                self._report(label, results[label])
+
+        baseline = next(iter(results.values()))
+        for label, result in list(results.items())[1:]:
+            if result['p50_ms']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label}: median latency {baseline['p50_ms'] / result['p50_ms']:.1f}x lower"
+                ))
+
+    async def _run(self, alias: str, handlers: int, concurrency: int) -> dict:
+        from core_auth.models import TelegramUser
+        from core_bot.utils import run_sync
+        from core_tasks.models import Task, Alert
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def handler(i):
+            # Roughly what a "my tasks" update does: three database calls
+            async with semaphore:
+                started_at = time.monotonic()
+                user = await run_sync(TelegramUser.objects.using(alias).filter(telegram_id=i).first)
+                user_id = user.id if user else None
+                await run_sync(list, Task.objects.using(alias).filter(assigned_to_id=user_id, status='TODO')[:10])
+                await run_sync(Alert.objects.using(alias).filter(user_id=user_id, is_read=False).count)
+                latencies.append(time.monotonic() - started_at)
+
+        started_at = time.monotonic()
+        await asyncio.gather(*(handler(i) for i in range(handlers)))
+        elapsed = time.monotonic() - started_at
+
+        latencies.sort()
+        return {
+            'handlers': handlers,
+            'elapsed_s': round(elapsed, 2),
+            'rate': round(handlers / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        }
+
+    def _report(self, label: str, result: dict):
+        self.stdout.write(
+            f"{label}: {result['handlers']} handlers in {result['elapsed_s']}s "
+            f"- {result['rate']} handlers/s, latency p50 {result['p50_ms']}ms, "
+            f"p95 {result['p95_ms']}ms"
+        )
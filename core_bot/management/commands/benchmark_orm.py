@@ -0,0 +1,104 @@
+"""
+Management command to measure concurrent handler throughput against the database.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent bot handlers doing typical ModelManager queries, "
+        "with Django's async ORM (one shared thread) and with the database pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--handlers',
+            type=int,
+            default=500,
+            help='Number of simulated handler runs'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Handlers running at the same time'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.BOT_DB_EXECUTOR_WORKERS or 8,
+            help='Database pool size for the pooled run'
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=2.0,
+            help='Simulated network round trip added to every query (0 for none)'
+        )
+
+    def handle(self, *args, **options):
+        latency = options['latency_ms'] / 1000
+
+        def add_latency(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def on_connection_created(sender, connection, **kwargs):
+            if latency:
+                connection.execute_wrappers.append(add_latency)
+
+        # Every thread opens its own connection, so install the delay per connection
+        connections.close_all()
+        connection_created.connect(on_connection_created)
+        try:
+            with override_settings(BOT_DB_EXECUTOR_WORKERS=0):
+                before = asyncio.run(self._run(options['handlers'], options['concurrency']))
+            self._report('async ORM (shared thread)', before)
+
+            with override_settings(BOT_DB_EXECUTOR_WORKERS=max(1, options['workers'])):
+                after = asyncio.run(self._run(options['handlers'], options['concurrency']))
+            self._report(f"database pool ({options['workers']} threads)", after)
+        finally:
+            connection_created.disconnect(on_connection_created)
+
+        if before['rate']:
+            self.stdout.write(self.style.SUCCESS(f"Speedup: {after['rate'] / before['rate']:.1f}x"))
+
+    async def _run(self, handlers: int, concurrency: int) -> dict:
+        from core_bot.utils import ModelManager
+
+        user_manager = ModelManager('core_auth', 'TelegramUser')
+        task_manager = ModelManager('core_tasks', 'Task')
+        alert_manager = ModelManager('core_tasks', 'Alert')
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def handler(i):
+            # Roughly what a "my tasks" update does
+            async with semaphore:
+                user = await user_manager.get(telegram_id=i)
+                user_id = user.id if user else None
+                await task_manager.filter(assigned_to_id=user_id, status='TODO')
+                await alert_manager.count(user_id=user_id, is_read=False)
+
+        started_at = time.monotonic()
+        await asyncio.gather(*(handler(i) for i in range(handlers)))
+        elapsed = time.monotonic() - started_at
+
+        return {
+            'handlers': handlers,
+            'elapsed_s': round(elapsed, 2),
+            'rate': round(handlers / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def _report(self, label: str, result: dict):
+        self.stdout.write(
+            f"{label}: {result['handlers']} handlers in {result['elapsed_s']}s "
+            f"- {result['rate']} handlers/s"
+        )
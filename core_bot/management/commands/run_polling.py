@@ -0,0 +1,62 @@
+"""
+Management command to run the bot with long polling instead of a webhook.
+"""
+import asyncio
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+
+class Command(BaseCommand):
+    help = "Run the Telegram bot with batched long polling (no webhook or ngrok needed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=settings.TELEGRAM_POLLING_LIMIT,
+            help='Maximum updates per getUpdates batch (1-100)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=settings.TELEGRAM_POLLING_TIMEOUT,
+            help='Long polling timeout in seconds'
+        )
+
+    def handle(self, *args, **options):
+        from core_bot.bot import application
+        from core_bot.dedup import UpdateDeduplicator
+        from core_bot.polling import BatchPoller
+        from core_bot.reminders import get_reminder_scheduler
+
+        poller = BatchPoller(
+            application,
+            limit=options['limit'],
+            timeout=options['timeout'],
+            deduplicator=UpdateDeduplicator(
+                window=settings.TELEGRAM_DEDUP_WINDOW,
+                use_database=settings.TELEGRAM_DEDUP_DATABASE,
+            ),
+        )
+
+        reminder_scheduler = get_reminder_scheduler() if settings.REMINDER_TIMER else None
+
+        async def run():
+            async with application:
+                await application.start()
+                if reminder_scheduler is not None:
+                    await reminder_scheduler.start()
+                try:
+                    await poller.run()
+                finally:
+                    if reminder_scheduler is not None:
+                        await reminder_scheduler.stop()
+                    await application.stop()
+
+        self.stdout.write(self.style.SUCCESS('Bot is polling for updates. Press Ctrl+C to stop.'))
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Throughput: {poller.stats()}')
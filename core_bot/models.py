@@ -1,3 +1,19 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class ProcessedUpdate(models.Model):
+    """
+    Telegram update ids that have already been handled.
+    Used to drop webhook redeliveries across restarts and processes.
+    """
+
+    update_id = models.BigIntegerField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('Processed Update')
+        verbose_name_plural = _('Processed Updates')
+
+    def __str__(self):
+        return f"Update {self.update_id}"
@@ -0,0 +1,289 @@
+"""
+Outbound message scheduler.
+Every message the bot sends outside of a handler (reminders, alerts,
+daily report nudges) goes through this module so Telegram's rate limits
+are respected: 30 messages/second overall, 1 message/second per chat and
+20 messages/minute per group.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are reserved ahead of time: reserve() always takes a token
+    and returns how long the caller must wait before it may be used.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate  # Tokens per second
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token. Returns the delay in seconds before it is valid."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class SendResult(NamedTuple):
+    """Outcome of one send; truthy if the message was delivered."""
+
+    ok: bool
+    error: str = ''
+    # Retrying won't help (bot blocked, chat not found, bad request)
+    permanent: bool = False
+
+    def __bool__(self):
+        return self.ok
+
+
+class OutboundScheduler:
+    """
+    Rate-limited sender for the Telegram Bot API.
+
+    Each send reserves a token from the global bucket, the chat's bucket
+    and, for groups, the group's per-minute bucket, then waits for the
+    slowest of them. A 429 response pauses all sends for retry_after
+    seconds before the message is retried.
+    """
+
+    API_URL = "https://api.telegram.org/bot{token}/{method}"
+
+    # Idle per-chat buckets kept in memory
+    MAX_CHAT_BUCKETS = 10000
+
+    def __init__(
+        self,
+        token: str,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        group_per_minute: float = 20,
+        max_retries: int = 3,
+        request_timeout: float = 10,
+        concurrency: int = 16,
+    ):
+        self.token = token
+        self.chat_rate = chat_rate
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self.concurrency = concurrency
+
+        self._global = TokenBucket(global_rate)
+        self._chats = OrderedDict()
+        self._groups = OrderedDict()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+        # Metrics
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled_seconds = 0.0
+
+    def _bucket(self, buckets: OrderedDict, chat_id: int, rate: float, capacity: float) -> TokenBucket:
+        """Get (or create) a per-chat bucket, evicting the least recently used."""
+        with self._lock:
+            bucket = buckets.get(chat_id)
+            if bucket is None:
+                bucket = buckets[chat_id] = TokenBucket(rate, capacity)
+                if len(buckets) > self.MAX_CHAT_BUCKETS:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(chat_id)
+            return bucket
+
+    def wait_time(self, chat_id: int) -> float:
+        """Reserve a send slot for a chat. Returns seconds to wait before sending."""
+        delays = [
+            self._paused_until - time.monotonic(),
+            self._global.reserve(),
+            self._bucket(self._chats, chat_id, self.chat_rate, 1).reserve(),
+        ]
+        if chat_id < 0:  # Groups and channels have negative ids
+            delays.append(
+                self._bucket(
+                    self._groups, chat_id, self.group_per_minute / 60, self.group_per_minute
+                ).reserve()
+            )
+        return max(0.0, *delays)
+
+    def pause(self, seconds: float):
+        """Stop all sends for a while (after Telegram answered 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def pause_remaining(self) -> float:
+        """Seconds left of a 429 pause (0 if sends may go out)."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    @staticmethod
+    def get_retry_after(response) -> float:
+        """Read retry_after from a 429 response body."""
+        try:
+            return float(response.json().get('parameters', {}).get('retry_after', 1))
+        except ValueError:
+            return 1.0
+
+    @staticmethod
+    def get_error(response) -> str:
+        """Describe a failed response, e.g. '403 Forbidden: bot was blocked by the user'."""
+        try:
+            description = response.json().get('description')
+        except ValueError:
+            description = None
+        return f"{response.status_code} {description or response.text[:200]}"
+
+    def _handle_response(self, chat_id: int, response):
+        """
+        Check a sendMessage response.
+
+        Returns a SendResult, or None if the message should be retried
+        (429 and Telegram server errors).
+        """
+        if response.status_code == 200:
+            self.sent += 1
+            return SendResult(True)
+
+        if response.status_code == 429:
+            retry_after = self.get_retry_after(response)
+            logger.warning(f"⏳ Rate limited by Telegram, retrying in {retry_after}s")
+            self.pause(retry_after)
+            self.retried += 1
+            return None
+
+        error = self.get_error(response)
+        if response.status_code >= 500:
+            logger.warning(f"Error sending message to {chat_id}: {error}")
+            self.retried += 1
+            return None
+
+        # Other errors (blocked bot, chat not found, bad request) are permanent
+        logger.error(f"Failed to send message to {chat_id}: {error}")
+        self.failed += 1
+        return SendResult(False, error, permanent=True)
+
+    async def asend_message(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+        chat_id: int, text: str, parse_mode: str = 'HTML', **params
+    ) -> SendResult:
+        """Send a message, waiting for rate limits. Returns a SendResult (truthy on success)."""
+        url = self.API_URL.format(token=self.token, method='sendMessage')
+        payload = {'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode, **params}
+
+        error = ''
+        for attempt in range(self.max_retries + 1):
+            # Wait for the rate limit outside the semaphore so slots are
+            # only held by requests that are actually in flight
+            delay = self.wait_time(chat_id)
+            if delay:
+                self.throttled_seconds += delay
+                await asyncio.sleep(delay)
+
+            async with semaphore:
+                # A 429 answered to another send while this one waited
+                # (for its token or a free slot) holds it back too
+                while (paused := self.pause_remaining()) > 0:
+                    self.throttled_seconds += paused
+                    await asyncio.sleep(paused)
+                try:
+                    response = await client.post(url, json=payload)
+                except httpx.HTTPError as e:
+                    logger.warning(f"Error sending message to {chat_id}: {e}")
+                    error = f"Network error: {e}"
+                    self.retried += 1
+                    continue
+
+            result = self._handle_response(chat_id, response)
+            if result is not None:
+                return result
+            error = self.get_error(response)
+
+        self.failed += 1
+        return SendResult(False, error)
+
+    async def asend_many(self, messages, concurrency: int = None) -> dict:
+        """
+        Send (chat_id, text) pairs concurrently over keep-alive connections.
+
+        At most `concurrency` requests are in flight at once. Returns a
+        report with a SendResult per message ('results') and the achieved
+        send rate.
+        """
+        concurrency = concurrency or self.concurrency
+        started_at = time.monotonic()
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(limits=limits, timeout=self.request_timeout) as client:
+            results = await asyncio.gather(*(
+                self.asend_message(client, semaphore, chat_id, text)
+                for chat_id, text in messages
+            ))
+
+        return self._report(list(results), time.monotonic() - started_at)
+
+    def send_concurrently(self, messages, concurrency: int = None) -> dict:
+        """Run asend_many() from synchronous code (e.g. Celery tasks)."""
+        return asyncio.run(self.asend_many(messages, concurrency))
+
+    @staticmethod
+    def _report(results, elapsed: float) -> dict:
+        sent = sum(1 for result in results if result)
+        report = {
+            'results': results,
+            'sent': sent,
+            'failed': len(results) - sent,
+            'elapsed_s': round(elapsed, 2),
+            'rate': round(sent / elapsed, 2) if elapsed else 0.0,
+        }
+        logger.info(
+            f"📤 Sent {report['sent']} messages ({report['failed']} failed) "
+            f"in {report['elapsed_s']}s - {report['rate']} msg/s"
+        )
+        return report
+
+    def stats(self) -> dict:
+        """Get cumulative send metrics."""
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'throttled_s': round(self.throttled_seconds, 2),
+        }
+
+
+_scheduler = None
+
+
+def get_outbound_scheduler() -> OutboundScheduler:
+    """Get the process-wide scheduler configured from settings."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = OutboundScheduler(
+            settings.TELEGRAM_BOT_TOKEN,
+            global_rate=settings.TELEGRAM_RATE_GLOBAL,
+            chat_rate=settings.TELEGRAM_RATE_PER_CHAT,
+            group_per_minute=settings.TELEGRAM_RATE_GROUP_PER_MINUTE,
+            concurrency=settings.TELEGRAM_SEND_CONCURRENCY,
+        )
+    return _scheduler
@@ -0,0 +1,107 @@
+"""
+Long-polling update runner.
+Alternative to webhooks for running the bot without a public URL.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from telegram import Update
+from telegram.error import NetworkError, RetryAfter, TimedOut
+
+from core_bot.ingest import ThroughputMeter, get_chat_key
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPoller:
+    """
+    Fetch updates with getUpdates in batches and process each batch concurrently.
+
+    Updates are grouped by chat: groups run concurrently while updates
+    inside a group run sequentially, so per-chat ordering is kept.
+    """
+
+    # Log throughput every N batches
+    LOG_EVERY = 50
+
+    def __init__(self, application, limit: int = 100, timeout: int = 30, deduplicator=None):
+        self.application = application
+        self.limit = max(1, min(limit, 100))  # Telegram caps getUpdates at 100
+        self.timeout = timeout
+        self.deduplicator = deduplicator
+        self.throughput = ThroughputMeter()
+        self.batches = 0
+        self._offset = None
+        self._running = False
+
+    async def _process_chat(self, updates):
+        """Process one chat's updates in order."""
+        for update in updates:
+            try:
+                await self.application.process_update(update)
+            except Exception as e:
+                logger.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+
+    async def process_batch(self, updates):
+        """Process a batch of updates concurrently, keeping per-chat order."""
+        started_at = time.monotonic()
+
+        by_chat = defaultdict(list)
+        for update in updates:
+            if self.deduplicator and await self.deduplicator.is_duplicate(update.update_id):
+                continue
+            by_chat[get_chat_key(update)].append(update)
+
+        await asyncio.gather(*(self._process_chat(chat_updates) for chat_updates in by_chat.values()))
+
+        self.batches += 1
+        self.throughput.record(len(updates), time.monotonic() - started_at)
+
+        if self.batches % self.LOG_EVERY == 0:
+            logger.info(f"📊 Polling throughput: {self.stats()}")
+
+    async def run(self):
+        """Poll until stop() is called."""
+        bot = self.application.bot
+
+        # Webhooks and getUpdates are mutually exclusive
+        await bot.delete_webhook()
+
+        self._running = True
+        logger.info(f"🔄 Polling started (limit={self.limit}, timeout={self.timeout}s)")
+
+        while self._running:
+            try:
+                updates = await bot.get_updates(
+                    offset=self._offset,
+                    limit=self.limit,
+                    timeout=self.timeout,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except (TimedOut, NetworkError) as e:
+                logger.warning(f"⚠️  getUpdates failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not updates:
+                continue
+
+            # Confirm the batch with the next getUpdates call
+            self._offset = updates[-1].update_id + 1
+            await self.process_batch(updates)
+
+    def stop(self):
+        """Stop polling after the current batch."""
+        self._running = False
+
+    def stats(self) -> dict:
+        """Get polling throughput metrics."""
+        stats = self.throughput.stats()
+        stats['batches'] = self.batches
+        stats['batch_size_avg'] = round(self.throughput.updates / self.batches, 1) if self.batches else 0.0
+        return stats
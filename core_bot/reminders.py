@@ -0,0 +1,225 @@
+"""
+In-process reminder timer.
+Fires each Reminder at its remind_at time from inside the bot process,
+so reminders go out on time without Celery beat. Upcoming reminders are
+loaded in a rolling window; reminders created or edited in this process
+are added through model signals as they are saved. Reminders that skip
+the signals (bulk_create, other processes) are picked up by the next
+refill, up to refill_interval seconds later.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from core_bot.utils import run_sync
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """
+    Timer heap of (remind_at, reminder id).
+
+    The heap holds unsent reminders due within `window` seconds; it is
+    reloaded every `refill_interval` seconds, which also picks up
+    reminders written by other processes (admin, Celery). Edited or
+    deleted reminders leave stale heap entries behind, which are skipped
+    because they no longer match `_scheduled`.
+    """
+
+    def __init__(self, window: float = 3600, refill_interval: float = 300):
+        self.window = window
+        self.refill_interval = min(refill_interval, window)
+
+        self._heap = []
+        self._scheduled = {}  # reminder id -> remind_at timestamp
+        self._loop = None
+        self._task = None
+        self._wakeup = None
+        self._next_refill = 0.0
+
+        # Metrics
+        self.fired = 0
+        self.queued = 0
+        self.refills = 0
+        self._lateness = deque(maxlen=1000)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        """Load upcoming reminders and start the timer."""
+        if self.running:
+            return
+
+        from core_tasks.models import Reminder
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        post_save.connect(self._on_saved, sender=Reminder, dispatch_uid='core_bot_reminder_timer_save')
+        post_delete.connect(self._on_deleted, sender=Reminder, dispatch_uid='core_bot_reminder_timer_delete')
+
+        self._task = asyncio.create_task(self._run(), name='reminder-timer')
+        logger.info(f"⏰ Reminder timer started (window {self.window:.0f}s)")
+
+    async def stop(self):
+        """Stop the timer."""
+        if not self.running:
+            return
+
+        from core_tasks.models import Reminder
+
+        post_save.disconnect(sender=Reminder, dispatch_uid='core_bot_reminder_timer_save')
+        post_delete.disconnect(sender=Reminder, dispatch_uid='core_bot_reminder_timer_delete')
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._heap = []
+        self._scheduled = {}
+
+    def schedule(self, reminder_id: int, remind_at: float):
+        """Add or move a reminder (remind_at as a Unix timestamp). Call on the event loop."""
+        if self._scheduled.get(reminder_id) == remind_at:
+            return
+        if remind_at > time.time() + self.window:
+            # Loaded by a later refill
+            self._scheduled.pop(reminder_id, None)
+            return
+
+        self._scheduled[reminder_id] = remind_at
+        heapq.heappush(self._heap, (remind_at, reminder_id))
+        if self._heap[0][1] == reminder_id and self._wakeup is not None:
+            self._wakeup.set()
+
+    def unschedule(self, reminder_id: int):
+        """Forget a reminder; its heap entry is skipped when it comes up."""
+        self._scheduled.pop(reminder_id, None)
+
+    def _on_saved(self, sender, instance, raw=False, **kwargs):
+        """Signal receiver: (re)schedule a saved reminder."""
+        if raw or self._loop is None:
+            return
+        if instance.is_sent or instance.delivery_failed:
+            self._loop.call_soon_threadsafe(self.unschedule, instance.pk)
+        else:
+            self._loop.call_soon_threadsafe(self.schedule, instance.pk, instance.remind_at.timestamp())
+
+    def _on_deleted(self, sender, instance, **kwargs):
+        """Signal receiver: drop a deleted reminder."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.unschedule, instance.pk)
+
+    def _load_window(self) -> list:
+        """Get (id, remind_at) of unsent reminders due before the end of the window."""
+        from core_tasks.models import Reminder
+
+        horizon = timezone.now() + timedelta(seconds=self.window)
+        return list(
+            Reminder.objects.filter(
+                is_sent=False,
+                delivery_failed=False,
+                remind_at__lte=horizon,
+                user__telegram_id__isnull=False
+            ).values_list('id', 'remind_at')
+        )
+
+    async def _refill(self):
+        """Reload the rolling window from the database."""
+        self._next_refill = time.time() + self.refill_interval
+        try:
+            rows = await run_sync(self._load_window)
+        except Exception as e:
+            logger.error(f"Error loading reminders: {e}", exc_info=True)
+            return
+
+        for reminder_id, remind_at in rows:
+            self.schedule(reminder_id, remind_at.timestamp())
+        self.refills += 1
+
+        # Drop stale entries left by edited and deleted reminders
+        if len(self._heap) > 2 * len(self._scheduled) + 100:
+            self._heap = [(remind_at, reminder_id) for reminder_id, remind_at in self._scheduled.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> list:
+        """Take the ids of reminders that are due."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            remind_at, reminder_id = heapq.heappop(self._heap)
+            if self._scheduled.get(reminder_id) == remind_at:
+                del self._scheduled[reminder_id]
+                due.append(reminder_id)
+                self._lateness.append(now - remind_at)
+        return due
+
+    @staticmethod
+    async def _send(ids) -> int:
+        """Queue the fired reminders in the outbox and send just those."""
+        from core_tasks import outbox
+
+        queued = await run_sync(outbox.enqueue_due_reminders, ids)
+        # The rest of the outbox (alerts, daily reports, retries of other
+        # messages) is left to the drain_outbox job
+        await outbox.adrain(keys=[f"reminder:{reminder_id}" for reminder_id in ids])
+        return queued
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            if now >= self._next_refill:
+                await self._refill()
+
+            due = self._pop_due(time.time())
+            if due:
+                self.fired += len(due)
+                try:
+                    self.queued += await self._send(due)
+                except Exception as e:
+                    # Still unsent, so the next refill schedules them again
+                    logger.error(f"Error sending {len(due)} reminders: {e}", exc_info=True)
+                continue
+
+            # Sleep until the next reminder, the next refill or a new earlier reminder
+            wake_at = min(self._next_refill, self._heap[0][0]) if self._heap else self._next_refill
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        """Get timer metrics."""
+        lateness = list(self._lateness)
+        return {
+            'running': self.running,
+            'scheduled': len(self._scheduled),
+            'heap_size': len(self._heap),
+            'fired': self.fired,
+            'queued': self.queued,
+            'refills': self.refills,
+            'late_ms_avg': round(sum(lateness) / len(lateness) * 1000, 1) if lateness else 0.0,
+            'late_ms_max': round(max(lateness) * 1000, 1) if lateness else 0.0,
+        }
+
+
+_scheduler = None
+
+
+def get_reminder_scheduler() -> ReminderScheduler:
+    """Get the process-wide reminder timer configured from settings."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ReminderScheduler(
+            window=settings.REMINDER_TIMER_WINDOW,
+            refill_interval=settings.REMINDER_TIMER_REFILL,
+        )
+    return _scheduler
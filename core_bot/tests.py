@@ -1,3 +1,784 @@
-from django.test import TestCase
+import asyncio
+import importlib.util
+import os
+import time
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from telegram import Chat, Message, Update, User
+from telegram.error import TimedOut
+
+from core_auth.models import TelegramUser
+from core_bot.dedup import UpdateDeduplicator
+from core_bot.identity import user_cache
+from core_bot.ingest import UpdateQueue
+from core_bot.models import ProcessedUpdate
+from core_bot.outbound import OutboundScheduler, TokenBucket
+from core_bot.polling import BatchPoller
+from core_bot.reminders import ReminderScheduler
+from core_bot.utils import (
+    KeyboardBuilder, KeysetOrdering, ModelManager, get_or_create_user, has_permission, parse_page_callback,
+    resolve_user, run_sync, run_write,
+)
+from core_tasks.handlers.tasks import TASK_LIST_ORDERING
+from core_tasks.models import Reminder
+
+
+class FakeRequest:
+    method = 'POST'
+
+    def __init__(self, data=None, headers=None):
+        self._data = data
+        self.headers = headers or {}
+
+    async def json(self):
+        return self._data
+
+
+class FakeQueue:
+    """Update queue that rejects updates until it has room."""
+
+    def __init__(self, full=True):
+        self.full = full
+        self.updates = []
+
+    def put(self, update) -> bool:
+        if self.full:
+            return False
+        self.updates.append(update)
+        return True
+
+
+class WebhookRedeliveryTests(TransactionTestCase):
+    """A rejected or failed update must be processed when Telegram redelivers it."""
+
+    update = {'update_id': 4242}
+
+    def setUp(self):
+        from Tasky import asgi
+        self.asgi = asgi
+        self.deduplicator = UpdateDeduplicator(window=100, use_database=True)
+
+    async def test_queue_full_then_redelivery(self):
+        queue = FakeQueue(full=True)
+        with mock.patch.object(self.asgi, 'update_queue', queue), \
+                mock.patch.object(self.asgi, 'deduplicator', self.deduplicator):
+            response = await self.asgi.telegram_webhook(FakeRequest(self.update))
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(await ProcessedUpdate.objects.filter(update_id=4242).aexists())
+
+            queue.full = False
+            response = await self.asgi.telegram_webhook(FakeRequest(self.update))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([u.update_id for u in queue.updates], [4242])
+
+            # A further redelivery of a queued update is a duplicate
+            response = await self.asgi.telegram_webhook(FakeRequest(self.update))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queue.updates), 1)
+            self.assertEqual(self.deduplicator.duplicates, 1)
+
+    async def test_inline_error_then_redelivery(self):
+        process_update = mock.AsyncMock(side_effect=[RuntimeError('handler failed'), None])
+        application = mock.Mock(bot=self.asgi.application.bot, process_update=process_update)
+        with mock.patch.object(self.asgi, 'update_queue', None), \
+                mock.patch.object(self.asgi, 'deduplicator', self.deduplicator), \
+                mock.patch.object(self.asgi, 'application', application):
+            with self.assertRaises(RuntimeError):
+                await self.asgi.telegram_webhook(FakeRequest(self.update))
+
+            response = await self.asgi.telegram_webhook(FakeRequest(self.update))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(process_update.await_count, 2)
+            self.assertEqual(self.deduplicator.duplicates, 0)
+
+
+def make_update(update_id, chat_id):
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    message = Message(update_id, timezone.now(), chat, text=str(update_id))
+    return Update(update_id, message=message)
+
+
+class UpdateQueueTests(SimpleTestCase):
+    """Chats keep their order across shards, full shards push back and stop() drains."""
+
+    def setUp(self):
+        self.gate = asyncio.Event()
+        self.processed = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def process_update(self, update):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await self.gate.wait()
+            await asyncio.sleep(0)
+            self.processed.append((update.effective_chat.id, update.update_id))
+        finally:
+            self.in_flight -= 1
+
+    def queue(self, workers=3, maxsize=30):
+        return UpdateQueue(mock.Mock(process_update=self.process_update), workers=workers, maxsize=maxsize)
+
+    async def test_chat_order_kept_across_shards(self):
+        queue = self.queue()
+        await queue.start()
+        chats = [1, 2, 3, 4, 1, 1, 5, 2, 4, 1, 3, 2]
+        for update_id, chat_id in enumerate(chats, start=100):
+            self.assertTrue(queue.put(make_update(update_id, chat_id)))
+        await asyncio.sleep(0)
+
+        self.gate.set()
+        await queue.stop()
+
+        self.assertEqual(len(self.processed), len(chats))
+        for chat_id in set(chats):
+            arrived = [update_id for update_id, chat in enumerate(chats, start=100) if chat == chat_id]
+            self.assertEqual([update_id for chat, update_id in self.processed if chat == chat_id], arrived)
+        # One update per shard at a time, shards side by side
+        self.assertEqual(self.max_in_flight, 3)
+
+    async def test_full_shard_is_rejected_with_503(self):
+        from Tasky import asgi
+
+        queue = self.queue(workers=2, maxsize=2)
+        await queue.start()
+        try:
+            self.assertTrue(queue.put(make_update(1, 2)))
+            await asyncio.sleep(0)  # taken by the worker, which waits on the gate
+            self.assertTrue(queue.put(make_update(2, 4)))
+            self.assertFalse(queue.put(make_update(3, 6)))
+            # Another shard still has room
+            self.assertTrue(queue.put(make_update(4, 1)))
+
+            deduplicator = UpdateDeduplicator(window=100)
+            with mock.patch.object(asgi, 'update_queue', queue), \
+                    mock.patch.object(asgi, 'deduplicator', deduplicator):
+                response = await asgi.telegram_webhook(FakeRequest(make_update(5, 8).to_dict()))
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(queue.stats()['rejected'], 2)
+        finally:
+            self.gate.set()
+            await queue.stop()
+
+        self.assertEqual(sorted(update_id for _, update_id in self.processed), [1, 2, 4])
+
+    async def test_stop_drains_pending_updates(self):
+        queue = self.queue(workers=2, maxsize=10)
+        await queue.start()
+        for update_id in range(8):
+            queue.put(make_update(update_id, update_id % 3))
+        asyncio.get_running_loop().call_later(0.01, self.gate.set)
+
+        await queue.stop()
+
+        self.assertFalse(queue.running)
+        self.assertEqual(len(self.processed), 8)
+        self.assertEqual(queue.stats()['processed'], 8)
+
+    async def test_depth_and_wait_metrics(self):
+        clock = FakeClock()
+        with mock.patch('core_bot.ingest.time.monotonic', clock):
+            queue = self.queue(workers=2, maxsize=10)
+            await queue.start()
+            for update_id in range(4):
+                queue.put(make_update(update_id, 1))
+            self.assertEqual(queue.depth, 4)
+            self.assertEqual(queue.stats()['max_depth'], 4)
+
+            clock.advance(0.25)
+            self.gate.set()
+            await queue.stop()
+
+        stats = queue.stats()
+        self.assertEqual((stats['enqueued'], stats['processed'], stats['depth']), (4, 4, 0))
+        # Updates of one chat wait for each other; the clock only moved once
+        self.assertEqual(stats['wait_ms_max'], 250.0)
+        self.assertEqual(stats['wait_ms_avg'], 250.0)
+
+
+class StatsEndpointTests(SimpleTestCase):
+
+    def stats(self, headers=None):
+        from Tasky import asgi
+        return asyncio.run(asgi.telegram_stats(FakeRequest(headers=headers)))
+
+    @override_settings(TELEGRAM_STATS_TOKEN='')
+    def test_disabled_without_token(self):
+        self.assertEqual(self.stats({'authorization': 'Bearer '}).status_code, 404)
+
+    @override_settings(TELEGRAM_STATS_TOKEN='s3cret')
+    def test_requires_token(self):
+        self.assertEqual(self.stats().status_code, 401)
+        self.assertEqual(self.stats({'authorization': 'Bearer wrong'}).status_code, 401)
+        response = self.stats({'authorization': 'Bearer s3cret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'"dedup"', response.body)
+
+
+def load_settings(**environ):
+    """Load Tasky/settings.py as a fresh module with the given environment (None unsets)."""
+    spec = importlib.util.find_spec('Tasky.settings')
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, {k: v for k, v in environ.items() if v is not None}):
+        for name in [k for k, v in environ.items() if v is None]:
+            os.environ.pop(name, None)
+        spec.loader.exec_module(module)
+    return module
+
+
+class DatabaseThreadDefaultsTests(SimpleTestCase):
+
+    def workers(self, **environ):
+        return load_settings(**{'BOT_DB_EXECUTOR_WORKERS': None, 'DB_SINGLE_WRITER': None, **environ}).BOT_DB_EXECUTOR_WORKERS
+
+    def test_plain_sqlite_runs_queries_on_one_thread(self):
+        self.assertEqual(self.workers(DB_PROFILE='sqlite'), 0)
+
+    def test_pool_on_when_concurrent_writes_are_safe(self):
+        self.assertEqual(self.workers(DB_PROFILE='sqlite-wal'), 8)
+        self.assertEqual(self.workers(DB_PROFILE='postgres'), 8)
+        self.assertEqual(self.workers(DB_PROFILE='sqlite', DB_SINGLE_WRITER='True'), 8)
+
+
+@unittest.skipUnless(importlib.util.find_spec('psycopg_pool'), 'needs psycopg[pool]')
+class PostgresProfileTests(SimpleTestCase):
+
+    def test_profile_builds_connection_pool(self):
+        from psycopg_pool import ConnectionPool
+
+        database = load_settings(DB_PROFILE='postgres', DB_POOL='True').DATABASES['default']
+        # The pool is created without connecting, so no server is needed
+        connection = ConnectionHandler({'default': {}, 'profile': database})['profile']
+        pool = connection.pool
+        try:
+            self.assertIsInstance(pool, ConnectionPool)
+            self.assertEqual((pool.min_size, pool.max_size), (2, 20))
+            self.assertEqual(pool._check, ConnectionPool.check_connection)
+        finally:
+            connection.close_pool()
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body or {'ok': status_code == 200}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+
+class ScriptedClient:
+    """Answers each request with the next response from a list."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.posted = 0
+
+    async def post(self, url, json=None):
+        self.posted += 1
+        return self.responses.pop(0)
+
+
+class FakeTelegramClient:
+    """Answers after `latency` seconds; the `rate_limited`-th request gets a 429."""
+
+    def __init__(self, latency=0.05, rate_limited=3, retry_after=0.3):
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.posted_at = []
+        self.pause_window = None
+
+    async def post(self, url, json=None):
+        self.posted_at.append(time.monotonic())
+        number = len(self.posted_at)
+        await asyncio.sleep(self.latency)
+        if number == self.rate_limited:
+            now = time.monotonic()
+            self.pause_window = (now, now + self.retry_after)
+            return FakeResponse(429, {'ok': False, 'parameters': {'retry_after': self.retry_after}})
+        return FakeResponse(200)
+
+
+class OutboundPauseTests(SimpleTestCase):
+    """A 429 answered to one send holds back every send that hasn't gone out yet."""
+
+    def test_no_send_inside_retry_after_window(self):
+        scheduler = OutboundScheduler('token', global_rate=1000, chat_rate=1000)
+        client = FakeTelegramClient()
+
+        async def send_all():
+            semaphore = asyncio.Semaphore(8)
+            return await asyncio.gather(*(
+                scheduler.asend_message(client, semaphore, chat_id, 'hi') for chat_id in range(1, 41)
+            ))
+
+        results = asyncio.run(send_all())
+
+        self.assertTrue(all(results))
+        start, end = client.pause_window
+        inside = [t for t in client.posted_at if start <= t < end]
+        self.assertEqual(inside, [])
+        self.assertEqual(len(client.posted_at), 41)
+
+
+class FakeClock:
+    """Stands in for time.monotonic() or time.time(); moves only when advanced."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class RatePacingTests(SimpleTestCase):
+    """Token buckets space sends at the global, per-chat and per-group rates."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('core_bot.outbound.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_allows_a_burst_then_paces(self):
+        bucket = TokenBucket(rate=2)
+
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+        # One second refills two tokens, both already promised to waiting callers
+        self.clock.advance(1)
+        self.assertEqual(bucket.reserve(), 0.5)
+
+        # Idle time refills up to the capacity only
+        self.clock.advance(60)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.5])
+
+    def test_global_rate_across_chats(self):
+        scheduler = OutboundScheduler('token', global_rate=30, chat_rate=1000)
+
+        delays = [scheduler.wait_time(chat_id) for chat_id in range(1, 33)]
+
+        self.assertEqual(delays[:30], [0.0] * 30)
+        self.assertAlmostEqual(delays[30], 1 / 30)
+        self.assertAlmostEqual(delays[31], 2 / 30)
+
+    def test_one_message_per_second_per_chat(self):
+        scheduler = OutboundScheduler('token', global_rate=1000, chat_rate=1)
+
+        self.assertEqual([scheduler.wait_time(7) for _ in range(3)], [0.0, 1.0, 2.0])
+        # Other chats aren't held back
+        self.assertEqual(scheduler.wait_time(8), 0.0)
+
+    def test_twenty_messages_per_minute_per_group(self):
+        scheduler = OutboundScheduler('token', global_rate=1000, chat_rate=1000, group_per_minute=20)
+
+        delays = [scheduler.wait_time(-100) for _ in range(22)]
+
+        self.assertTrue(all(delay < 0.1 for delay in delays[:20]))
+        self.assertAlmostEqual(delays[20], 3.0)
+        self.assertAlmostEqual(delays[21], 6.0)
+        # Private chats (positive ids) have no per-minute bucket
+        self.assertLess(max(scheduler.wait_time(100) for _ in range(22)), 0.1)
+
+    def test_pause_holds_every_chat(self):
+        scheduler = OutboundScheduler('token', global_rate=1000, chat_rate=1000)
+
+        scheduler.pause(5)
+
+        self.assertEqual(scheduler.wait_time(1), 5.0)
+        self.clock.advance(5)
+        self.assertEqual(scheduler.wait_time(2), 0.0)
+
+
+class OutboundErrorTests(SimpleTestCase):
+    """Failures carry Telegram's description and say whether a retry can help."""
+
+    def send(self, responses):
+        scheduler = OutboundScheduler('token', global_rate=1000, chat_rate=1000, max_retries=2)
+        client = ScriptedClient(responses)
+        result = asyncio.run(scheduler.asend_message(client, asyncio.Semaphore(1), 1, 'hi'))
+        return result, client.posted
+
+    def test_blocked_bot_is_permanent_without_retry(self):
+        result, posted = self.send([
+            FakeResponse(403, {'ok': False, 'description': 'Forbidden: bot was blocked by the user'}),
+        ])
+        self.assertFalse(result)
+        self.assertTrue(result.permanent)
+        self.assertEqual(result.error, '403 Forbidden: bot was blocked by the user')
+        self.assertEqual(posted, 1)
+
+    def test_server_error_is_retried(self):
+        result, posted = self.send([FakeResponse(502), FakeResponse(200)])
+        self.assertTrue(result)
+        self.assertEqual(posted, 2)
+
+    def test_retries_exhausted_is_transient(self):
+        result, posted = self.send([FakeResponse(500, {'ok': False, 'description': 'Internal'})] * 3)
+        self.assertFalse(result)
+        self.assertFalse(result.permanent)
+        self.assertEqual(result.error, '500 Internal')
+        self.assertEqual(posted, 3)
+
+
+class ScriptedBot:
+    """getUpdates answers from a script; records the offset of each call."""
+
+    def __init__(self, poller, script):
+        self.poller = poller
+        self.script = list(script)
+        self.calls = []
+
+    async def delete_webhook(self):
+        pass
+
+    async def get_updates(self, offset=None, limit=None, timeout=None, allowed_updates=None):
+        self.calls.append((offset, limit))
+        if not self.script:
+            self.poller.stop()
+            return []
+        answer = self.script.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class BatchPollerTests(SimpleTestCase):
+
+    update = staticmethod(make_update)
+
+    def poll(self, script, limit=100, deduplicator=None):
+        processed = []
+
+        async def process_update(update):
+            processed.append(update.update_id)
+
+        application = mock.Mock(process_update=process_update)
+        poller = BatchPoller(application, limit=limit, timeout=30, deduplicator=deduplicator)
+        application.bot = bot = ScriptedBot(poller, script)
+        with mock.patch('core_bot.polling.asyncio.sleep', mock.AsyncMock()):
+            asyncio.run(poller.run())
+        return poller, bot, processed
+
+    def test_offset_confirms_each_batch(self):
+        poller, bot, processed = self.poll([
+            [self.update(10, 1), self.update(11, 2), self.update(12, 1)],
+            [],
+            TimedOut(),
+            [self.update(13, 2), self.update(15, 3)],
+        ], limit=500)
+
+        self.assertEqual(bot.calls, [(None, 100), (13, 100), (13, 100), (13, 100), (16, 100)])
+        self.assertEqual(sorted(processed), [10, 11, 12, 13, 15])
+        self.assertEqual(poller.batches, 2)
+        self.assertEqual(poller.stats()['batch_size_avg'], 2.5)
+
+    def test_chat_order_kept_within_batch(self):
+        _, _, processed = self.poll([
+            [self.update(20, 1), self.update(21, 2), self.update(22, 1), self.update(23, 1)],
+        ])
+
+        self.assertEqual([i for i in processed if i != 21], [20, 22, 23])
+
+    def test_redelivered_updates_are_skipped(self):
+        deduplicator = UpdateDeduplicator(window=100)
+
+        _, bot, processed = self.poll([
+            [self.update(30, 1), self.update(31, 1)],
+            [self.update(31, 1), self.update(32, 1)],
+        ], deduplicator=deduplicator)
+
+        self.assertEqual(processed, [30, 31, 32])
+        self.assertEqual(bot.calls[-1][0], 33)
+        self.assertEqual(deduplicator.duplicates, 1)
+
+
+@override_settings(BOT_DB_EXECUTOR_WORKERS=0)
+class ReminderTimerTests(SimpleTestCase):
+    """The reminder timer heap follows edits, skips stale entries and wakes for earlier reminders."""
+
+    def setUp(self):
+        self.clock = FakeClock(now=1_700_000_000.0)
+        patcher = mock.patch('core_bot.reminders.time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.timer = ReminderScheduler(window=3600, refill_interval=300)
+
+    def reminder(self, reminder_id, delay, **fields):
+        remind_at = datetime.fromtimestamp(self.clock() + delay, tz=dt_timezone.utc)
+        return Reminder(id=reminder_id, remind_at=remind_at, **fields)
+
+    async def test_signals_reschedule_and_unschedule(self):
+        self.timer._loop = asyncio.get_running_loop()
+        now = self.clock()
+
+        self.timer._on_saved(Reminder, self.reminder(1, 60))
+        self.timer._on_saved(Reminder, self.reminder(2, 90))
+        await asyncio.sleep(0)
+        self.assertEqual(self.timer._scheduled, {1: now + 60, 2: now + 90})
+
+        self.timer._on_saved(Reminder, self.reminder(1, 30))
+        self.timer._on_saved(Reminder, self.reminder(2, 90, is_sent=True))
+        self.timer._on_saved(Reminder, self.reminder(3, 45), raw=True)
+        await asyncio.sleep(0)
+        self.assertEqual(self.timer._scheduled, {1: now + 30})
+
+        self.timer._on_deleted(Reminder, self.reminder(1, 30))
+        await asyncio.sleep(0)
+        self.assertEqual(self.timer._scheduled, {})
+
+    def test_stale_entries_are_skipped(self):
+        now = self.clock()
+        self.timer.schedule(1, now + 10)
+        self.timer.schedule(1, now + 20)
+        self.timer.schedule(2, now + 15)
+        self.timer.unschedule(2)
+
+        self.assertEqual(self.timer._pop_due(now + 15), [])
+        self.assertEqual(self.timer._pop_due(now + 20), [1])
+        self.assertEqual(self.timer._heap, [])
+        self.assertEqual(self.timer.stats()['late_ms_max'], 0.0)
+
+    async def test_refill_loads_the_window_and_drops_stale_entries(self):
+        now = self.clock()
+        # Beyond the window: left to a refill
+        self.timer.schedule(1, now + 7200)
+        self.assertEqual(self.timer._scheduled, {})
+        for delay in range(200):
+            self.timer.schedule(2, now + 60 + delay)
+
+        self.clock.advance(3600)
+        rows = [(1, datetime.fromtimestamp(now + 7200, tz=dt_timezone.utc))]
+        with mock.patch.object(self.timer, '_load_window', return_value=rows):
+            await self.timer._refill()
+
+        self.assertEqual(self.timer._scheduled, {1: now + 7200, 2: now + 259})
+        self.assertEqual(sorted(self.timer._heap), [(now + 259, 2), (now + 7200, 1)])
+        self.assertEqual(self.timer._next_refill, self.clock() + 300)
+        self.assertEqual(self.timer.refills, 1)
+
+    async def test_earlier_reminder_wakes_the_timer(self):
+        sent = asyncio.Queue()
+
+        async def send(ids):
+            await sent.put(ids)
+            return len(ids)
+
+        with mock.patch.object(self.timer, '_load_window', return_value=[]), \
+                mock.patch.object(self.timer, '_send', send):
+            await self.timer.start()
+            try:
+                self.timer.schedule(1, self.clock() + 600)
+                await asyncio.sleep(0.01)
+                self.assertTrue(sent.empty())
+
+                # Due now, well before the timer's next wake-up
+                self.clock.advance(5)
+                self.timer.schedule(2, self.clock() - 2)
+                self.assertEqual(await asyncio.wait_for(sent.get(), timeout=1), [2])
+            finally:
+                await self.timer.stop()
+
+        self.assertEqual(self.timer.fired, 1)
+        self.assertEqual(self.timer.queued, 1)
+        self.assertEqual(self.timer.stats()['late_ms_max'], 2000.0)
+
+
+class KeysetPaginationTests(TransactionTestCase):
+    """Cursor pages match the OFFSET pages, walking either way across ties and NULL deadlines."""
+
+    per_page = 3
+
+    def setUp(self):
+        from core_auth.models import TelegramUser
+        from core_tasks.models import Project, Task
+
+        user = TelegramUser.objects.create(username='pager')
+        project = Project.objects.create(name='Pages', owner=user)
+        deadline = timezone.now().replace(microsecond=123456)
+        # Ties on priority and deadline, and NULL deadlines within each priority
+        for i, (priority, days) in enumerate([
+            ('HIGH', 1), ('HIGH', 1), ('HIGH', None), ('LOW', 2), ('URGENT', None), ('LOW', None),
+            ('HIGH', 1), ('MEDIUM', 3), ('LOW', 2), ('URGENT', 1), ('LOW', None), ('MEDIUM', 3), ('HIGH', None),
+        ]):
+            Task.objects.create(
+                project=project, title=f'Task {i}', priority=priority, created_by=user,
+                deadline=deadline + timedelta(days=days) if days is not None else None,
+            )
+        self.manager = ModelManager('core_tasks', 'Task')
+
+    async def offset_pages(self):
+        first = await self.manager.paginate(0, self.per_page, order_by=TASK_LIST_ORDERING)
+        pages = [first]
+        for page in range(1, first['total_pages']):
+            pages.append(await self.manager.paginate(page, self.per_page, order_by=TASK_LIST_ORDERING))
+        return [[task.id for task in p['items']] for p in pages]
+
+    async def open(self, callback_data):
+        page, cursor = parse_page_callback(callback_data)
+        return await self.manager.paginate(page, self.per_page, order_by=TASK_LIST_ORDERING, cursor=cursor)
+
+    async def test_walks_match_offset_order(self):
+        expected = await self.offset_pages()
+        self.assertEqual(len(expected), 5)
+
+        # Forwards, following the Next buttons' callback data
+        paginated = await self.open('list_tasks_all:0')
+        forward = [[task.id for task in paginated['items']]]
+        while paginated['has_next']:
+            self.assertIsNotNone(paginated['next_cursor'])
+            data = KeyboardBuilder.page_callback(
+                'list_tasks_all', paginated['current_page'] + 1, f">{paginated['next_cursor']}"
+            )
+            self.assertIn(':>', data)
+            paginated = await self.open(data)
+            forward.append([task.id for task in paginated['items']])
+        self.assertEqual(forward, expected)
+        self.assertIsNone(paginated['next_cursor'])
+
+        # Backwards from the last page, following the Previous buttons
+        backward = [[task.id for task in paginated['items']]]
+        while paginated['has_prev']:
+            data = KeyboardBuilder.page_callback(
+                'list_tasks_all', paginated['current_page'] - 1, f"<{paginated['prev_cursor']}"
+            )
+            paginated = await self.open(data)
+            backward.append([task.id for task in paginated['items']])
+        self.assertEqual(backward[::-1], expected)
+        self.assertEqual(paginated['current_page'], 0)
+        self.assertIsNone(paginated['prev_cursor'])
+
+    async def test_deleted_cursor_row_keeps_position(self):
+        from core_tasks.models import Task
+
+        expected = await self.offset_pages()
+        first = await self.open('list_tasks_all:0')
+        await Task.objects.filter(id=first['items'][-1].id).adelete()
+
+        second = await self.open(f"list_tasks_all:1:>{first['next_cursor']}")
+        self.assertEqual([task.id for task in second['items']], expected[1])
+
+    async def test_cursor_round_trip(self):
+        from core_tasks.models import Task
+
+        keyset = KeysetOrdering.build(Task, list(TASK_LIST_ORDERING))
+        async for task in Task.objects.all():
+            cursor = keyset.encode(task)
+            self.assertEqual(keyset.decode(cursor), [task.priority_rank, task.deadline, task.id])
+            self.assertLessEqual(len(cursor), 30)
+        self.assertIsNone(keyset.decode('1.2'))
+        self.assertIsNone(keyset.decode('1.!.3'))
+
+        # A malformed cursor falls back to the page number
+        paginated = await self.open('list_tasks_all:2:>not-a-cursor')
+        self.assertEqual([task.id for task in paginated['items']], (await self.offset_pages())[2])
+
+
+class PageCallbackTests(SimpleTestCase):
+
+    def test_cursor_included_when_it_fits(self):
+        data = KeyboardBuilder.page_callback('list_tasks_all', 3, '>2.lwdq1c5ba8.k')
+        self.assertEqual(data, 'list_tasks_all:3:>2.lwdq1c5ba8.k')
+        self.assertEqual(parse_page_callback(data), (3, '>2.lwdq1c5ba8.k'))
+
+    def test_falls_back_to_page_over_64_bytes(self):
+        cursor = '<' + '.'.join(['zzzzzzzzzzzz'] * 4)
+        data = KeyboardBuilder.page_callback('list_tasks_project_42', 7, cursor)
+        self.assertEqual(data, 'list_tasks_project_42:7')
+        self.assertEqual(parse_page_callback(data), (7, None))
+
+    def test_limit_is_counted_in_bytes(self):
+        prefix = 'é' * 29  # 58 bytes in UTF-8
+        self.assertEqual(KeyboardBuilder.page_callback(prefix, 1, '>1.2'), f'{prefix}:1')
+        self.assertEqual(KeyboardBuilder.page_callback(prefix[:28], 1, '>1.2'), f'{prefix[:28]}:1:>1.2')
+
+
+class ResolveUserTests(TransactionTestCase):
+    """Only updates addressed to the bot resolve their user, and unchanged users aren't rewritten."""
+
+    def setUp(self):
+        user_cache.clear()
+
+    def update(self, text, chat_type=Chat.GROUP, first_name='Ada', user_id=501):
+        chat = Chat(id=-100 if chat_type == Chat.GROUP else user_id, type=chat_type)
+        sender = User(id=user_id, first_name=first_name, is_bot=False, username='ada')
+        message = Message(1, timezone.now(), chat, from_user=sender, text=text)
+        return Update(1, message=message)
+
+    async def resolve(self, update):
+        with mock.patch('core_bot.utils.run_write', wraps=run_write) as write:
+            await resolve_user(update, SimpleNamespace())
+        return write.call_count
+
+    async def test_group_chatter_is_not_resolved(self):
+        self.assertEqual(await self.resolve(self.update('hello all')), 0)
+        self.assertFalse(await TelegramUser.objects.filter(telegram_id=501).aexists())
+
+    async def test_group_command_and_private_message_are_resolved(self):
+        self.assertEqual(await self.resolve(self.update('/tasks@TaskyBot')), 1)
+        self.assertTrue(await TelegramUser.objects.filter(telegram_id=501).aexists())
+
+        user_cache.clear()
+        self.assertEqual(await self.resolve(self.update('hi', Chat.PRIVATE, user_id=502)), 1)
+        self.assertTrue(await TelegramUser.objects.filter(telegram_id=502).aexists())
+
+    async def test_unchanged_profile_is_not_written(self):
+        await self.resolve(self.update('/start', Chat.PRIVATE))
+        user_cache.clear()
+
+        self.assertEqual(await self.resolve(self.update('/start', Chat.PRIVATE)), 0)
+
+        user_cache.clear()
+        self.assertEqual(await self.resolve(self.update('/start', Chat.PRIVATE, first_name='Augusta')), 1)
+        user = await TelegramUser.objects.aget(telegram_id=501)
+        self.assertEqual(user.telegram_first_name, 'Augusta')
+
+
+class PermissionCacheTests(TransactionTestCase):
+    """Permissions are compiled on the first check, not on every user lookup."""
+
+    def setUp(self):
+        user_cache.clear()
+        self.update = Update(1, message=Message(
+            1, timezone.now(), Chat(id=601, type=Chat.PRIVATE),
+            from_user=User(id=601, first_name='Grace', is_bot=False), text='/start',
+        ))
+
+    def grant(self, codename):
+        from django.contrib.auth.models import Permission
+
+        user = TelegramUser.objects.get(telegram_id=601)
+        user.user_permissions.add(Permission.objects.get(codename=codename))
+
+    async def test_compiled_on_first_check_and_cached(self):
+        with mock.patch.object(
+            TelegramUser, 'load_permissions', autospec=True, side_effect=TelegramUser.load_permissions
+        ) as load:
+            await resolve_user(self.update, SimpleNamespace())
+            self.assertEqual(load.call_count, 0)
+
+            user = await get_or_create_user(self.update, None)
+            self.assertFalse(await has_permission(user, 'manage_projects'))
+            self.assertEqual(load.call_count, 1)
+
+            # Later lookups get the compiled set from the cache
+            user = await get_or_create_user(self.update, None)
+            self.assertFalse(await has_permission(user, 'manage_projects'))
+            self.assertEqual(load.call_count, 1)
+
+            # A new permission drops the cached user; the next check compiles again
+            await run_sync(self.grant, 'manage_projects')
+            user = await get_or_create_user(self.update, None)
+            self.assertTrue(await has_permission(user, 'manage_projects'))
+            self.assertEqual(load.call_count, 2)
@@ -1,12 +1,124 @@
 """
 Reusable bot utilities for Telegram integration.
 """
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from typing import List, Optional, Any
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.constants import ChatType
 from telegram.ext import ContextTypes
 from asgiref.sync import sync_to_async
 from django.apps import apps
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, FieldDoesNotExist
+from django.db import close_old_connections
+from django.db.models import F, Q
+
+
+_db_executor = None
+_db_executor_workers = 0
+_db_writer = None
+
+
+def get_db_executor() -> Optional[ThreadPoolExecutor]:
+    """
+    Get the thread pool used for database work from async code.
+
+    Returns None when BOT_DB_EXECUTOR_WORKERS is 0, in which case
+    Django's async ORM is used as-is.
+    """
+    global _db_executor, _db_executor_workers
+    workers = settings.BOT_DB_EXECUTOR_WORKERS
+    if workers <= 0:
+        return None
+
+    if _db_executor is None or _db_executor_workers != workers:
+        if _db_executor is not None:
+            _db_executor.shutdown(wait=False)
+        _db_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bot-db')
+        _db_executor_workers = workers
+    return _db_executor
+
+
+def _call_in_worker(func, *args, **kwargs):
+    """
+    Call func on a database thread, treating the call like a request.
+
+    The thread's connection is health-checked before use and released
+    afterwards according to CONN_MAX_AGE, which returns it to the pool
+    when Django's connection pool is enabled.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """
+    Run blocking (ORM) code from async code.
+
+    Unlike sync_to_async's default, calls are not serialized onto one
+    shared thread: they run on the bot's database pool, so handlers for
+    different updates query the database at the same time.
+    """
+    executor = get_db_executor()
+    if executor is None:
+        return await sync_to_async(func)(*args, **kwargs)
+    return await sync_to_async(_call_in_worker, thread_sensitive=False, executor=executor)(
+        func, *args, **kwargs
+    )
+
+
+def get_db_writer() -> Optional[ThreadPoolExecutor]:
+    """
+    Get the single thread bot writes are queued on.
+
+    Returns None unless settings.DB_SINGLE_WRITER is set.
+    """
+    global _db_writer
+    if not settings.DB_SINGLE_WRITER:
+        return None
+
+    if _db_writer is None:
+        _db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bot-db-writer')
+    return _db_writer
+
+
+async def run_write(func, *args, **kwargs):
+    """
+    Run blocking code that writes to the database from async code.
+
+    With DB_SINGLE_WRITER, writes wait their turn on one thread, so a burst
+    of updates doesn't pile up on SQLite's write lock ("database is
+    locked"). Otherwise this is run_sync().
+    """
+    writer = get_db_writer()
+    if writer is None:
+        return await run_sync(func, *args, **kwargs)
+    return await sync_to_async(_call_in_worker, thread_sensitive=False, executor=writer)(
+        func, *args, **kwargs
+    )
+
+
+async def run_query(queryset, method: str, *args, **kwargs):
+    """
+    Evaluate a queryset method such as 'get' or 'count'.
+
+    Uses the async ORM variant ('aget', 'acount', ...) when the database
+    pool is disabled, otherwise runs the sync method on the pool.
+    """
+    if get_db_executor() is None:
+        return await getattr(queryset, f'a{method}')(*args, **kwargs)
+    return await run_sync(getattr(queryset, method), *args, **kwargs)
+
+
+async def fetch_list(queryset) -> list:
+    """Evaluate a queryset into a list."""
+    if get_db_executor() is None:
+        return [obj async for obj in queryset]
+    return await run_sync(list, queryset)
 
 
 class ModelManager:
@@ -15,57 +127,280 @@ class ModelManager:
     def __init__(self, app_label: str, model_name: str):
         self.model = apps.get_model(app_label, model_name)
     
-    @sync_to_async
-    def create(self, **kwargs):
+    async def create(self, **kwargs):
         """Create a new instance."""
-        return self.model.objects.create(**kwargs)
+        return await run_write(self.model.objects.create, **kwargs)
     
-    @sync_to_async
-    def get(self, **kwargs):
+    async def get(self, **kwargs):
         """Get a single instance."""
         try:
-            return self.model.objects.get(**kwargs)
+            return await run_query(self.model.objects, 'get', **kwargs)
         except ObjectDoesNotExist:
             return None
     
-    @sync_to_async
-    def filter(self, **kwargs):
+    async def filter(self, **kwargs):
         """Filter instances."""
-        return list(self.model.objects.filter(**kwargs))
+        return await fetch_list(self.model.objects.filter(**kwargs))
     
-    @sync_to_async
-    def all(self):
+    async def all(self):
         """Get all instances."""
-        return list(self.model.objects.all())
+        return await fetch_list(self.model.objects.all())
     
-    @sync_to_async
-    def update(self, pk, **kwargs):
+    async def update(self, pk, **kwargs):
         """Update an instance."""
-        try:
-            instance = self.model.objects.get(pk=pk)
-            for key, value in kwargs.items():
-                setattr(instance, key, value)
-            instance.save()
-            return instance
-        except ObjectDoesNotExist:
+        instance = await self.get(pk=pk)
+        if instance is None:
             return None
+
+        for key, value in kwargs.items():
+            setattr(instance, key, value)
+        await run_write(instance.save)
+        return instance
     
-    @sync_to_async
-    def delete(self, pk):
+    async def delete(self, pk):
         """Delete an instance."""
-        try:
-            instance = self.model.objects.get(pk=pk)
-            instance.delete()
-            return True
-        except ObjectDoesNotExist:
+        instance = await self.get(pk=pk)
+        if instance is None:
             return False
+
+        await run_write(instance.delete)
+        return True
     
-    @sync_to_async
-    def count(self, **kwargs):
+    async def count(self, **kwargs):
         """Count instances."""
         if kwargs:
-            return self.model.objects.filter(**kwargs).count()
-        return self.model.objects.count()
+            return await run_query(self.model.objects.filter(**kwargs), 'count')
+        return await run_query(self.model.objects, 'count')
+    
+    async def paginate(
+        self, page: int = 0, per_page: int = 10, order_by=None,
+        cursor: Optional[str] = None, queryset=None, **kwargs
+    ):
+        """
+        Get one page of filtered instances.
+
+        Ordering, LIMIT/OFFSET and the total count are done by the
+        database. Returns the same dict as paginate_items(), plus
+        'next_cursor' and 'prev_cursor' when the ordering is made of
+        field names.
+
+        Args:
+            page: Zero-based page number (clamped to the last page)
+            per_page: Items per page
+            order_by: Ordering (defaults to the model's ordering)
+            cursor: Cursor from a previous page ('>...' or '<...'). When
+                given, the page is read with a range query on the sort key
+                instead of OFFSET; page is then only used for display.
+            queryset: Base queryset (e.g. with annotations to order by)
+            **kwargs: Filters
+        """
+        pk_name = self.model._meta.pk.name
+        ordering = list(order_by or self.model._meta.ordering)
+        if not {'pk', '-pk', pk_name, f'-{pk_name}'} & {o for o in ordering if isinstance(o, str)}:
+            # A unique tie-breaker keeps pages stable between queries
+            ordering.append(pk_name)
+        keyset = KeysetOrdering.build(self.model, ordering)
+
+        queryset = (queryset if queryset is not None else self.model.objects.all()).filter(**kwargs)
+        total_items = await run_query(queryset, 'count')
+        total_pages = (total_items + per_page - 1) // per_page
+        page = max(0, min(page, total_pages - 1))
+
+        if keyset is None:
+            cursor = None
+            queryset = queryset.order_by(*ordering)
+        else:
+            queryset = queryset.order_by(*keyset.order_by())
+
+        has_next = page < total_pages - 1
+        has_prev = page > 0
+        values = keyset.decode(cursor[1:]) if keyset and cursor else None
+        items = []
+        if values is not None and cursor[0] == '<':
+            # Walk backwards from the first item of the page we came from
+            items = await fetch_list(
+                queryset.filter(keyset.before(values)).order_by(*keyset.order_by(reverse=True))[:per_page + 1]
+            )
+            has_prev = len(items) > per_page
+            items = items[:per_page][::-1]
+            has_next = True
+        elif values is not None:
+            items = await fetch_list(queryset.filter(keyset.after(values))[:per_page + 1])
+            has_next = len(items) > per_page
+            items = items[:per_page]
+            has_prev = True
+
+        if not items and total_items:
+            # No cursor, or the rows around it were deleted
+            start_idx = page * per_page
+            items = await fetch_list(queryset[start_idx:start_idx + per_page])
+            has_next = page < total_pages - 1
+            has_prev = page > 0
+
+        return {
+            'items': items,
+            'current_page': page,
+            'total_pages': total_pages,
+            'total_items': total_items,
+            'has_next': has_next,
+            'has_prev': has_prev,
+            'next_cursor': keyset.encode(items[-1]) if keyset and items and has_next else None,
+            'prev_cursor': keyset.encode(items[0]) if keyset and items and has_prev else None,
+        }
+
+
+class KeysetOrdering:
+    """
+    Sort key for cursor pagination.
+
+    Built from field names (e.g. ['priority_rank', 'deadline', 'id']),
+    the last of which must be unique.
+    NULLs always sort last. A cursor is the sort key of an item encoded
+    in base 36 (datetimes as microseconds), joined with dots, which keeps
+    it well inside Telegram's 64-byte callback_data limit.
+    """
+
+    # Field types a cursor can hold
+    SUPPORTED_TYPES = {
+        'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField',
+        'SmallIntegerField', 'PositiveIntegerField', 'PositiveBigIntegerField',
+        'PositiveSmallIntegerField', 'ForeignKey', 'DateTimeField', 'DateField',
+    }
+
+    def __init__(self, keys: list):
+        self.keys = keys  # (name, descending, nullable, internal type)
+
+    @classmethod
+    def build(cls, model, ordering: list) -> Optional['KeysetOrdering']:
+        """
+        Get the keyset for an ordering, or None if it can't be used as one
+        (expressions, or fields of unsupported types such as text).
+
+        Names that aren't model fields are taken to be integer annotations.
+        """
+        keys = []
+        for name in ordering:
+            if not isinstance(name, str):
+                return None
+            field_name = name.lstrip('-')
+            if field_name == 'pk':
+                field_name = model._meta.pk.name
+            try:
+                field = model._meta.get_field(field_name)
+            except FieldDoesNotExist:
+                keys.append((field_name, name.startswith('-'), False, 'IntegerField'))
+                continue
+            kind = field.get_internal_type()
+            if kind not in cls.SUPPORTED_TYPES:
+                return None
+            if kind == 'ForeignKey':
+                field_name, kind = field.attname, 'BigIntegerField'
+            keys.append((field_name, name.startswith('-'), field.null, kind))
+        return cls(keys)
+
+    def order_by(self, reverse: bool = False) -> list:
+        """Ordering expressions, optionally reversed (for walking backwards)."""
+        ordering = []
+        for name, descending, null, kind in self.keys:
+            nulls = ({'nulls_first': True} if reverse else {'nulls_last': True}) if null else {}
+            if descending != reverse:
+                ordering.append(F(name).desc(**nulls))
+            else:
+                ordering.append(F(name).asc(**nulls))
+        return ordering
+
+    def _compare(self, values: list, forward: bool) -> Q:
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, null, kind), value in zip(self.keys, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            if value is None:
+                # NULLs come last: nothing follows them, everything else precedes them
+                if not forward:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+            else:
+                step = Q(**{f'{name}__{lookup}': value})
+                if forward and null:
+                    step |= Q(**{f'{name}__isnull': True})
+                condition |= equal & step
+                equal &= Q(**{name: value})
+        return condition
+
+    def after(self, values: list) -> Q:
+        """Filter for items after the given sort key."""
+        return self._compare(values, forward=True)
+
+    def before(self, values: list) -> Q:
+        """Filter for items before the given sort key."""
+        return self._compare(values, forward=False)
+
+    def encode(self, instance) -> str:
+        """Encode an item's sort key as a cursor."""
+        parts = []
+        for name, descending, null, kind in self.keys:
+            value = getattr(instance, name)
+            if value is None:
+                parts.append('')
+            elif kind == 'DateTimeField':
+                epoch = _EPOCH if value.tzinfo else _EPOCH.replace(tzinfo=None)
+                parts.append(_to_base36((value - epoch) // timedelta(microseconds=1)))
+            elif kind == 'DateField':
+                parts.append(_to_base36(value.toordinal()))
+            else:
+                parts.append(_to_base36(int(value)))
+        return '.'.join(parts)
+
+    def decode(self, cursor: str) -> Optional[list]:
+        """Decode a cursor. Returns None if it is malformed."""
+        parts = cursor.split('.')
+        if len(parts) != len(self.keys):
+            return None
+
+        values = []
+        try:
+            for (name, descending, null, kind), part in zip(self.keys, parts):
+                if part == '':
+                    values.append(None)
+                elif kind == 'DateTimeField':
+                    epoch = _EPOCH if settings.USE_TZ else _EPOCH.replace(tzinfo=None)
+                    values.append(epoch + timedelta(microseconds=int(part, 36)))
+                elif kind == 'DateField':
+                    values.append(date.fromordinal(int(part, 36)))
+                else:
+                    values.append(int(part, 36))
+        except ValueError:
+            return None
+        return values
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _to_base36(number: int) -> str:
+    """Format an integer in base 36."""
+    if number < 0:
+        return '-' + _to_base36(-number)
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    result = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+        if not number:
+            return result
+
+
+def parse_page_callback(data: str):
+    """
+    Read the page and cursor from pagination callback data.
+
+    Accepts '<prefix>:<page>' and '<prefix>:<page>:<cursor>' (as built
+    by KeyboardBuilder.pagination_buttons). Returns (page, cursor).
+    """
+    parts = data.split(':', 2)
+    page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    cursor = parts[2] if len(parts) > 2 and parts[2][:1] in ('<', '>') else None
+    return page, cursor
 
 
 class KeyboardBuilder:
@@ -103,28 +438,57 @@ class KeyboardBuilder:
 
         return InlineKeyboardMarkup(menu)
     
+    # Telegram rejects callback_data longer than this (in bytes)
+    MAX_CALLBACK_DATA = 64
+
+    @staticmethod
+    def page_callback(callback_prefix: str, page: int, cursor: Optional[str] = None) -> str:
+        """
+        Build callback data for a page.
+
+        Includes the cursor when it fits in Telegram's callback_data
+        limit, otherwise falls back to the page number alone.
+        """
+        data = f"{callback_prefix}:{page}"
+        if cursor is not None:
+            with_cursor = f"{data}:{cursor}"
+            if len(with_cursor.encode()) <= KeyboardBuilder.MAX_CALLBACK_DATA:
+                return with_cursor
+        return data
+
     @staticmethod
     def pagination_buttons(
         current_page: int,
         total_pages: int,
-        callback_prefix: str
+        callback_prefix: str,
+        next_cursor: Optional[str] = None,
+        prev_cursor: Optional[str] = None
     ) -> List[InlineKeyboardButton]:
-        """Create pagination buttons."""
+        """
+        Create pagination buttons.
+
+        Pass the cursors from ModelManager.paginate() to let the next
+        page be read with a range query instead of OFFSET.
+        """
         buttons = []
         
         if current_page > 0:
-            buttons.append(
-                InlineKeyboardButton("⬅️ Previous", callback_data=f"{callback_prefix}:{current_page - 1}")
-            )
+            cursor = f"<{prev_cursor}" if prev_cursor is not None else None
+            buttons.append(InlineKeyboardButton(
+                "⬅️ Previous",
+                callback_data=KeyboardBuilder.page_callback(callback_prefix, current_page - 1, cursor)
+            ))
         
         buttons.append(
             InlineKeyboardButton(f"📄 {current_page + 1}/{total_pages}", callback_data="noop")
         )
         
         if current_page < total_pages - 1:
-            buttons.append(
-                InlineKeyboardButton("Next ➡️", callback_data=f"{callback_prefix}:{current_page + 1}")
-            )
+            cursor = f">{next_cursor}" if next_cursor is not None else None
+            buttons.append(InlineKeyboardButton(
+                "Next ➡️",
+                callback_data=KeyboardBuilder.page_callback(callback_prefix, current_page + 1, cursor)
+            ))
         
         return buttons
     
@@ -226,6 +590,39 @@ class MessageFormatter:
         
         return msg
     
+    @staticmethod
+    def format_task_stats(stats: dict) -> str:
+        """Format task statistics from core_tasks.stats.get_task_stats()."""
+        by_status = stats['by_status']
+        msg = f"Total Tasks: {stats['total']} ({stats['completion']}% done)\n"
+        msg += f"{MessageFormatter.EMOJI['done']} Done: {by_status.get('DONE', 0)}\n"
+        msg += f"{MessageFormatter.EMOJI['in_progress']} In Progress: {by_status.get('IN_PROGRESS', 0)}\n"
+        msg += f"{MessageFormatter.EMOJI['todo']} To Do: {by_status.get('TODO', 0)}\n"
+        if by_status.get('REVIEW'):
+            msg += f"{MessageFormatter.EMOJI['review']} In Review: {by_status['REVIEW']}\n"
+        if by_status.get('BLOCKED'):
+            msg += f"{MessageFormatter.EMOJI['blocked']} Blocked: {by_status['BLOCKED']}\n"
+        if stats['overdue']:
+            msg += f"{MessageFormatter.EMOJI['warning']} Overdue: {stats['overdue']}\n"
+
+        # Open urgent/high priority work
+        open_by_priority = {
+            priority: sum(
+                counts.get(priority, 0) for status, counts in stats['matrix'].items()
+                if status not in ('DONE', 'CANCELLED')
+            )
+            for priority in ('URGENT', 'HIGH')
+        }
+        if open_by_priority['URGENT'] or open_by_priority['HIGH']:
+            msg += (
+                f"{MessageFormatter.EMOJI['urgent']} Open urgent: {open_by_priority['URGENT']} | "
+                f"{MessageFormatter.EMOJI['high_priority']} high: {open_by_priority['HIGH']}\n"
+            )
+
+        if stats['estimated_hours'] or stats['actual_hours']:
+            msg += f"⏱ Hours: {stats['actual_hours']:g} spent / {stats['estimated_hours']:g} estimated\n"
+        return msg
+    
     @staticmethod
     def format_project(project: Any, include_progress: bool = False) -> str:
         """
@@ -260,31 +657,96 @@ class MessageFormatter:
 
 
 async def get_or_create_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Get or create user from Telegram update."""
-    from core_auth.models import TelegramUser
+    """
+    Get or create user from Telegram update.
+
+    The user is looked up once per update (see resolve_user) and kept on
+    context.db_user, so repeated calls while handling the same update
+    don't query the database.
+    """
+    from core_bot.identity import user_cache
     
     telegram_user = update.effective_user
     if not telegram_user:
         return None
     
-    user_manager = ModelManager('core_auth', 'TelegramUser')
-    user = await user_manager.get(telegram_id=telegram_user.id)
+    user = getattr(context, 'db_user', None) if context is not None else None
+    if user is not None and user.telegram_id == telegram_user.id:
+        return user
     
-    if not user:
-        # Create new user
-        username = telegram_user.username or f"user_{telegram_user.id}"
-        user = await user_manager.create(
-            telegram_id=telegram_user.id,
-            username=username,
-            telegram_username=telegram_user.username or '',
-            telegram_first_name=telegram_user.first_name or '',
-            telegram_last_name=telegram_user.last_name or '',
-            language_code=telegram_user.language_code or 'en',
-        )
+    user = user_cache.get(telegram_user.id)
+    if user is None:
+        user = await _load_or_create_user(telegram_user)
+        user_cache.set(telegram_user.id, user)
     
+    if context is not None:
+        context.db_user = user
     return user
 
 
+async def has_permission(user, permission_codename: str) -> bool:
+    """
+    Check a project permission from a handler.
+
+    The user's permission set is compiled on the first check and kept
+    with the cached user, so later checks for the same user don't query
+    until the cache entry is dropped.
+    """
+    from core_bot.identity import user_cache
+
+    if getattr(user, '_permission_set', None) is None:
+        await run_sync(user.load_permissions)
+        user_cache.set(user.telegram_id, user)
+    return user.has_project_permission(permission_codename)
+
+
+async def resolve_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Resolve the user of an update before other handlers run.
+
+    Registered as a TypeHandler in group -1. Only private chats, commands
+    and button presses are resolved up front; other group traffic is
+    left to handlers that need the user, so members who merely chat in a
+    group the bot is in don't each cost a lookup.
+    """
+    if isinstance(update, Update) and _addresses_bot(update):
+        await get_or_create_user(update, context)
+
+
+def _addresses_bot(update: Update) -> bool:
+    """Whether an update is a private message, a command or a button press."""
+    if update.callback_query is not None:
+        return True
+    chat, message = update.effective_chat, update.effective_message
+    if chat is not None and chat.type == ChatType.PRIVATE:
+        return True
+    return bool(message and message.text and message.text.startswith('/'))
+
+
+async def _load_or_create_user(telegram_user):
+    """Fetch the TelegramUser for a Telegram account, creating it if needed."""
+    from core_auth.models import TelegramUser
+    
+    profile = {
+        'telegram_username': telegram_user.username or '',
+        'telegram_first_name': telegram_user.first_name or '',
+        'telegram_last_name': telegram_user.last_name or '',
+    }
+    user = await run_query(TelegramUser.objects.filter(telegram_id=telegram_user.id), 'first')
+    if user is not None and all(getattr(user, field) == value for field, value in profile.items()):
+        # Known account with an unchanged profile: nothing to write
+        return user
+
+    # Single INSERT ... ON CONFLICT statement, safe for concurrent first messages
+    return await run_write(
+        TelegramUser.objects.upsert_from_telegram,
+        telegram_id=telegram_user.id,
+        username=telegram_user.username or f"user_{telegram_user.id}",
+        language_code=telegram_user.language_code or 'en',
+        **profile,
+    )
+
+
 def paginate_items(items: List[Any], page: int = 0, per_page: int = 10):
     """Paginate a list of items."""
     total_items = len(items)
@@ -62,7 +62,7 @@ def register_handlers(application):
     application.add_handler(CallbackQueryHandler(view_meeting_votes, pattern="^meeting_votes:"))
     
     # Pagination handlers
-    application.add_handler(CallbackQueryHandler(list_meetings, pattern=r"^list_meetings:\d+$"))
+    application.add_handler(CallbackQueryHandler(list_meetings, pattern=r"^list_meetings:\d+(:[<>][0-9a-z.\-]*)?$"))
 
 # Help text for this app
 def get_help_text():
@@ -5,7 +5,7 @@ from telegram import Update, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 from core_bot.utils import (
     get_or_create_user, ModelManager, KeyboardBuilder,
-    MessageFormatter, paginate_items
+    MessageFormatter, parse_page_callback
 )
 from datetime import datetime, timedelta
 
@@ -18,17 +18,17 @@ async def list_meetings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List upcoming meetings."""
     user = await get_or_create_user(update, context)
 
-    page = 0
+    page, cursor = 0, None
     if update.callback_query and ':' in update.callback_query.data:
-        page = int(update.callback_query.data.split(':')[1])
+        page, cursor = parse_page_callback(update.callback_query.data)
 
     meeting_manager = ModelManager('core_tasks', 'Meeting')
-    all_meetings = await meeting_manager.filter(scheduled_at__gte=datetime.now())
-
-    # Sort by scheduled time
-    all_meetings.sort(key=lambda m: m.scheduled_at)
+    paginated = await meeting_manager.paginate(
+        page=page, per_page=5, order_by=('scheduled_at',), cursor=cursor,
+        scheduled_at__gte=datetime.now()
+    )
 
-    if not all_meetings:
+    if not paginated['total_items']:
         msg = f"{MessageFormatter.EMOJI['meeting']} <b>Upcoming Meetings</b>\n\n"
         msg += "No upcoming meetings scheduled.\n\n"
         msg += "Use /schedulemeeting to create one!"
@@ -45,8 +45,6 @@ async def list_meetings(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.callback_query.edit_message_text(msg, parse_mode='HTML', reply_markup=keyboard)
         return
 
-    paginated = paginate_items(all_meetings, page=page, per_page=5)
-
     msg = f"{MessageFormatter.EMOJI['meeting']} <b>Upcoming Meetings</b>\n"
     msg += f"Showing {len(paginated['items'])} of {paginated['total_items']} meetings\n\n"
 
@@ -62,7 +60,9 @@ async def list_meetings(update: Update, context: ContextTypes.DEFAULT_TYPE):
             KeyboardBuilder.pagination_buttons(
                 paginated['current_page'],
                 paginated['total_pages'],
-                "list_meetings"
+                "list_meetings",
+                next_cursor=paginated['next_cursor'],
+                prev_cursor=paginated['prev_cursor']
             )
         )
 
@@ -5,7 +5,7 @@ from telegram import Update, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from core_bot.utils import (
     get_or_create_user, ModelManager, KeyboardBuilder,
-    MessageFormatter, paginate_items
+    MessageFormatter, parse_page_callback, run_write
 )
 
 
@@ -13,17 +13,16 @@ async def list_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE)
     """List user notifications."""
     user = await get_or_create_user(update, context)
     
-    page = 0
+    page, cursor = 0, None
     if update.callback_query and ':' in update.callback_query.data:
-        page = int(update.callback_query.data.split(':')[1])
+        page, cursor = parse_page_callback(update.callback_query.data)
     
     alert_manager = ModelManager('core_tasks', 'Alert')
-    all_alerts = await alert_manager.filter(user_id=user.id)
+    paginated = await alert_manager.paginate(
+        page=page, per_page=5, order_by=('-created_at',), cursor=cursor, user_id=user.id
+    )
     
-    # Sort by created_at descending
-    all_alerts.sort(key=lambda a: a.created_at, reverse=True)
-    
-    if not all_alerts:
+    if not paginated['total_items']:
         msg = f"{MessageFormatter.EMOJI['alert']} <b>Notifications</b>\n\n"
         msg += "No notifications.\n\n"
         msg += "You're all caught up! ✅"
@@ -37,9 +36,7 @@ async def list_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.callback_query.edit_message_text(msg, parse_mode='HTML', reply_markup=keyboard)
         return
     
-    paginated = paginate_items(all_alerts, page=page, per_page=5)
-    
-    unread_count = len([a for a in all_alerts if not a.is_read])
+    unread_count = await alert_manager.count(user_id=user.id, is_read=False)
     
     msg = f"{MessageFormatter.EMOJI['alert']} <b>Notifications</b>\n"
     msg += f"Unread: {unread_count} | Total: {paginated['total_items']}\n\n"
@@ -50,7 +47,7 @@ async def list_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE)
         alert_type_emoji = {
             'TASK_ASSIGNED': '📝',
             'DEADLINE': '⏰',
-            'OVERDUE': '⚠️',
+            'TASK_OVERDUE': '⚠️',
             'MEETING': '📅',
             'APPROVAL': '✅',
             'GENERAL': '📢'
@@ -70,7 +67,9 @@ async def list_notifications(update: Update, context: ContextTypes.DEFAULT_TYPE)
             KeyboardBuilder.pagination_buttons(
                 paginated['current_page'],
                 paginated['total_pages'],
-                "notifications"
+                "notifications",
+                next_cursor=paginated['next_cursor'],
+                prev_cursor=paginated['prev_cursor']
             )
         )
     
@@ -105,7 +104,7 @@ async def notification_detail(update: Update, context: ContextTypes.DEFAULT_TYPE
     alert_type_emoji = {
         'TASK_ASSIGNED': '📝',
         'DEADLINE': '⏰',
-        'OVERDUE': '⚠️',
+        'TASK_OVERDUE': '⚠️',
         'MEETING': '📅',
         'APPROVAL': '✅',
         'GENERAL': '📢'
@@ -161,11 +160,9 @@ async def list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = await get_or_create_user(update, context)
     
     reminder_manager = ModelManager('core_tasks', 'Reminder')
+    # Ordered by remind_at (Reminder.Meta.ordering)
     all_reminders = await reminder_manager.filter(user_id=user.id, is_sent=False)
     
-    # Sort by reminder_time
-    all_reminders.sort(key=lambda r: r.reminder_time)
-    
     if not all_reminders:
         msg = f"{MessageFormatter.EMOJI['deadline']} <b>Upcoming Reminders</b>\n\n"
         msg += "No upcoming reminders."
@@ -180,9 +177,9 @@ async def list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg += f"Total: {len(all_reminders)}\n\n"
     
     for reminder in all_reminders[:10]:  # Show first 10
-        time_str = reminder.reminder_time.strftime('%m/%d %H:%M')
+        time_str = reminder.remind_at.strftime('%m/%d %H:%M')
         reminder_type_emoji = {
-            'DEADLINE': '⏰',
+            'TASK_DEADLINE': '⏰',
             'MEETING': '📅',
             'DAILY_REPORT': '📊',
             'CUSTOM': '🔔'
@@ -239,8 +236,6 @@ async def toggle_notification(update: Update, context: ContextTypes.DEFAULT_TYPE
     user = await get_or_create_user(update, context)
     setting_key = query.data.split(':')[1]
     
-    user_manager = ModelManager('core_auth', 'TelegramUser')
-    
     field_map = {
         'task_assigned': 'notify_task_assigned',
         'deadline': 'notify_deadline_approaching',
@@ -250,8 +245,10 @@ async def toggle_notification(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     field_name = field_map.get(setting_key)
     if field_name:
-        current_value = getattr(user, field_name)
-        await user_manager.update(user.id, **{field_name: not current_value})
+        # Update the user resolved for this update so the refreshed view
+        # shows the new value without loading the user again
+        setattr(user, field_name, not getattr(user, field_name))
+        await run_write(user.save, update_fields=[field_name, 'updated_at'])
     
     # Refresh settings view
     await notification_settings(update, context)
@@ -56,7 +56,7 @@ def register_handlers(application):
     application.add_handler(CallbackQueryHandler(project_detail, pattern=r"^project:\d+$"))
     
     # Pagination handlers
-    application.add_handler(CallbackQueryHandler(list_projects, pattern=r"^list_projects:\d+$"))
+    application.add_handler(CallbackQueryHandler(list_projects, pattern=r"^list_projects:\d+(:[<>][0-9a-z.\-]*)?$"))
 
 # Help text for this app
 def get_help_text():
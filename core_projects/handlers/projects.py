@@ -5,7 +5,7 @@ from telegram import Update, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 from core_bot.utils import (
     get_or_create_user, ModelManager, KeyboardBuilder,
-    MessageFormatter, paginate_items
+    MessageFormatter, parse_page_callback, run_sync
 )
 
 
@@ -13,15 +13,17 @@ async def list_projects(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List all projects with pagination."""
     user = await get_or_create_user(update, context)
     
-    # Get page number from callback data or default to 0
-    page = 0
+    # Get page number and cursor from callback data or default to the first page
+    page, cursor = 0, None
     if update.callback_query and ':' in update.callback_query.data:
-        page = int(update.callback_query.data.split(':')[1])
+        page, cursor = parse_page_callback(update.callback_query.data)
     
     project_manager = ModelManager('core_tasks', 'Project')
-    all_projects = await project_manager.all()
+    paginated = await project_manager.paginate(
+        page=page, per_page=5, order_by=('-created_at',), cursor=cursor
+    )
     
-    if not all_projects:
+    if not paginated['total_items']:
         msg = f"{MessageFormatter.EMOJI['info']} No projects found.\n\nCreate your first project with /createproject"
         buttons = [[InlineKeyboardButton("➕ Create Project", callback_data="create_project")]]
         keyboard = KeyboardBuilder.build_menu([], n_cols=1, footer_buttons=buttons)
@@ -32,17 +34,13 @@ async def list_projects(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.callback_query.edit_message_text(msg, parse_mode='HTML', reply_markup=keyboard)
         return
     
-    # Paginate projects
-    paginated = paginate_items(all_projects, page=page, per_page=5)
-    
     msg = f"{MessageFormatter.EMOJI['project']} <b>Projects</b>\n"
     msg += f"Showing {len(paginated['items'])} of {paginated['total_items']} projects\n\n"
     
     buttons = []
     for project in paginated['items']:
-        # Get progress using sync_to_async to avoid async context issues
-        from asgiref.sync import sync_to_async
-        progress = await sync_to_async(project.get_progress_percentage)()
+        # Read from the project's task counters, no extra query
+        progress = project.get_progress_percentage()
         status_emoji = MessageFormatter.get_status_emoji(project.status) if hasattr(project, 'status') else ''
 
         button_text = f"{status_emoji} {project.name} ({progress}%)"
@@ -55,7 +53,9 @@ async def list_projects(update: Update, context: ContextTypes.DEFAULT_TYPE):
             KeyboardBuilder.pagination_buttons(
                 paginated['current_page'],
                 paginated['total_pages'],
-                "list_projects"
+                "list_projects",
+                next_cursor=paginated['next_cursor'],
+                prev_cursor=paginated['prev_cursor']
             )
         )
     
@@ -88,19 +88,10 @@ async def project_detail(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg = MessageFormatter.format_project(project)
     msg += f"\n\n{MessageFormatter.EMOJI['chart']} <b>Statistics:</b>\n"
     
-    # Get task statistics
-    task_manager = ModelManager('core_tasks', 'Task')
-    all_tasks = await task_manager.filter(project_id=project_id)
-    
-    total_tasks = len(all_tasks)
-    done_tasks = len([t for t in all_tasks if t.status == 'DONE'])
-    in_progress = len([t for t in all_tasks if t.status == 'IN_PROGRESS'])
-    todo_tasks = len([t for t in all_tasks if t.status == 'TODO'])
-    
-    msg += f"Total Tasks: {total_tasks}\n"
-    msg += f"{MessageFormatter.EMOJI['done']} Done: {done_tasks}\n"
-    msg += f"{MessageFormatter.EMOJI['in_progress']} In Progress: {in_progress}\n"
-    msg += f"{MessageFormatter.EMOJI['todo']} To Do: {todo_tasks}\n"
+    # Status/priority counts, overdue tasks and hours in one query
+    from core_tasks.stats import get_task_stats
+    stats = await run_sync(get_task_stats, project_id=project_id)
+    msg += MessageFormatter.format_task_stats(stats)
     
     buttons = [
         [InlineKeyboardButton(f"{MessageFormatter.EMOJI['task']} View Tasks", callback_data=f"project_tasks:{project_id}")],
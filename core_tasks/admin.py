@@ -1,7 +1,9 @@
 from django.contrib import admin
+from django.utils.html import format_html, format_html_join
 from .models import (
     Project, Task, TaskComment, TaskAttachment, DailyReport,
-    Meeting, MeetingVote, Reminder, LearningResource, Approval, Alert
+    Meeting, MeetingVote, Reminder, LearningResource, Approval, Alert,
+    OutboundMessage, JobState
 )
 
 
@@ -12,12 +14,39 @@ class ProjectAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     date_hierarchy = 'created_at'
     filter_horizontal = ['members']
+    readonly_fields = ['task_statistics']
 
     def progress(self, obj):
         """Display progress percentage."""
         return f"{obj.get_progress_percentage()}%"
     progress.short_description = 'Progress'
 
+    def task_statistics(self, obj):
+        """Status x priority task counts, overdue tasks and hours."""
+        if not obj.pk:
+            return '-'
+        from .stats import get_task_stats
+        stats = get_task_stats(project=obj)
+        priorities = list(stats['by_priority'])
+
+        header = format_html_join('', '<th>{}</th>', ((p.title(),) for p in priorities))
+        rows = format_html_join(
+            '', '<tr><th>{}</th>{}<td><b>{}</b></td></tr>',
+            (
+                (status.replace('_', ' ').title(),
+                 format_html_join('', '<td>{}</td>', ((counts.get(p, 0),) for p in priorities)),
+                 stats['by_status'].get(status, 0))
+                for status, counts in stats['matrix'].items()
+            )
+        )
+        return format_html(
+            '<table><tr><th></th>{}<th>Total</th></tr>{}</table>'
+            '<p>{} tasks, {}% done, {} overdue. Hours: {} spent / {} estimated</p>',
+            header, rows, stats['total'], stats['completion'], stats['overdue'],
+            stats['actual_hours'], stats['estimated_hours'],
+        )
+    task_statistics.short_description = 'Task statistics'
+
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
@@ -88,5 +117,21 @@ class ApprovalAdmin(admin.ModelAdmin):
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
     list_display = ['user', 'alert_type', 'priority', 'is_read', 'is_sent', 'created_at']
-    list_filter = ['alert_type', 'priority', 'is_read', 'is_sent', 'created_at']
+    list_filter = ['alert_type', 'priority', 'is_read', 'is_sent', 'push_skipped', 'created_at']
     search_fields = ['title', 'message', 'user__username']
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ['idempotency_key', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['idempotency_key', 'text']
+
+
+@admin.register(JobState)
+class JobStateAdmin(admin.ModelAdmin):
+    list_display = [
+        'name', 'last_finished_at', 'last_duration', 'last_rows', 'skipped_runs',
+        'locked_by', 'locked_until', 'last_run_at'
+    ]
+    search_fields = ['name', 'last_error']
@@ -5,3 +5,6 @@ class CoreTasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_tasks'
     verbose_name = 'Core Task Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -65,7 +65,7 @@ def register_handlers(application):
     application.add_handler(CallbackQueryHandler(assign_task, pattern="^assign_task:"))
     
     # Pagination handlers
-    application.add_handler(CallbackQueryHandler(list_tasks, pattern=r"^list_tasks_(all|my):\d+$"))
+    application.add_handler(CallbackQueryHandler(list_tasks, pattern=r"^list_tasks_(all|my):\d+(:[<>][0-9a-z.\-]*)?$"))
 
 
 # Help text for this app
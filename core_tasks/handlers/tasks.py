@@ -5,35 +5,34 @@ from telegram import Update, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 from core_bot.utils import (
     get_or_create_user, ModelManager, KeyboardBuilder,
-    MessageFormatter, paginate_items
+    MessageFormatter, parse_page_callback
 )
 from datetime import datetime, timedelta
 
 
+# Task.Meta.ordering as field names, so the list can use cursor pagination
+TASK_LIST_ORDERING = ('priority_rank', 'deadline', 'id')
+
+
 async def list_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List tasks with filters."""
     user = await get_or_create_user(update, context)
     
-    page = 0
+    page, cursor = 0, None
     filter_type = 'all'  # all, my, project
     
     if update.callback_query and ':' in update.callback_query.data:
-        parts = update.callback_query.data.split(':')
-        if len(parts) > 1:
-            filter_type = parts[0].replace('list_tasks_', '')
-            page = int(parts[1]) if len(parts) > 2 else 0
+        filter_type = update.callback_query.data.split(':')[0].replace('list_tasks_', '')
+        page, cursor = parse_page_callback(update.callback_query.data)
     
     task_manager = ModelManager('core_tasks', 'Task')
     
-    if filter_type == 'my':
-        all_tasks = await task_manager.filter(assigned_to_id=user.id)
-    else:
-        all_tasks = await task_manager.all()
-    
-    # Sort by priority and deadline
-    all_tasks.sort(key=lambda t: (t.priority != 'URGENT', t.priority != 'HIGH', t.deadline or datetime.max))
+    filters = {'assigned_to_id': user.id} if filter_type == 'my' else {}
+    paginated = await task_manager.paginate(
+        page=page, per_page=5, order_by=TASK_LIST_ORDERING, cursor=cursor, **filters
+    )
     
-    if not all_tasks:
+    if not paginated['total_items']:
         msg = f"{MessageFormatter.EMOJI['info']} No tasks found."
         buttons = [[KeyboardBuilder.back_button("menu")]]
         keyboard = KeyboardBuilder.build_menu([], n_cols=1, footer_buttons=buttons)
@@ -44,8 +43,6 @@ async def list_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.callback_query.edit_message_text(msg, parse_mode='HTML', reply_markup=keyboard)
         return
     
-    paginated = paginate_items(all_tasks, page=page, per_page=5)
-    
     msg = f"{MessageFormatter.EMOJI['task']} <b>Tasks</b>\n"
     msg += f"Showing {len(paginated['items'])} of {paginated['total_items']} tasks\n\n"
     
@@ -66,7 +63,9 @@ async def list_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
             KeyboardBuilder.pagination_buttons(
                 paginated['current_page'],
                 paginated['total_pages'],
-                f"list_tasks_{filter_type}"
+                f"list_tasks_{filter_type}",
+                next_cursor=paginated['next_cursor'],
+                prev_cursor=paginated['prev_cursor']
             )
         )
     
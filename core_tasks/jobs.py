@@ -0,0 +1,248 @@
+"""
+Locking and incremental scanning for periodic jobs.
+
+Every beat job runs under exclusive_job(), which takes a lease-based
+lock so a slow run or a second beat scheduler can't start the same job
+twice. The lock is a Redis key when Redis is available, otherwise a
+conditional UPDATE on the job's JobState row; either way the lease
+expires on its own if the worker dies. Duration, rows processed and
+errors of the last run are recorded on JobState.
+
+A job that looks for rows inside a moving time window (tasks due in the
+next 24 hours, overdue tasks, meetings starting soon) only needs to see
+rows that entered the window since its last run, plus rows that were
+created or edited since then. JobState keeps the watermarks:
+
+- last_run_at: rows whose time crossed the threshold after this moment
+- last_seen_updated_at: rows edited after this moment
+
+Both are moved back by OVERLAP when querying, so rows committed by slow
+transactions or written by a server with a slightly late clock are not
+missed. Jobs must therefore be idempotent.
+"""
+import functools
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+try:
+    import redis
+except ImportError:
+    # Optional - the database lock is used instead
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Safety margin re-scanned on every run
+OVERLAP = timedelta(minutes=5)
+
+
+@contextmanager
+def incremental_scan(name: str, model):
+    """
+    Load a job's watermarks and advance them when the job succeeds.
+
+    Args:
+        name: Job name (one JobState row per job)
+        model: Model the job scans; must have an indexed updated_at
+
+    Yields the JobState holding the previous run's watermarks. If the
+    block raises, the watermarks stay put and the next run covers the
+    same rows again.
+    """
+    from core_tasks.models import JobState
+
+    state, _ = JobState.objects.get_or_create(name=name)
+    started_at = timezone.now()
+    seen = model.objects.aggregate(newest=Max('updated_at'))['newest']
+
+    yield state
+
+    state.last_run_at = started_at
+    state.last_seen_updated_at = seen or state.last_seen_updated_at
+    state.save(update_fields=['last_run_at', 'last_seen_updated_at', 'updated_at'])
+
+
+def new_or_changed(state, time_field: str, lead: timedelta = timedelta(0)) -> Q:
+    """
+    Filter for rows a job hasn't looked at yet.
+
+    Args:
+        state: JobState from incremental_scan()
+        time_field: The field the job's window is based on, e.g. 'deadline'
+        lead: How far ahead of now the window ends (e.g. 1 day for
+            "due in the next 24 hours", 0 for "overdue")
+
+    Returns a Q matching rows whose time_field entered the window since
+    the last run or that were edited since then. Matches everything on
+    the first run.
+    """
+    if state.last_run_at is None or state.last_seen_updated_at is None:
+        return Q()
+
+    return (
+        Q(**{f'{time_field}__gt': state.last_run_at + lead - OVERLAP}) |
+        Q(updated_at__gt=state.last_seen_updated_at - OVERLAP)
+    )
+
+
+class DatabaseLock:
+    """
+    Lease on a JobState row.
+
+    Taking the lock is a single conditional UPDATE, which both SQLite and
+    PostgreSQL apply atomically, so exactly one of several workers wins.
+    """
+
+    def __init__(self, name: str, owner: str):
+        self.name = name
+        self.owner = owner
+
+    def acquire(self, ttl: float) -> bool:
+        from core_tasks.models import JobState
+
+        now = timezone.now()
+        return bool(
+            JobState.objects.filter(
+                Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+                name=self.name
+            ).update(locked_by=self.owner, locked_until=now + timedelta(seconds=ttl))
+        )
+
+    def release(self):
+        from core_tasks.models import JobState
+
+        JobState.objects.filter(name=self.name, locked_by=self.owner).update(
+            locked_by='', locked_until=None
+        )
+
+    def holder(self) -> str:
+        from core_tasks.models import JobState
+
+        return JobState.objects.filter(name=self.name).values_list('locked_by', flat=True).first() or ''
+
+
+class RedisLock:
+    """Lease on a Redis key (SET NX PX); only the owner can release it."""
+
+    RELEASE = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, client, name: str, owner: str):
+        self.client = client
+        self.key = f'tasky:job-lock:{name}'
+        self.owner = owner
+
+    def acquire(self, ttl: float) -> bool:
+        return bool(self.client.set(self.key, self.owner, nx=True, px=int(ttl * 1000)))
+
+    def release(self):
+        self.client.eval(self.RELEASE, 1, self.key, self.owner)
+
+    def holder(self) -> str:
+        holder = self.client.get(self.key)
+        return holder.decode() if holder else ''
+
+
+_redis_client = None
+
+
+def _get_redis_client():
+    """Get the Redis client for job locks, or None to use the database."""
+    global _redis_client
+    backend = settings.JOB_LOCK_BACKEND
+    url = settings.JOB_LOCK_REDIS_URL
+    if backend == 'db' or (backend == 'auto' and (redis is None or not url.startswith('redis'))):
+        return None
+    if redis is None:
+        raise ImproperlyConfigured("JOB_LOCK_BACKEND=redis needs the redis package: pip install redis")
+
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(url, socket_timeout=5)
+    return _redis_client
+
+
+def _acquire_lock(name: str, owner: str, ttl: float):
+    """Take the job's lock. Returns (lock, acquired)."""
+    client = _get_redis_client()
+    if client is not None:
+        lock = RedisLock(client, name, owner)
+        try:
+            return lock, lock.acquire(ttl)
+        except redis.RedisError as e:
+            if settings.JOB_LOCK_BACKEND == 'redis':
+                raise
+            logger.warning(f"Redis unavailable for job lock, using the database: {e}")
+
+    lock = DatabaseLock(name, owner)
+    return lock, lock.acquire(ttl)
+
+
+def exclusive_job(ttl: float = None):
+    """
+    Run a job only if no other instance of it is running.
+
+    The decorated function returns (rows processed, message). If the lock
+    is held elsewhere the run is skipped and counted in
+    JobState.skipped_runs. The lease lasts `ttl` seconds (default
+    JOB_LOCK_TTL); it should exceed the job's longest run, since another
+    worker may start the job once it expires.
+
+    Returns the job's message.
+    """
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            from core_tasks.models import JobState
+
+            lease = ttl or settings.JOB_LOCK_TTL
+            owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+            JobState.objects.get_or_create(name=name)
+
+            lock, acquired = _acquire_lock(name, owner, lease)
+            if not acquired:
+                JobState.objects.filter(name=name).update(skipped_runs=F('skipped_runs') + 1)
+                holder = lock.holder()
+                logger.warning(f"Skipping {name}: already running ({holder})")
+                return f"Skipped {name}: already running ({holder})"
+
+            started_at = time.monotonic()
+            rows, error = None, ''
+            try:
+                rows, message = func(*args, **kwargs)
+                return message
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+                raise
+            finally:
+                duration = time.monotonic() - started_at
+                try:
+                    JobState.objects.filter(name=name).update(
+                        last_finished_at=timezone.now(),
+                        last_duration=round(duration, 3),
+                        last_rows=rows,
+                        last_error=error,
+                    )
+                finally:
+                    lock.release()
+                if duration > lease:
+                    logger.warning(
+                        f"{name} ran for {duration:.0f}s, longer than its {lease:.0f}s lock lease; "
+                        f"runs may have overlapped"
+                    )
+
+        return wrapper
+    return decorator
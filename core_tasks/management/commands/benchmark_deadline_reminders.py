@@ -0,0 +1,143 @@
+"""
+Management command to measure send_deadline_reminders on a large number of open tasks.
+"""
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark deadline reminder generation: the old per-task get_or_create "
+        "loop against the bulk pipeline. Test data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=100000,
+            help='Open tasks due in the next 24 hours'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Assignees the tasks are spread over'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Reminders inserted per bulk_create'
+        )
+        parser.add_argument(
+            '--legacy-sample',
+            type=int,
+            default=5000,
+            help='Tasks run through the per-task loop (0 to skip); the full run is extrapolated'
+        )
+
+    def handle(self, *args, **options):
+        from core_tasks.models import Reminder
+        from core_tasks.tasks import send_deadline_reminders
+
+        with transaction.atomic():
+            self.stdout.write(f"Creating {options['tasks']} tasks for {options['users']} users...")
+            task_ids = self._create_tasks(options['tasks'], max(1, options['users']))
+
+            sample = min(options['legacy_sample'], len(task_ids))
+            if sample:
+                with self._measure() as legacy:
+                    self._legacy_loop(task_ids[:sample])
+                Reminder.objects.filter(task_id__in=task_ids).delete()
+                per_task = legacy['elapsed'] / sample
+                self._report(f'per-task loop ({sample} tasks)', sample, legacy)
+                self.stdout.write(
+                    f"  projected for {len(task_ids)} tasks: {per_task * len(task_ids):.1f}s, "
+                    f"{legacy['queries'] / sample * len(task_ids):.0f} queries"
+                )
+
+            with self._measure() as first:
+                send_deadline_reminders(chunk_size=options['chunk_size'])
+            self._report('bulk pipeline (first run)', len(task_ids), first)
+
+            with self._measure() as again:
+                send_deadline_reminders(chunk_size=options['chunk_size'])
+            self._report('bulk pipeline (re-run, all exist)', len(task_ids), again)
+
+            created = Reminder.objects.filter(task_id__in=task_ids).count()
+            self.stdout.write(f'Reminders created: {created} (expected {len(task_ids)})')
+            if sample and first['elapsed']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Speedup: {per_task * len(task_ids) / first['elapsed']:.1f}x"
+                ))
+
+            transaction.set_rollback(True)
+
+    def _create_tasks(self, count: int, users: int) -> list:
+        """Create a project, users and open tasks due within 24 hours."""
+        from core_auth.models import TelegramUser
+        from core_tasks.models import Project, Task
+
+        assignees = TelegramUser.objects.bulk_create(
+            [TelegramUser(username=f'benchmark_user_{i}') for i in range(users)],
+            batch_size=1000,
+        )
+        project = Project.objects.create(name='Reminder benchmark', owner=assignees[0])
+
+        now = timezone.now()
+        tasks = [
+            Task(
+                project=project,
+                title=f'Benchmark task {i}',
+                status='TODO' if i % 2 else 'IN_PROGRESS',
+                assigned_to=assignees[i % users],
+                created_by=assignees[0],
+                deadline=now + timedelta(seconds=60 + i * 86000 // count),
+            )
+            for i in range(count)
+        ]
+        Task.objects.bulk_create(tasks, batch_size=2000)
+        return list(Task.objects.filter(project=project).order_by('id').values_list('id', flat=True))
+
+    def _legacy_loop(self, task_ids):
+        """The previous implementation: get_or_create per task with lazy assignee loads."""
+        from core_tasks.models import Task, Reminder
+
+        for task in Task.objects.filter(id__in=task_ids):
+            if task.assigned_to and task.assigned_to.notify_deadline_approaching:
+                Reminder.objects.get_or_create(
+                    task=task,
+                    user=task.assigned_to,
+                    reminder_type='TASK_DEADLINE',
+                    defaults={
+                        'remind_at': task.deadline - timedelta(hours=2),
+                        'message': f"Task '{task.title}' is due soon!",
+                    }
+                )
+
+    @contextmanager
+    def _measure(self):
+        """Time a block and count its queries."""
+        result = {'queries': 0}
+
+        def count_queries(execute, sql, params, many, context):
+            result['queries'] += 1
+            return execute(sql, params, many, context)
+
+        started_at = time.monotonic()
+        with connection.execute_wrapper(count_queries):
+            yield result
+        result['elapsed'] = time.monotonic() - started_at
+
+    def _report(self, label: str, tasks: int, result: dict):
+        elapsed = result['elapsed']
+        self.stdout.write(
+            f"{label}: {elapsed:.2f}s, {result['queries']} queries "
+            f"- {tasks / elapsed if elapsed else 0:.0f} tasks/s"
+        )
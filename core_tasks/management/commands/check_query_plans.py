@@ -0,0 +1,95 @@
+"""
+Management command to check that the hot bot and job queries use an index.
+"""
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the hot bot and periodic-job queries and fail if "
+        "any of them falls back to a full table scan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan of every query'
+        )
+
+    def hot_queries(self) -> dict:
+        """The queries handlers and beat jobs run most, by name."""
+        from core_tasks.models import Task, Alert, Reminder, Approval, Meeting, OPEN_TASK_STATUSES
+
+        now = timezone.now()
+        user_id = 1
+        return {
+            'my tasks by status': Task.objects.filter(assigned_to_id=user_id, status='TODO'),
+            'tasks by status and deadline': Task.objects.filter(status='REVIEW', deadline__lt=now),
+            'upcoming deadlines': Task.objects.filter(
+                deadline__lte=now + timedelta(days=1), deadline__gte=now, status__in=OPEN_TASK_STATUSES
+            ),
+            'overdue tasks': Task.objects.filter(deadline__lt=now, status__in=OPEN_TASK_STATUSES),
+            'unread alerts': Alert.objects.filter(user_id=user_id, is_read=False).order_by('-created_at'),
+            'due reminders': Reminder.objects.filter(is_sent=False, remind_at__lte=now),
+            'unsent alerts': Alert.objects.filter(is_sent=False, push_skipped=False, pk__gt=0).order_by('pk'),
+            'pending approvals': Approval.objects.filter(
+                approver_id=user_id, status='PENDING'
+            ).order_by('-created_at'),
+            'upcoming meetings': Meeting.objects.filter(scheduled_at__gte=now).order_by('scheduled_at'),
+        }
+
+    def full_scans(self, plan: str) -> list:
+        """Get the plan nodes that read a whole table or index."""
+        if connection.vendor == 'sqlite':
+            # SEARCH uses an index range; SCAN walks the whole table (or index)
+            return [
+                line.split(None, 3)[-1] for line in plan.splitlines()
+                if re.search(r'\bSCAN (?!CONSTANT ROW)', line)
+            ]
+
+        # PostgreSQL: a Seq Scan, or an index scan without an Index Cond
+        scans, node, has_cond = [], None, False
+        for line in plan.splitlines() + ['->']:
+            text = line.strip()
+            if text.startswith('->') or node is None:
+                if node and ('Seq Scan' in node or node.startswith('Index') and not has_cond):
+                    scans.append(node)
+                text = text.lstrip('-> ')
+                node, has_cond = (text if ' Scan ' in f' {text}' else None), False
+            elif text.startswith('Index Cond'):
+                has_cond = True
+        return scans
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"Query plan check is not supported on {connection.vendor}")
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables make a sequential scan the cheapest plan; disable
+                # it so the check reports whether an index *can* be used
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in self.hot_queries().items():
+                plan = queryset.explain()
+                full_scans = self.full_scans(plan)
+                if full_scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'✗ {name}: {"; ".join(full_scans)}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+
+                if options['verbose_plans'] or full_scans:
+                    self.stdout.write(f'    {plan}'.replace('\n', '\n    '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries use a full table scan: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
@@ -0,0 +1,48 @@
+"""
+Management command to delete old notifications without Celery.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old read alerts, sent reminders and sent outbox messages in "
+        "small batches, optionally archiving them to compressed JSONL first"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.CLEANUP_BATCH_SIZE,
+            help='Rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.CLEANUP_BATCH_PAUSE,
+            help='Seconds to sleep between batches'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=settings.CLEANUP_ARCHIVE_DIR,
+            help='Write deleted rows to <table>-<timestamp>.jsonl.gz files in this directory'
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=int,
+            default=settings.CLEANUP_TIME_LIMIT,
+            help='Stop after this many seconds; run again to continue'
+        )
+
+    def handle(self, *args, **options):
+        from core_tasks.tasks import cleanup_old_notifications
+
+        result = cleanup_old_notifications(
+            batch_size=max(1, options['batch_size']),
+            pause=max(0.0, options['pause']),
+            archive_dir=options['archive_dir'],
+            time_limit=max(1, options['time_limit']),
+        )
+        self.stdout.write(self.style.SUCCESS(result))
@@ -0,0 +1,48 @@
+"""
+Management command to recount project task counters.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = "Recount tasks per status and fix project counters that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Projects recounted per transaction'
+        )
+        parser.add_argument(
+            '--project',
+            type=int,
+            action='append',
+            help='Only recount this project id (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        from core_tasks.models import Project
+
+        projects = Project.objects.order_by('pk')
+        if options['project']:
+            projects = projects.filter(pk__in=options['project'])
+
+        batch_size = max(1, options['batch_size'])
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(projects.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                # Lock the rows so concurrent task changes wait for the recount
+                list(Project.objects.select_for_update().filter(pk__in=batch).values_list('pk', flat=True))
+                fixed += Project.objects.filter(pk__in=batch).reconcile_task_counters()
+
+            checked += len(batch)
+            last_pk = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} projects, fixed {fixed}'))
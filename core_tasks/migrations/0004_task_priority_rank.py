@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_tasks', '0003_outboundmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['priority_rank', models.OrderBy(models.F('deadline'), nulls_last=True), 'id'], 'verbose_name': 'Task', 'verbose_name_plural': 'Tasks'},
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(priority='URGENT', then=models.Value(0)), models.When(priority='HIGH', then=models.Value(1)), models.When(priority='MEDIUM', then=models.Value(2)), default=models.Value(3)), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority_rank', 'deadline'], name='task_priority_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:44
+
+from django.db import migrations, models
+
+
+def fill_task_counters(apps, schema_editor):
+    Project = apps.get_model('core_tasks', 'Project')
+    Task = apps.get_model('core_tasks', 'Task')
+    fields = {
+        'TODO': 'tasks_todo',
+        'IN_PROGRESS': 'tasks_in_progress',
+        'REVIEW': 'tasks_review',
+        'BLOCKED': 'tasks_blocked',
+        'DONE': 'tasks_done',
+        'CANCELLED': 'tasks_cancelled',
+    }
+    rows = Task.objects.values_list('project_id', 'status').annotate(count=models.Count('id')).order_by()
+    for project_id, status, count in rows:
+        if status in fields:
+            Project.objects.filter(pk=project_id).update(**{fields[status]: count})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_tasks', '0004_task_priority_rank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_blocked',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_cancelled',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_in_progress',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_review',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_todo',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_task_reminders(apps, schema_editor):
+    Reminder = apps.get_model('core_tasks', 'Reminder')
+    duplicates = (
+        Reminder.objects.filter(task__isnull=False)
+        .values('task_id', 'user_id', 'reminder_type')
+        .annotate(keep_id=models.Min('id'), count=models.Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        Reminder.objects.filter(
+            task_id=row['task_id'], user_id=row['user_id'], reminder_type=row['reminder_type']
+        ).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_tasks', '0006_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_task_reminders, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.UniqueConstraint(fields=('task', 'user', 'reminder_type'), name='unique_task_reminder'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_tasks', '0009_job_lock'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='push_skipped',
+            field=models.BooleanField(default=False, help_text='Not pushed to Telegram (switched off, no chat, too old or refused by Telegram); still listed in /notifications.'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('is_sent', False), ('push_skipped', False)), fields=['id'], name='alert_unsent_idx'),
+        ),
+    ]
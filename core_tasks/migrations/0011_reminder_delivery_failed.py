@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_tasks', '0010_alert_unsent_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='delivery_failed',
+            field=models.BooleanField(default=False, help_text='Telegram refused the message (e.g. the bot was blocked); it is not retried.'),
+        ),
+    ]
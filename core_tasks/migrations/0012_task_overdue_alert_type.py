@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def rename_overdue_alerts(apps, schema_editor):
+    """send_overdue_alerts used to store the invalid alert type 'OVERDUE'."""
+    Alert = apps.get_model('core_tasks', 'Alert')
+    Alert.objects.filter(alert_type='OVERDUE').update(alert_type='TASK_OVERDUE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_tasks', '0011_reminder_delivery_failed'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_overdue_alerts, migrations.RunPython.noop),
+    ]
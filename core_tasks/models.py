@@ -2,12 +2,55 @@
 Core task management models.
 Reusable across projects.
 """
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from datetime import timedelta
 
 
+class ProjectQuerySet(models.QuerySet):
+    """Project queries."""
+
+    def task_counts_by_status(self) -> dict:
+        """
+        Count tasks per project and status from the tasks table.
+
+        Returns {project_id: {counter field: count}} for projects in this
+        queryset, with every counter field present.
+        """
+        counts = {pk: dict.fromkeys(Project.TASK_COUNTER_FIELDS.values(), 0) for pk in self.values_list('pk', flat=True)}
+        rows = (
+            Task.objects.filter(project__in=self.values('pk'))
+            .values_list('project_id', 'status')
+            .annotate(count=models.Count('id'))
+            .order_by()
+        )
+        for project_id, status, count in rows:
+            field = Project.TASK_COUNTER_FIELDS.get(status)
+            if field:
+                counts[project_id][field] = count
+        return counts
+
+    def reconcile_task_counters(self) -> int:
+        """
+        Recount tasks and fix projects whose counters drifted.
+
+        Returns the number of projects that were fixed.
+        """
+        counts = self.task_counts_by_status()
+        fields = list(Project.TASK_COUNTER_FIELDS.values())
+        drifted = []
+        for project in self.filter(pk__in=counts).only('pk', *fields):
+            expected = counts[project.pk]
+            if any(getattr(project, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(project, field, value)
+                drifted.append(project)
+        if drifted:
+            Project.objects.bulk_update(drifted, fields)
+        return len(drifted)
+
+
 class Project(models.Model):
     """Project model with enhanced features."""
 
@@ -50,9 +93,30 @@ class Project(models.Model):
 
     telegram_chat_id = models.BigIntegerField(null=True, blank=True)
 
+    # Task counts per status, kept up to date by core_tasks.signals
+    # (repair with: python manage.py reconcile_project_counters)
+    tasks_todo = models.PositiveIntegerField(default=0, editable=False)
+    tasks_in_progress = models.PositiveIntegerField(default=0, editable=False)
+    tasks_review = models.PositiveIntegerField(default=0, editable=False)
+    tasks_blocked = models.PositiveIntegerField(default=0, editable=False)
+    tasks_done = models.PositiveIntegerField(default=0, editable=False)
+    tasks_cancelled = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
+    # Task status -> counter field
+    TASK_COUNTER_FIELDS = {
+        'TODO': 'tasks_todo',
+        'IN_PROGRESS': 'tasks_in_progress',
+        'REVIEW': 'tasks_review',
+        'BLOCKED': 'tasks_blocked',
+        'DONE': 'tasks_done',
+        'CANCELLED': 'tasks_cancelled',
+    }
+
     class Meta:
         verbose_name = _('Project')
         verbose_name_plural = _('Projects')
@@ -61,19 +125,39 @@ class Project(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Task counters are only written by core_tasks.signals, so saving a
+        # project loaded earlier must not overwrite them with stale values
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            counter_fields = set(self.TASK_COUNTER_FIELDS.values())
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def tasks_total(self):
+        """Number of tasks in the project (from the counters)."""
+        return sum(getattr(self, field) for field in self.TASK_COUNTER_FIELDS.values())
+
     def get_progress_percentage(self):
         """
         Calculate project completion percentage.
         Note: This is a regular method, not a property, to avoid async issues.
-        Call with sync_to_async when in async context.
+        Uses the task counters, so it never queries the database.
         """
-        total_tasks = self.tasks.count()
+        total_tasks = self.tasks_total
+        completed_tasks = self.tasks_done
         if total_tasks == 0:
             return 0
-        completed_tasks = self.tasks.filter(status='DONE').count()
         return int((completed_tasks / total_tasks) * 100)
 
 
+# Tasks the deadline and overdue jobs look at
+OPEN_TASK_STATUSES = ['TODO', 'IN_PROGRESS']
+
+
 class Task(models.Model):
     """Enhanced task model with deadlines and tracking."""
 
@@ -102,6 +186,17 @@ class Task(models.Model):
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='TODO')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='MEDIUM')
+    # Sort key for priority: 0 = urgent ... 3 = low
+    priority_rank = models.GeneratedField(
+        expression=models.Case(
+            models.When(priority='URGENT', then=models.Value(0)),
+            models.When(priority='HIGH', then=models.Value(1)),
+            models.When(priority='MEDIUM', then=models.Value(2)),
+            default=models.Value(3),
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
 
     assigned_to = models.ForeignKey(
         'core_auth.TelegramUser',
@@ -139,11 +234,67 @@ class Task(models.Model):
     class Meta:
         verbose_name = _('Task')
         verbose_name_plural = _('Tasks')
-        ordering = ['-priority', '-created_at']
+        # Most urgent first, then earliest deadline
+        ordering = ['priority_rank', models.F('deadline').asc(nulls_last=True), 'id']
+        indexes = [
+            models.Index(fields=['priority_rank', 'deadline'], name='task_priority_deadline_idx'),
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            # Incremental job scans (core_tasks.jobs)
+            models.Index(fields=['updated_at'], name='task_updated_idx'),
+            # Deadline and overdue scans only look at open tasks
+            models.Index(
+                fields=['deadline'], name='task_open_deadline_idx',
+                condition=models.Q(status__in=OPEN_TASK_STATUSES),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.project.name} - {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the project counters currently include
+        instance._counted_as = (instance.__dict__.get('project_id'), instance.__dict__.get('status'))
+        return instance
+
+    def _lock_counted_as(self, using: str):
+        """
+        Lock this task's row and read the (project id, status) the counters include.
+
+        The snapshot taken in from_db() may be stale if another worker
+        changed the task since it was loaded; counting from it would move
+        the task out of the same counter twice.
+        """
+        tasks = Task.objects.using(using).filter(pk=self.pk)
+        if connections[using].features.has_select_for_update:
+            return tasks.select_for_update().values_list('project_id', 'status').first()
+
+        # SQLite has no row locks: a write takes the database lock, so no
+        # other transaction can change the task until this one commits
+        tasks.update(status=models.F('status'))
+        return tasks.values_list('project_id', 'status').first()
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        update_fields = kwargs.get('update_fields')
+        # Project counters are updated in post_save; keep both in one transaction
+        with transaction.atomic(using=using):
+            if not self._state.adding and self.pk is not None and (
+                update_fields is None or {'status', 'project', 'project_id'} & set(update_fields)
+            ):
+                self._counted_as = self._lock_counted_as(using)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using):
+            counted_as = self._lock_counted_as(using)
+            if counted_as is not None:
+                self._counted_as = counted_as
+            return super().delete(*args, **kwargs)
+
     @property
     def is_overdue(self):
         """Check if task is overdue."""
@@ -308,6 +459,10 @@ class Meeting(models.Model):
         verbose_name = _('Meeting')
         verbose_name_plural = _('Meetings')
         ordering = ['scheduled_at']
+        indexes = [
+            models.Index(fields=['scheduled_at'], name='meeting_scheduled_idx'),
+            models.Index(fields=['updated_at'], name='meeting_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.scheduled_at}"
@@ -377,6 +532,10 @@ class Reminder(models.Model):
     remind_at = models.DateTimeField()
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
+    delivery_failed = models.BooleanField(
+        default=False,
+        help_text=_('Telegram refused the message (e.g. the bot was blocked); it is not retried.')
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -384,6 +543,19 @@ class Reminder(models.Model):
         verbose_name = _('Reminder')
         verbose_name_plural = _('Reminders')
         ordering = ['remind_at']
+        indexes = [
+            # Sent reminders are never scanned for due ones
+            models.Index(
+                fields=['remind_at'], name='reminder_unsent_due_idx',
+                condition=models.Q(is_sent=False),
+            ),
+        ]
+        constraints = [
+            # One reminder of each type per task and user, so jobs can re-run safely
+            models.UniqueConstraint(
+                fields=['task', 'user', 'reminder_type'], name='unique_task_reminder'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.get_reminder_type_display()} - {self.remind_at}"
@@ -498,6 +670,9 @@ class Approval(models.Model):
         verbose_name = _('Approval')
         verbose_name_plural = _('Approvals')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['approver', 'status', 'created_at'], name='approval_approver_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_approval_type_display()} - {self.status}"
@@ -518,6 +693,17 @@ class Alert(models.Model):
         ('SYSTEM', _('System')),
     ]
 
+    # TelegramUser preference that switches push delivery of an alert
+    # type off; types not listed are always pushed
+    PREFERENCES = {
+        'TASK_ASSIGNED': 'notify_task_assigned',
+        'TASK_OVERDUE': 'notify_task_assigned',
+        'DEADLINE_APPROACHING': 'notify_deadline_approaching',
+        'MEETING_REMINDER': 'notify_meeting_scheduled',
+        'APPROVAL_REQUIRED': 'notify_approval_required',
+        'APPROVAL_RESPONSE': 'notify_approval_required',
+    }
+
     PRIORITY_CHOICES = [
         ('LOW', _('Low')),
         ('MEDIUM', _('Medium')),
@@ -561,6 +747,13 @@ class Alert(models.Model):
     is_read = models.BooleanField(default=False)
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
+    push_skipped = models.BooleanField(
+        default=False,
+        help_text=_(
+            'Not pushed to Telegram (switched off, no chat, too old or refused by Telegram); '
+            'still listed in /notifications.'
+        )
+    )
     read_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -569,6 +762,103 @@ class Alert(models.Model):
         verbose_name = _('Alert')
         verbose_name_plural = _('Alerts')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='alert_user_read_created_idx'),
+            # Push delivery only looks at unsent alerts
+            models.Index(
+                fields=['id'], name='alert_unsent_idx',
+                condition=models.Q(is_sent=False, push_skipped=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.get_alert_type_display()}"
+
+
+class OutboundMessage(models.Model):
+    """
+    Outbox of messages sent by the bot outside of handlers.
+
+    Producers insert rows (deduplicated by idempotency_key) and drain
+    workers claim them in batches, send them and record the outcome.
+    """
+
+    STATUS_CHOICES = [
+        ('PENDING', _('Pending')),
+        ('SENDING', _('Sending')),
+        ('SENT', _('Sent')),
+        ('FAILED', _('Failed')),
+    ]
+
+    chat_id = models.BigIntegerField()
+    text = models.TextField()
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text=_('Identifies the message, e.g. "reminder:42". Enqueuing the same key twice is a no-op.')
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    # Claim held by a drain worker while sending
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Outbound Message')
+        verbose_name_plural = _('Outbound Messages')
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.idempotency_key} - {self.status}"
+
+
+class JobState(models.Model):
+    """
+    Bookkeeping for a periodic job (see core_tasks.jobs).
+
+    Watermarks from the last successful run let a job look only at rows
+    that changed or crossed a time threshold since then. The row also
+    holds the job's lock lease and the outcome of its last run.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+
+    # Start of the last successful run
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    # Newest updated_at of the scanned table when that run started
+    last_seen_updated_at = models.DateTimeField(null=True, blank=True)
+
+    # Lease held by the running instance (database lock backend)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    # Last finished run, successful or not
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_duration = models.FloatField(null=True, blank=True, help_text=_('Seconds'))
+    last_rows = models.PositiveIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # Runs skipped because another instance held the lock
+    skipped_runs = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('Job State')
+        verbose_name_plural = _('Job States')
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
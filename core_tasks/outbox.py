@@ -0,0 +1,393 @@
+"""
+Durable outbox for bot-originated messages.
+
+Producers call enqueue() instead of sending directly. Drain workers
+claim pending rows in batches, send them through the outbound scheduler
+and record the outcome, so a crashed worker never loses a message and
+an idempotency key is queued only once. Several drain workers can run
+side by side:
+
+- PostgreSQL: rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED
+- SQLite: rows are claimed with a conditional UPDATE, which SQLite
+  applies atomically
+
+A claim is a lease: rows left in SENDING by a dead worker become
+claimable again once the lease expires. Delivery is at-least-once: a
+worker that dies after sending but before recording the results, or
+whose batch takes longer than the lease, leaves messages that are sent
+again.
+"""
+import html
+import logging
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Handlers called with the source ids of sent and of finally failed
+# messages, keyed by the idempotency key prefix (e.g. "reminder" for
+# "reminder:42")
+_sent_handlers = {}
+_failed_handlers = {}
+
+
+def register_sent_handler(prefix: str, handler):
+    """Register a callable that receives the ids of sent '<prefix>:<id>' messages."""
+    _sent_handlers[prefix] = handler
+
+
+def register_failed_handler(prefix: str, handler):
+    """Register a callable that receives the ids of '<prefix>:<id>' messages marked FAILED."""
+    _failed_handlers[prefix] = handler
+
+
+def _mark_reminders_sent(ids):
+    from core_tasks.models import Reminder
+    Reminder.objects.filter(id__in=ids).update(is_sent=True, sent_at=timezone.now())
+
+
+def _mark_reminders_failed(ids):
+    from core_tasks.models import Reminder
+    # Stops the reminder timer and process_pending_reminders from firing them again
+    Reminder.objects.filter(id__in=ids, is_sent=False).update(delivery_failed=True)
+
+
+register_sent_handler('reminder', _mark_reminders_sent)
+register_failed_handler('reminder', _mark_reminders_failed)
+
+
+# Seconds from creation to delivery of recently pushed alerts (this process)
+_alert_latency = deque(maxlen=1000)
+
+
+def _mark_alerts_sent(ids):
+    from core_tasks.models import Alert
+    now = timezone.now()
+    alerts = Alert.objects.filter(id__in=ids, is_sent=False)
+    _alert_latency.extend(
+        (now - created_at).total_seconds() for created_at in alerts.values_list('created_at', flat=True)
+    )
+    alerts.update(is_sent=True, sent_at=now)
+
+
+def _mark_alerts_failed(ids):
+    from core_tasks.models import Alert
+    Alert.objects.filter(id__in=ids, is_sent=False).update(push_skipped=True)
+
+
+register_sent_handler('alert', _mark_alerts_sent)
+register_failed_handler('alert', _mark_alerts_failed)
+
+
+def enqueue(messages) -> int:
+    """
+    Add messages to the outbox.
+
+    Args:
+        messages: Iterable of (idempotency_key, chat_id, text)
+
+    Returns:
+        int: Number of rows inserted (keys already present are skipped)
+    """
+    from core_tasks.models import OutboundMessage
+
+    rows = [
+        OutboundMessage(idempotency_key=key, chat_id=chat_id, text=text)
+        for key, chat_id, text in messages
+    ]
+    if not rows:
+        return 0
+
+    keys = [row.idempotency_key for row in rows]
+    existing = OutboundMessage.objects.filter(idempotency_key__in=keys).count()
+    OutboundMessage.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+    return len(rows) - existing
+
+
+def enqueue_due_reminders(ids=None) -> int:
+    """
+    Queue unsent reminders that are due.
+
+    Args:
+        ids: Only consider these reminder ids (default: all)
+
+    Returns:
+        int: Number of reminders queued
+    """
+    from core_tasks.models import Reminder
+
+    reminders = Reminder.objects.filter(
+        is_sent=False,
+        delivery_failed=False,
+        remind_at__lte=timezone.now(),
+        user__telegram_id__isnull=False
+    )
+    if ids is not None:
+        reminders = reminders.filter(id__in=ids)
+
+    # Reminders are marked sent once their message goes out
+    return enqueue(
+        (f"reminder:{reminder_id}", telegram_id, f"🔔 Reminder:\n\n{message}")
+        for reminder_id, telegram_id, message in
+        reminders.values_list('id', 'user__telegram_id', 'message').iterator()
+    )
+
+
+def enqueue_pending_alerts(batch_size: int = 1000) -> dict:
+    """
+    Queue unsent alerts for push delivery.
+
+    Alerts the user already read in /notifications, alerts the user
+    switched off (Alert.PREFERENCES), alerts of users without a Telegram
+    chat and alerts older than ALERT_PUSH_MAX_AGE are not pushed: they are
+    marked push_skipped and stay visible in /notifications.
+
+    Returns a report with queued and skipped counts.
+    """
+    from core_tasks.models import Alert
+
+    cutoff = timezone.now() - timedelta(seconds=settings.ALERT_PUSH_MAX_AGE)
+    preferences = sorted(set(Alert.PREFERENCES.values()))
+    pending = Alert.objects.filter(is_sent=False, push_skipped=False).order_by('pk').values(
+        'id', 'alert_type', 'priority', 'title', 'message', 'created_at', 'is_read',
+        'user__telegram_id', *(f'user__{field}' for field in preferences)
+    )
+
+    queued = skipped = 0
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]['id']
+
+        messages, skip_ids = [], []
+        for alert in batch:
+            preference = Alert.PREFERENCES.get(alert['alert_type'])
+            if (
+                alert['is_read'] or alert['user__telegram_id'] is None or alert['created_at'] < cutoff or
+                preference and not alert[f'user__{preference}']
+            ):
+                skip_ids.append(alert['id'])
+                continue
+
+            icon = '🚨' if alert['priority'] in ('HIGH', 'URGENT') else '🔔'
+            title = alert['title'] or Alert(alert_type=alert['alert_type']).get_alert_type_display()
+            messages.append((
+                f"alert:{alert['id']}",
+                alert['user__telegram_id'],
+                f"{icon} <b>{html.escape(title)}</b>\n\n{html.escape(alert['message'])}"
+            ))
+
+        # Queued alerts are marked sent once their message goes out
+        queued += enqueue(messages)
+        if skip_ids:
+            skipped += Alert.objects.filter(id__in=skip_ids, is_sent=False).update(push_skipped=True)
+
+    return {'queued': queued, 'skipped': skipped}
+
+
+def alert_delivery_stats() -> dict:
+    """Get the alert push backlog and recent delivery latency."""
+    from core_tasks.models import Alert
+
+    backlog = Alert.objects.filter(is_sent=False, push_skipped=False).aggregate(
+        depth=Count('id'), oldest=Min('created_at')
+    )
+    oldest = backlog['oldest']
+    latency = sorted(_alert_latency) or [0.0]
+    return {
+        'backlog': backlog['depth'],
+        'oldest_s': round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0.0,
+        'latency_s_avg': round(sum(latency) / len(latency), 1),
+        'latency_s_p95': round(latency[min(len(latency) - 1, int(len(latency) * 0.95))], 1),
+    }
+
+
+def _claimable():
+    now = timezone.now()
+    return (
+        Q(status='PENDING', next_attempt_at__lte=now) |
+        Q(status='SENDING', claimed_until__lt=now)
+    )
+
+
+def claim_batch(batch_size: int, lease: timedelta, keys=None) -> list:
+    """Claim up to batch_size due messages (only those with the given keys, if set) for this worker."""
+    from core_tasks.models import OutboundMessage
+
+    token = uuid.uuid4().hex
+    claim = {
+        'status': 'SENDING',
+        'claim_token': token,
+        'claimed_until': timezone.now() + lease,
+        'attempts': F('attempts') + 1,
+    }
+
+    due = OutboundMessage.objects.filter(_claimable())
+    if keys is not None:
+        due = due.filter(idempotency_key__in=keys)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                due
+                .select_for_update(skip_locked=True)
+                .order_by('next_attempt_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            OutboundMessage.objects.filter(id__in=ids).update(**claim)
+    else:
+        ids = list(
+            due
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        # Re-check the condition in the UPDATE so rows another worker
+        # claimed in the meantime are skipped
+        OutboundMessage.objects.filter(_claimable(), id__in=ids).update(**claim)
+
+    # By id, since claim_token isn't indexed
+    return list(OutboundMessage.objects.filter(id__in=ids, claim_token=token).order_by('id'))
+
+
+def _notify(handlers, keys):
+    """Dispatch idempotency keys to the registered sent or failed handlers."""
+    ids_by_prefix = defaultdict(list)
+    for key in keys:
+        prefix, _, source_id = key.partition(':')
+        if prefix in handlers and source_id.isdigit():
+            ids_by_prefix[prefix].append(int(source_id))
+
+    for prefix, ids in ids_by_prefix.items():
+        handlers[prefix](ids)
+
+
+def _record_results(messages, results):
+    """Store the outcome of a sent batch (one SendResult per message)."""
+    from core_tasks.models import OutboundMessage
+
+    now = timezone.now()
+    sent = [message for message, result in zip(messages, results) if result]
+
+    # Only touch rows still holding our claim
+    claimed = OutboundMessage.objects.filter(claim_token=messages[0].claim_token, status='SENDING')
+
+    # Failures grouped by the update they need, so each group is one query
+    updates = defaultdict(list)
+    failed_keys = []
+    for message, result in zip(messages, results):
+        if result:
+            continue
+        if result.permanent:
+            # Blocked bot, chat not found, bad request - retrying won't help
+            updates[('FAILED', None, result.error)].append(message.id)
+            failed_keys.append(message.idempotency_key)
+        elif message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            error = f"Gave up after {message.attempts} attempts: {result.error}"
+            updates[('FAILED', None, error)].append(message.id)
+            failed_keys.append(message.idempotency_key)
+        else:
+            # Retry with exponential backoff
+            retry_at = now + timedelta(seconds=30 * 2 ** (message.attempts - 1))
+            updates[('PENDING', retry_at, result.error)].append(message.id)
+
+    with transaction.atomic():
+        claimed.filter(id__in=[m.id for m in sent]).update(
+            status='SENT', sent_at=now, claimed_until=None, last_error=''
+        )
+        _notify(_sent_handlers, [m.idempotency_key for m in sent])
+
+        for (status, retry_at, error), ids in updates.items():
+            fields = {'status': status, 'claimed_until': None, 'last_error': error}
+            if retry_at is not None:
+                fields['next_attempt_at'] = retry_at
+            claimed.filter(id__in=ids).update(**fields)
+        _notify(_failed_handlers, failed_keys)
+
+    return len(sent), len(messages) - len(sent)
+
+
+def drain(batch_size: int = None, max_batches: int = None, keys=None) -> dict:
+    """
+    Send due outbox messages until none are left.
+
+    With keys set, only the messages with those idempotency keys are
+    sent (e.g. the reminders the reminder timer just fired); the rest is
+    left to the drain_outbox job.
+
+    Returns a report with sent/failed counts and the achieved send rate.
+    """
+    from core_bot.outbound import get_outbound_scheduler
+
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    lease = timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    scheduler = get_outbound_scheduler()
+
+    started_at = time.monotonic()
+    sent_count = failed_count = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        messages = claim_batch(batch_size, lease, keys)
+        if not messages:
+            break
+        batches += 1
+
+        report = scheduler.send_concurrently((m.chat_id, m.text) for m in messages)
+        sent, failed = _record_results(messages, report['results'])
+        sent_count += sent
+        failed_count += failed
+
+    elapsed = time.monotonic() - started_at
+    return {
+        'sent': sent_count,
+        'failed': failed_count,
+        'batches': batches,
+        'rate': round(sent_count / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def adrain(batch_size: int = None, max_batches: int = None, keys=None) -> dict:
+    """
+    Async drain() for the bot process.
+
+    Only claiming and recording results run on the database threads; the
+    sends are awaited on the event loop, so a burst of messages doesn't
+    hold a thread the bot's handlers need for their queries.
+    """
+    from core_bot.outbound import get_outbound_scheduler
+    from core_bot.utils import run_sync
+
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    lease = timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    scheduler = get_outbound_scheduler()
+
+    started_at = time.monotonic()
+    sent_count = failed_count = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        messages = await run_sync(claim_batch, batch_size, lease, keys)
+        if not messages:
+            break
+        batches += 1
+
+        report = await scheduler.asend_many([(m.chat_id, m.text) for m in messages])
+        sent, failed = await run_sync(_record_results, messages, report['results'])
+        sent_count += sent
+        failed_count += failed
+
+    elapsed = time.monotonic() - started_at
+    return {
+        'sent': sent_count,
+        'failed': failed_count,
+        'batches': batches,
+        'rate': round(sent_count / elapsed, 2) if elapsed else 0.0,
+    }
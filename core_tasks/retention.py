@@ -0,0 +1,118 @@
+"""
+Retention cleanup.
+Deletes old rows in primary-key batches, one short transaction per batch,
+so other writers (the bot on SQLite in particular) only wait for a single
+batch instead of the whole cleanup. Each committed batch stays deleted,
+so an interrupted cleanup simply continues on its next run. Deleted rows
+can be appended to a gzip-compressed JSONL archive. Each batch is written
+and synced to disk before its delete commits, so no row is deleted
+without being archived. A batch whose delete fails or never commits is
+archived again by the next run; readers of the archive should keep the
+last line per primary key.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+def old_notifications(now=None) -> dict:
+    """Rows past their retention period, by name."""
+    from core_tasks.models import Alert, Reminder, OutboundMessage
+
+    now = now or timezone.now()
+    return {
+        # Read alerts older than 30 days
+        'alerts': Alert.objects.filter(created_at__lt=now - timedelta(days=30), is_read=True),
+        # Sent (or undeliverable) reminders older than 7 days
+        'reminders': Reminder.objects.filter(
+            Q(is_sent=True) | Q(delivery_failed=True), remind_at__lt=now - timedelta(days=7)
+        ),
+        # Sent outbox messages older than 7 days
+        'outbox messages': OutboundMessage.objects.filter(sent_at__lt=now - timedelta(days=7), status='SENT'),
+    }
+
+
+def delete_in_batches(queryset, batch_size: int = 1000, pause: float = 0.0,
+                      archive_dir=None, stop_at: float = None) -> dict:
+    """
+    Delete the rows of a queryset in primary-key order.
+
+    Args:
+        queryset: Rows to delete
+        batch_size: Rows deleted per transaction
+        pause: Seconds to sleep between batches, to let other writers in
+        archive_dir: If set, append each deleted batch to
+            <archive_dir>/<table>-<timestamp>.jsonl.gz
+        stop_at: time.monotonic() value after which no new batch is started
+
+    Returns a report with deleted, archived, elapsed (seconds), rate
+    (rows/s), complete (False if stopped early) and archive (file path).
+    """
+    model = queryset.model
+    queryset = queryset.order_by('pk')
+    archive = archive_path = None
+    deleted = archived = 0
+    complete = False
+    last_pk = None
+    started_at = time.monotonic()
+
+    try:
+        while True:
+            if stop_at is not None and time.monotonic() >= stop_at:
+                break
+
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            with transaction.atomic():
+                ids = list(batch.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    complete = True
+                    break
+
+                # Re-check the condition in case a row changed since it was selected
+                selected = queryset.filter(pk__in=ids)
+                if archive_dir:
+                    # Locked, so the rows read are exactly the rows deleted
+                    rows = list(selected.select_for_update().values())
+                    if rows:
+                        if archive is None:
+                            archive_path = Path(archive_dir) / (
+                                f"{model._meta.db_table}-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+                            )
+                            archive_path.parent.mkdir(parents=True, exist_ok=True)
+                            archive = gzip.open(archive_path, 'at', encoding='utf-8')
+                        for row in rows:
+                            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                        archived += len(rows)
+                        # On disk before the delete commits
+                        archive.flush()
+                        os.fsync(archive.fileno())
+                    selected = model.objects.filter(pk__in=[row[model._meta.pk.attname] for row in rows])
+                deleted += selected.delete()[0]
+
+            last_pk = ids[-1]
+            if len(ids) < batch_size:
+                complete = True
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    elapsed = time.monotonic() - started_at
+    return {
+        'deleted': deleted,
+        'archived': archived,
+        'elapsed': round(elapsed, 2),
+        'rate': round(deleted / elapsed, 1) if elapsed else 0.0,
+        'complete': complete,
+        'archive': str(archive_path) if archive_path else None,
+    }
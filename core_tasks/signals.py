@@ -0,0 +1,62 @@
+"""
+Signal handlers keeping Project task counters in sync with Task rows.
+"""
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Project, Task
+
+
+def _adjust_counters(changes: dict):
+    """
+    Apply counter deltas.
+
+    changes maps project id -> {task status: delta}. Task.save() and
+    Task.delete() lock the task row first, so concurrent changes can't
+    count the same move twice. Counters never go below zero; drift from
+    QuerySet.update() is repaired by reconcile_project_counters.
+    """
+    for project_id, deltas in changes.items():
+        updates = {}
+        for status, delta in deltas.items():
+            field = Project.TASK_COUNTER_FIELDS.get(status)
+            if field and delta:
+                updates[field] = Greatest(F(field) + delta, 0)
+        if project_id and updates:
+            Project.objects.filter(pk=project_id).update(**updates)
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Count a new task, or move it between counters when its status or project changes."""
+    if raw:
+        return
+    if update_fields is not None and not {'status', 'project', 'project_id'} & set(update_fields):
+        return
+
+    old = None if created else getattr(instance, '_counted_as', None)
+    new = (instance.project_id, instance.status)
+    if old == new or (old is None and not created):
+        # Unchanged, or a row that no longer exists
+        instance._counted_as = new
+        return
+
+    changes = {}
+    if old is not None:
+        changes.setdefault(old[0], {})[old[1]] = -1
+    changes.setdefault(new[0], {})
+    changes[new[0]][new[1]] = changes[new[0]].get(new[1], 0) + 1
+    _adjust_counters(changes)
+    instance._counted_as = new
+
+
+@receiver(post_delete, sender=Task)
+def uncount_deleted_task(sender, instance, origin=None, **kwargs):
+    """Remove a deleted task from its project's counters."""
+    if isinstance(origin, Project) or getattr(origin, 'model', None) is Project:
+        # The project itself is being deleted
+        return
+    project_id, status = getattr(instance, '_counted_as', (instance.project_id, instance.status))
+    _adjust_counters({project_id: {status: -1}})
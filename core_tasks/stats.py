@@ -0,0 +1,74 @@
+"""
+Task statistics.
+Counts tasks by status and priority, overdue tasks and hour totals with a
+single GROUP BY query. Used by the bot, the admin and the reports.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Task
+
+# Statuses that no longer count as overdue
+CLOSED_STATUSES = ['DONE', 'CANCELLED']
+
+
+def get_task_stats(queryset=None, completed_since=None, **filters) -> dict:
+    """
+    Aggregate task statistics.
+
+    Args:
+        queryset: Tasks to aggregate (defaults to all tasks)
+        completed_since: Also count tasks completed after this datetime
+        **filters: Extra filters, e.g. project_id=1 or assigned_to=user
+
+    Returns a dict with:
+        total, overdue, completion (percent done),
+        estimated_hours, actual_hours (Decimal),
+        by_status and by_priority ({choice: count}),
+        matrix ({status: {priority: count}}),
+        completed_recently (only if completed_since is given)
+    """
+    queryset = (queryset if queryset is not None else Task.objects.all()).filter(**filters)
+    aggregates = {
+        'count': Count('id'),
+        'overdue': Count('id', filter=Q(deadline__lt=timezone.now()) & ~Q(status__in=CLOSED_STATUSES)),
+        'estimated_hours': Sum('estimated_hours'),
+        'actual_hours': Sum('actual_hours'),
+    }
+    if completed_since is not None:
+        aggregates['completed_recently'] = Count('id', filter=Q(completed_at__gte=completed_since))
+
+    statuses = [status for status, _ in Task.STATUS_CHOICES]
+    priorities = [priority for priority, _ in Task.PRIORITY_CHOICES]
+    stats = {
+        'total': 0,
+        'overdue': 0,
+        'estimated_hours': Decimal('0'),
+        'actual_hours': Decimal('0'),
+        'by_status': dict.fromkeys(statuses, 0),
+        'by_priority': dict.fromkeys(priorities, 0),
+        'matrix': {status: dict.fromkeys(priorities, 0) for status in statuses},
+    }
+    if completed_since is not None:
+        stats['completed_recently'] = 0
+
+    # One row per (status, priority) pair present in the data
+    rows = queryset.order_by().values('status', 'priority').annotate(**aggregates)
+    for row in rows:
+        status, priority, count = row['status'], row['priority'], row['count']
+        stats['matrix'].setdefault(status, {}).setdefault(priority, 0)
+        stats['matrix'][status][priority] += count
+        stats['by_status'][status] = stats['by_status'].get(status, 0) + count
+        stats['by_priority'][priority] = stats['by_priority'].get(priority, 0) + count
+        stats['total'] += count
+        stats['overdue'] += row['overdue']
+        stats['estimated_hours'] += row['estimated_hours'] or 0
+        stats['actual_hours'] += row['actual_hours'] or 0
+        if completed_since is not None:
+            stats['completed_recently'] += row['completed_recently']
+
+    done = stats['by_status'].get('DONE', 0)
+    stats['completion'] = int(done / stats['total'] * 100) if stats['total'] else 0
+    return stats
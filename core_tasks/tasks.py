@@ -1,6 +1,9 @@
 """
 Celery tasks for background processing.
 Note: Celery is optional. If not installed, these tasks won't be available.
+
+Every job runs under exclusive_job() and returns (rows processed, message);
+the rows are recorded on the job's JobState and the message is the result.
 """
 try:
     from celery import shared_task
@@ -15,187 +18,246 @@ except ImportError:
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from core_tasks.jobs import exclusive_job
 
 
 @shared_task
-def send_deadline_reminders():
-    """Send reminders for upcoming deadlines."""
-    from core_tasks.models import Task, Reminder
-    from core_auth.models import TelegramUser
+@exclusive_job()
+def send_deadline_reminders(chunk_size=1000):
+    """Create reminders for tasks due in the next 24 hours."""
+    from core_tasks.models import Task, Reminder, OPEN_TASK_STATUSES
+    from core_tasks.jobs import incremental_scan, new_or_changed
     
-    # Get tasks with deadlines in the next 24 hours
-    tomorrow = timezone.now() + timedelta(days=1)
-    upcoming_tasks = Task.objects.filter(
-        deadline__lte=tomorrow,
-        deadline__gte=timezone.now(),
-        status__in=['TODO', 'IN_PROGRESS']
-    )
+    with incremental_scan('send_deadline_reminders', Task) as state:
+        # Get tasks with deadlines in the next 24 hours whose assignee wants
+        # deadline reminders and doesn't have one yet - all in one query.
+        # Only tasks that became due soon or changed since the last run.
+        now = timezone.now()
+        lead = timedelta(days=1)
+        has_reminder = Reminder.objects.filter(
+            task=OuterRef('pk'), user=OuterRef('assigned_to'), reminder_type='TASK_DEADLINE'
+        )
+        upcoming_tasks = Task.objects.filter(
+            new_or_changed(state, 'deadline', lead),
+            ~Exists(has_reminder),
+            deadline__lte=now + lead,
+            deadline__gte=now,
+            status__in=OPEN_TASK_STATUSES,
+            assigned_to__notify_deadline_approaching=True
+        ).order_by().values_list('id', 'title', 'deadline', 'assigned_to_id')
+        
+        processed = created = 0
+        chunk = []
+        for task_id, title, deadline, user_id in upcoming_tasks.iterator(chunk_size=chunk_size):
+            chunk.append(Reminder(
+                task_id=task_id,
+                user_id=user_id,
+                reminder_type='TASK_DEADLINE',
+                remind_at=deadline - timedelta(hours=2),
+                message=f"Task '{title}' is due soon!",
+            ))
+            if len(chunk) >= chunk_size:
+                created += _create_task_reminders(chunk)
+                processed += len(chunk)
+                chunk = []
+        if chunk:
+            created += _create_task_reminders(chunk)
+            processed += len(chunk)
     
-    for task in upcoming_tasks:
-        if task.assigned_to and task.assigned_to.notify_deadline_approaching:
-            # Create reminder
-            Reminder.objects.get_or_create(
-                task=task,
-                user=task.assigned_to,
-                reminder_type='DEADLINE',
-                defaults={
-                    'reminder_time': task.deadline - timedelta(hours=2),
-                    'message': f"Task '{task.title}' is due soon!",
-                    'is_sent': False
-                }
-            )
+    return processed, f"Processed {processed} upcoming tasks, created {created} reminders"
+
+
+def _create_task_reminders(reminders) -> int:
+    """
+    Insert task reminders, skipping ones that already exist.
+
+    Returns the number of new rows. Relies on the unique
+    (task, user, reminder_type) constraint, so re-runs and overlapping
+    runs never create duplicates.
+    """
+    from core_tasks.models import Reminder
     
-    return f"Processed {upcoming_tasks.count()} upcoming tasks"
+    pairs = {(reminder.task_id, reminder.user_id) for reminder in reminders}
+    # A task can also have reminders for its previous assignees
+    existing = pairs.intersection(Reminder.objects.filter(
+        task_id__in=[task_id for task_id, _ in pairs],
+        reminder_type=reminders[0].reminder_type
+    ).values_list('task_id', 'user_id'))
+    Reminder.objects.bulk_create(reminders, ignore_conflicts=True)
+    return len(pairs) - len(existing)
 
 
 @shared_task
+@exclusive_job()
 def send_overdue_alerts():
     """Send alerts for overdue tasks."""
-    from core_tasks.models import Task, Alert
-    from core_auth.models import TelegramUser
+    from core_tasks.models import Task, Alert, OPEN_TASK_STATUSES
+    from core_tasks.jobs import incremental_scan, new_or_changed
     
-    # Get overdue tasks
-    overdue_tasks = Task.objects.filter(
-        deadline__lt=timezone.now(),
-        status__in=['TODO', 'IN_PROGRESS']
-    )
-    
-    for task in overdue_tasks:
-        if task.assigned_to and task.assigned_to.notify_task_assigned:
+    processed = 0
+    with incremental_scan('send_overdue_alerts', Task) as state:
+        # Tasks that became overdue or changed since the last run
+        overdue_tasks = Task.objects.filter(
+            new_or_changed(state, 'deadline'),
+            deadline__lt=timezone.now(),
+            status__in=OPEN_TASK_STATUSES,
+            assigned_to__notify_task_assigned=True
+        ).select_related('assigned_to').order_by()
+        
+        for task in overdue_tasks.iterator():
             # Create alert
             Alert.objects.get_or_create(
                 task=task,
                 user=task.assigned_to,
-                alert_type='OVERDUE',
+                alert_type='TASK_OVERDUE',
                 defaults={
+                    'title': "Task overdue",
                     'message': f"Task '{task.title}' is overdue!",
                     'is_read': False
                 }
             )
+            processed += 1
     
-    return f"Processed {overdue_tasks.count()} overdue tasks"
+    return processed, f"Processed {processed} overdue tasks"
 
 
 @shared_task
+@exclusive_job()
 def send_meeting_reminders():
     """Send reminders for upcoming meetings."""
     from core_tasks.models import Meeting, Reminder
+    from core_tasks.jobs import incremental_scan, new_or_changed
     
-    # Get meetings in the next 2 hours
-    soon = timezone.now() + timedelta(hours=2)
-    upcoming_meetings = Meeting.objects.filter(
-        scheduled_at__lte=soon,
-        scheduled_at__gte=timezone.now()
-    )
+    processed = 0
+    with incremental_scan('send_meeting_reminders', Meeting) as state:
+        # Meetings in the next 2 hours that came into range or changed since the last run
+        now = timezone.now()
+        lead = timedelta(hours=2)
+        upcoming_meetings = Meeting.objects.filter(
+            new_or_changed(state, 'scheduled_at', lead),
+            scheduled_at__lte=now + lead,
+            scheduled_at__gte=now,
+            organizer__notify_meeting_scheduled=True
+        ).select_related('organizer').order_by()
 
-    for meeting in upcoming_meetings:
-        # Get all participants (you'd need to add participants field to Meeting model)
-        # For now, just notify the organizer
-        if meeting.organizer and meeting.organizer.notify_meeting_scheduled:
+        for meeting in upcoming_meetings.iterator():
+            # Get all participants (you'd need to add participants field to Meeting model)
+            # For now, just notify the organizer
             Reminder.objects.get_or_create(
                 meeting=meeting,
                 user=meeting.organizer,
                 reminder_type='MEETING',
                 defaults={
-                    'reminder_time': meeting.scheduled_at - timedelta(minutes=30),
+                    'remind_at': meeting.scheduled_at - timedelta(minutes=30),
                     'message': f"Meeting '{meeting.title}' starts soon!",
                     'is_sent': False
                 }
             )
+            processed += 1
     
-    return f"Processed {upcoming_meetings.count()} upcoming meetings"
+    return processed, f"Processed {processed} upcoming meetings"
 
 
 @shared_task
+@exclusive_job()
 def process_pending_reminders():
-    """Process and send pending reminders via Telegram."""
-    from core_tasks.models import Reminder
-    import requests
-    
-    # Get unsent reminders that are due
-    pending_reminders = Reminder.objects.filter(
-        is_sent=False,
-        reminder_time__lte=timezone.now()
-    )
+    """Queue due reminders in the outbox and send them via Telegram."""
+    from core_tasks import outbox
     
-    bot_token = settings.TELEGRAM_BOT_TOKEN
-    sent_count = 0
-    
-    for reminder in pending_reminders:
-        if reminder.user.telegram_id:
-            try:
-                # Send via Telegram API
-                url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-                data = {
-                    'chat_id': reminder.user.telegram_id,
-                    'text': f"🔔 Reminder:\n\n{reminder.message}",
-                    'parse_mode': 'HTML'
-                }
-                
-                response = requests.post(url, json=data)
-                
-                if response.status_code == 200:
-                    reminder.is_sent = True
-                    reminder.save()
-                    sent_count += 1
-            except Exception as e:
-                print(f"Error sending reminder {reminder.id}: {e}")
+    queued = outbox.enqueue_due_reminders()
+    report = outbox.drain()
     
-    return f"Sent {sent_count} reminders"
+    return queued, f"Queued {queued} reminders, sent {report['sent']} messages ({report['rate']} msg/s)"
 
 
 @shared_task
+@exclusive_job()
 def daily_report_reminder():
     """Remind users to submit daily reports."""
     from core_auth.models import TelegramUser
-    from core_tasks.models import DailyReport
-    import requests
+    from core_tasks import outbox
     
     # Get users who haven't submitted today's report
     today = timezone.now().date()
     users_without_report = TelegramUser.objects.exclude(
-        dailyreport__date=today
-    ).filter(is_active=True, telegram_id__isnull=False)
-    
-    bot_token = settings.TELEGRAM_BOT_TOKEN
-    sent_count = 0
-    
-    for user in users_without_report:
-        try:
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            data = {
-                'chat_id': user.telegram_id,
-                'text': "📊 Don't forget to submit your daily report!\n\nUse /dailyreport to submit.",
-                'parse_mode': 'HTML'
-            }
-            
-            response = requests.post(url, json=data)
-            if response.status_code == 200:
-                sent_count += 1
-        except Exception as e:
-            print(f"Error sending daily report reminder to {user.username}: {e}")
-    
-    return f"Sent {sent_count} daily report reminders"
+        daily_reports__date=today
+    ).filter(is_active=True, telegram_id__isnull=False).values_list('id', 'telegram_id')
+    
+    queued = outbox.enqueue(
+        (
+            f"daily_report:{user_id}:{today.isoformat()}",
+            telegram_id,
+            "📊 Don't forget to submit your daily report!\n\nUse /dailyreport to submit."
+        )
+        for user_id, telegram_id in users_without_report.iterator()
+    )
+    report = outbox.drain()
+    
+    return queued, (
+        f"Queued {queued} daily report reminders, sent {report['sent']} messages ({report['rate']} msg/s)"
+    )
 
 
 @shared_task
-def cleanup_old_notifications():
-    """Clean up old read notifications and sent reminders."""
-    from core_tasks.models import Alert, Reminder
-    
-    # Delete alerts older than 30 days
-    old_date = timezone.now() - timedelta(days=30)
-    deleted_alerts = Alert.objects.filter(
-        created_at__lt=old_date,
-        is_read=True
-    ).delete()
-    
-    # Delete sent reminders older than 7 days
-    old_reminder_date = timezone.now() - timedelta(days=7)
-    deleted_reminders = Reminder.objects.filter(
-        reminder_time__lt=old_reminder_date,
-        is_sent=True
-    ).delete()
-    
-    return f"Deleted {deleted_alerts[0]} alerts and {deleted_reminders[0]} reminders"
+@exclusive_job(ttl=300)
+def deliver_alerts():
+    """Push unsent alerts to Telegram through the outbox."""
+    from core_tasks import outbox
+    
+    queued = outbox.enqueue_pending_alerts()
+    report = outbox.drain()
+    stats = outbox.alert_delivery_stats()
+    
+    return queued['queued'] + queued['skipped'], (
+        f"Queued {queued['queued']} alerts ({queued['skipped']} not pushed), "
+        f"sent {report['sent']} messages ({report['rate']} msg/s); "
+        f"backlog {stats['backlog']} (oldest {stats['oldest_s']}s), "
+        f"latency avg {stats['latency_s_avg']}s, p95 {stats['latency_s_p95']}s"
+    )
 
+
+@shared_task
+@exclusive_job(ttl=300)
+def drain_outbox():
+    """Send queued outbox messages (retries and messages left by crashed workers)."""
+    from core_tasks import outbox
+    
+    report = outbox.drain()
+    
+    return report['sent'] + report['failed'], (
+        f"Sent {report['sent']} messages, {report['failed']} failed ({report['rate']} msg/s)"
+    )
+
+
+@shared_task
+@exclusive_job()
+def cleanup_old_notifications(batch_size=None, pause=None, archive_dir=None, time_limit=None):
+    """
+    Clean up old read notifications, sent reminders and sent outbox messages.
+    
+    Rows are deleted in small batches (see core_tasks.retention); whatever is
+    left when time_limit runs out is deleted on the next run.
+    """
+    import time
+    from core_tasks.retention import old_notifications, delete_in_batches
+    
+    batch_size = batch_size or settings.CLEANUP_BATCH_SIZE
+    pause = settings.CLEANUP_BATCH_PAUSE if pause is None else pause
+    archive_dir = archive_dir or settings.CLEANUP_ARCHIVE_DIR
+    time_limit = time_limit or settings.CLEANUP_TIME_LIMIT
+    stop_at = time.monotonic() + time_limit
+    
+    deleted, summary = 0, []
+    for name, queryset in old_notifications().items():
+        report = delete_in_batches(
+            queryset, batch_size=batch_size, pause=pause, archive_dir=archive_dir, stop_at=stop_at
+        )
+        deleted += report['deleted']
+        summary.append(
+            f"{report['deleted']} {name} ({report['rate']} rows/s"
+            f"{'' if report['complete'] else ', more left'})"
+        )
+    
+    return deleted, f"Deleted {', '.join(summary)}"
@@ -1,3 +1,593 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core_auth.models import TelegramUser
+from core_bot.outbound import SendResult
+from core_bot.reminders import ReminderScheduler
+from core_tasks import outbox
+from core_tasks.jobs import OVERLAP, DatabaseLock, exclusive_job, incremental_scan, new_or_changed
+from core_tasks.models import Alert, JobState, OutboundMessage, Project, Reminder, Task
+from core_tasks.retention import delete_in_batches
+from core_tasks.stats import get_task_stats
+
+
+class FakeScheduler:
+    """Stands in for the outbound scheduler; answers with scripted results."""
+
+    def __init__(self, result=SendResult(True)):
+        self.result = result
+        self.sent = []
+
+    def send_concurrently(self, messages, concurrency=None):
+        messages = list(messages)
+        self.sent.extend(messages)
+        results = [self.result(chat_id) if callable(self.result) else self.result for chat_id, _ in messages]
+        return {'results': results}
+
+    async def asend_many(self, messages, concurrency=None):
+        return self.send_concurrently(messages, concurrency)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+
+    def drain_with(self, result=SendResult(True)):
+        scheduler = FakeScheduler(result)
+        with mock.patch('core_bot.outbound._scheduler', scheduler):
+            report = outbox.drain()
+        return scheduler, report
+
+    def test_enqueue_is_idempotent(self):
+        self.assertEqual(outbox.enqueue([('reminder:1', 10, 'a'), ('reminder:2', 20, 'b')]), 2)
+        self.assertEqual(outbox.enqueue([('reminder:1', 10, 'a'), ('reminder:3', 30, 'c')]), 1)
+        self.assertEqual(OutboundMessage.objects.count(), 3)
+
+        self.drain_with()
+        self.assertEqual(outbox.enqueue([('reminder:1', 10, 'a')]), 0)
+        scheduler, _ = self.drain_with()
+        self.assertEqual(scheduler.sent, [])
+
+    def test_claims_do_not_overlap(self):
+        outbox.enqueue((f'test:{i}', i, 'x') for i in range(5))
+        lease = timedelta(minutes=5)
+
+        first = outbox.claim_batch(3, lease)
+        second = outbox.claim_batch(3, lease)
+        third = outbox.claim_batch(3, lease)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertEqual(third, [])
+        self.assertFalse({m.id for m in first} & {m.id for m in second})
+        self.assertTrue(all(m.status == 'SENDING' and m.attempts == 1 for m in first + second))
+
+    def test_expired_lease_is_claimed_again(self):
+        outbox.enqueue([('test:1', 1, 'x')])
+        claimed = outbox.claim_batch(10, timedelta(minutes=5))
+        self.assertEqual(outbox.claim_batch(10, timedelta(minutes=5)), [])
+
+        # The worker died; its lease runs out
+        OutboundMessage.objects.filter(id=claimed[0].id).update(
+            claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+        reclaimed = outbox.claim_batch(10, timedelta(minutes=5))
+        self.assertEqual([m.id for m in reclaimed], [claimed[0].id])
+        self.assertEqual(reclaimed[0].attempts, 2)
+        self.assertNotEqual(reclaimed[0].claim_token, claimed[0].claim_token)
+
+    def test_stale_worker_cannot_record_after_reclaim(self):
+        outbox.enqueue([('test:1', 1, 'x')])
+        stale = outbox.claim_batch(10, timedelta(minutes=5))
+        OutboundMessage.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        outbox.claim_batch(10, timedelta(minutes=5))
+
+        outbox._record_results(stale, [SendResult(False, '500 Internal')])
+        self.assertEqual(OutboundMessage.objects.get().status, 'SENDING')
+
+    def test_transient_failure_backs_off_then_fails(self):
+        outbox.enqueue([('test:1', 1, 'x')])
+        error = SendResult(False, '502 Bad Gateway')
+
+        for attempt in (1, 2):
+            before = timezone.now()
+            self.drain_with(error)
+            message = OutboundMessage.objects.get()
+            self.assertEqual(message.status, 'PENDING')
+            self.assertEqual(message.attempts, attempt)
+            self.assertEqual(message.last_error, '502 Bad Gateway')
+            self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30 * 2 ** (attempt - 1)))
+
+            # Not due until the backoff has passed
+            scheduler, _ = self.drain_with(error)
+            self.assertEqual(scheduler.sent, [])
+            OutboundMessage.objects.update(next_attempt_at=timezone.now())
+
+        self.drain_with(error)
+        message = OutboundMessage.objects.get()
+        self.assertEqual(message.status, 'FAILED')
+        self.assertEqual(message.last_error, 'Gave up after 3 attempts: 502 Bad Gateway')
+
+    def test_permanent_failure_fails_at_once(self):
+        outbox.enqueue([('test:1', 1, 'x'), ('test:2', 2, 'y')])
+        blocked = SendResult(False, '403 Forbidden: bot was blocked by the user', permanent=True)
+
+        _, report = self.drain_with(lambda chat_id: blocked if chat_id == 1 else SendResult(True))
+
+        self.assertEqual((report['sent'], report['failed']), (1, 1))
+        failed = OutboundMessage.objects.get(idempotency_key='test:1')
+        self.assertEqual((failed.status, failed.attempts), ('FAILED', 1))
+        self.assertEqual(failed.last_error, '403 Forbidden: bot was blocked by the user')
+        self.assertEqual(OutboundMessage.objects.get(idempotency_key='test:2').status, 'SENT')
+
+
+@override_settings(BOT_DB_EXECUTOR_WORKERS=0)
+class ReminderTimerSendTests(TestCase):
+    """The reminder timer sends only what it fired and stops firing undeliverable reminders."""
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(username='reminded', telegram_id=1001)
+        self.reminder = Reminder.objects.create(
+            user=self.user, reminder_type='CUSTOM', message='Stand-up',
+            remind_at=timezone.now() - timedelta(seconds=1),
+        )
+
+    def send(self, result=SendResult(True)):
+        scheduler = FakeScheduler(result)
+        with mock.patch('core_bot.outbound._scheduler', scheduler):
+            async_to_sync(ReminderScheduler._send)([self.reminder.id])
+        return scheduler
+
+    def test_sends_only_fired_reminders(self):
+        outbox.enqueue([('alert:1', 2002, 'Backlog alert')])
+
+        scheduler = self.send()
+
+        self.assertEqual(scheduler.sent, [(1001, '🔔 Reminder:\n\nStand-up')])
+        self.assertEqual(OutboundMessage.objects.get(idempotency_key='alert:1').status, 'PENDING')
+        self.reminder.refresh_from_db()
+        self.assertTrue(self.reminder.is_sent)
+
+    def test_permanent_failure_gives_up_on_reminder(self):
+        self.send(SendResult(False, '403 Forbidden: bot was blocked by the user', permanent=True))
+
+        self.reminder.refresh_from_db()
+        self.assertFalse(self.reminder.is_sent)
+        self.assertTrue(self.reminder.delivery_failed)
+        self.assertEqual(outbox.enqueue_due_reminders(), 0)
+        self.assertEqual(ReminderScheduler()._load_window(), [])
+
+
+class OverdueAlertTests(TestCase):
+
+    def test_overdue_alert_uses_a_valid_type(self):
+        from core_tasks.tasks import send_overdue_alerts
+
+        user = TelegramUser.objects.create(username='late', telegram_id=1002)
+        project = Project.objects.create(name='Overdue', owner=user)
+        Task.objects.create(
+            project=project, title='Report', status='TODO', assigned_to=user, created_by=user,
+            deadline=timezone.now() - timedelta(hours=1),
+        )
+
+        send_overdue_alerts()
+
+        alert = Alert.objects.get(user=user)
+        self.assertEqual(alert.alert_type, 'TASK_OVERDUE')
+        self.assertEqual(alert.get_alert_type_display(), 'Task Overdue')
+
+
+class AlertDeliveryTests(TestCase):
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(username='alerted', telegram_id=1003, notify_task_assigned=False)
+
+    def alert(self, alert_type='SYSTEM', **fields):
+        return Alert.objects.create(user=self.user, alert_type=alert_type, title='t', message='m', **fields)
+
+    def deliver(self, result=SendResult(True)):
+        scheduler = FakeScheduler(result)
+        with mock.patch('core_bot.outbound._scheduler', scheduler):
+            report = outbox.enqueue_pending_alerts()
+            outbox.drain()
+        return report
+
+    def test_sent_and_skipped_alerts_are_told_apart(self):
+        pushed = self.alert()
+        muted = self.alert('TASK_ASSIGNED')
+        stale = self.alert()
+        Alert.objects.filter(id=stale.id).update(created_at=timezone.now() - timedelta(days=3))
+
+        self.assertEqual(self.deliver(), {'queued': 1, 'skipped': 2})
+
+        pushed.refresh_from_db()
+        self.assertTrue(pushed.is_sent)
+        self.assertIsNotNone(pushed.sent_at)
+        self.assertFalse(pushed.push_skipped)
+        for alert in (muted, stale):
+            alert.refresh_from_db()
+            self.assertFalse(alert.is_sent)
+            self.assertTrue(alert.push_skipped)
+        self.assertEqual(outbox.alert_delivery_stats()['backlog'], 0)
+
+    def test_read_alert_is_not_pushed(self):
+        read = self.alert(is_read=True)
+        unread = self.alert()
+
+        self.assertEqual(self.deliver(), {'queued': 1, 'skipped': 1})
+
+        read.refresh_from_db()
+        self.assertFalse(read.is_sent)
+        self.assertTrue(read.push_skipped)
+        self.assertFalse(OutboundMessage.objects.filter(idempotency_key=f'alert:{read.id}').exists())
+        unread.refresh_from_db()
+        self.assertTrue(unread.is_sent)
+
+    def test_refused_alert_is_skipped_not_sent(self):
+        alert = self.alert()
+
+        self.deliver(SendResult(False, '400 Bad Request: chat not found', permanent=True))
+
+        alert.refresh_from_db()
+        self.assertFalse(alert.is_sent)
+        self.assertTrue(alert.push_skipped)
+        self.assertEqual(self.deliver(), {'queued': 0, 'skipped': 0})
+
+
+class ProjectCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(username='counted')
+        self.project = Project.objects.create(name='Counters', owner=self.user)
+        self.task = Task.objects.create(project=self.project, title='Shared', status='TODO', created_by=self.user)
+
+    def counters(self):
+        self.project.refresh_from_db()
+        return {status: getattr(self.project, field) for status, field in Project.TASK_COUNTER_FIELDS.items()
+                if getattr(self.project, field)}
+
+    def test_stale_instances_move_the_task_once(self):
+        # Two workers load the task, then both change its status
+        first = Task.objects.get(pk=self.task.pk)
+        second = Task.objects.get(pk=self.task.pk)
+        first.status = 'IN_PROGRESS'
+        first.save()
+        second.status = 'DONE'
+        second.save()
+
+        self.assertEqual(self.counters(), {'DONE': 1})
+        self.assertEqual(Project.objects.filter(pk=self.project.pk).reconcile_task_counters(), 0)
+
+    def test_stale_instance_delete_uncounts_current_status(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        current = Task.objects.get(pk=self.task.pk)
+        current.status = 'REVIEW'
+        current.save()
+
+        stale.delete()
+
+        self.assertEqual(self.counters(), {})
+
+
+class TaskStatsTests(TestCase):
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(username='stats')
+        self.project = Project.objects.create(name='Stats', owner=self.user)
+        other = Project.objects.create(name='Other', owner=self.user)
+        now = timezone.now()
+        for status, priority, deadline, hours, completed_at in [
+            ('TODO', 'HIGH', now - timedelta(days=1), '2.5', None),
+            ('TODO', 'HIGH', None, None, None),
+            ('TODO', 'LOW', now + timedelta(days=1), '1', None),
+            ('IN_PROGRESS', 'URGENT', now - timedelta(hours=1), '4', None),
+            ('DONE', 'HIGH', now - timedelta(days=1), '3', now - timedelta(days=2)),
+            ('DONE', 'MEDIUM', None, None, now - timedelta(days=10)),
+            ('CANCELLED', 'LOW', now - timedelta(days=3), None, None),
+        ]:
+            Task.objects.create(
+                project=self.project, title=status, status=status, priority=priority, deadline=deadline,
+                estimated_hours=hours and Decimal(hours), created_by=self.user, completed_at=completed_at,
+            )
+        Task.objects.create(project=other, title='Elsewhere', status='TODO', priority='HIGH', created_by=self.user)
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = get_task_stats(project=self.project, completed_since=timezone.now() - timedelta(days=7))
+
+        self.assertEqual(stats['total'], 7)
+        self.assertEqual(stats['by_status'], {
+            'TODO': 3, 'IN_PROGRESS': 1, 'REVIEW': 0, 'BLOCKED': 0, 'DONE': 2, 'CANCELLED': 1,
+        })
+        self.assertEqual(stats['by_priority'], {'LOW': 2, 'MEDIUM': 1, 'HIGH': 3, 'URGENT': 1})
+        self.assertEqual(stats['matrix']['TODO'], {'LOW': 1, 'MEDIUM': 0, 'HIGH': 2, 'URGENT': 0})
+        self.assertEqual(stats['matrix']['DONE'], {'LOW': 0, 'MEDIUM': 1, 'HIGH': 1, 'URGENT': 0})
+        # Past deadlines of open tasks only; done and cancelled tasks aren't overdue
+        self.assertEqual(stats['overdue'], 2)
+        self.assertEqual(stats['completed_recently'], 1)
+        self.assertEqual(stats['completion'], 28)
+        self.assertEqual(stats['estimated_hours'], Decimal('10.5'))
+        self.assertEqual(stats['actual_hours'], Decimal('0'))
+
+    def test_empty_selection(self):
+        with self.assertNumQueries(1):
+            stats = get_task_stats(assigned_to=self.user)
+
+        self.assertEqual((stats['total'], stats['completion'], stats['overdue']), (0, 0, 0))
+        self.assertNotIn('completed_recently', stats)
+        self.assertEqual(set(stats['matrix']), {status for status, _ in Task.STATUS_CHOICES})
+
+
+@override_settings(JOB_LOCK_BACKEND='db')
+class JobLockTests(TestCase):
+
+    def setUp(self):
+        JobState.objects.create(name='job')
+
+    def test_second_acquire_refused_while_lease_is_live(self):
+        first, second = DatabaseLock('job', 'worker-1'), DatabaseLock('job', 'worker-2')
+
+        self.assertTrue(first.acquire(60))
+        self.assertFalse(second.acquire(60))
+        self.assertEqual(second.holder(), 'worker-1')
+
+    def test_expired_lease_is_taken_over(self):
+        first, second = DatabaseLock('job', 'worker-1'), DatabaseLock('job', 'worker-2')
+        self.assertTrue(first.acquire(60))
+
+        # worker-1 died without releasing
+        JobState.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertTrue(second.acquire(60))
+        self.assertEqual(first.holder(), 'worker-2')
+
+    def test_only_owner_releases(self):
+        first, second = DatabaseLock('job', 'worker-1'), DatabaseLock('job', 'worker-2')
+        self.assertTrue(first.acquire(60))
+        JobState.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(second.acquire(60))
+
+        # The stale owner can't release the lock it lost
+        first.release()
+        self.assertEqual(second.holder(), 'worker-2')
+        self.assertFalse(first.acquire(60))
+
+        second.release()
+        self.assertEqual(second.holder(), '')
+        self.assertTrue(first.acquire(60))
+
+    def test_overlapping_run_is_skipped_and_counted(self):
+        inner_results = []
+
+        @exclusive_job(ttl=60)
+        def job():
+            inner_results.append(job())
+            return 3, 'done'
+
+        self.assertEqual(job(), 'done')
+
+        self.assertEqual(len(inner_results), 1)
+        self.assertTrue(inner_results[0].startswith('Skipped job: already running'))
+        state = JobState.objects.get(name='job')
+        self.assertEqual((state.skipped_runs, state.last_rows, state.last_error), (1, 3, ''))
+        self.assertEqual((state.locked_by, state.locked_until), ('', None))
+
+    def test_failed_run_records_error_and_releases(self):
+        @exclusive_job(ttl=60)
+        def job():
+            raise ValueError('bad row')
+
+        with self.assertRaises(ValueError):
+            job()
+
+        state = JobState.objects.get(name='job')
+        self.assertEqual(state.last_error, 'ValueError: bad row')
+        self.assertIsNone(state.last_rows)
+        self.assertIsNotNone(state.last_finished_at)
+        self.assertTrue(DatabaseLock('job', 'next-worker').acquire(60))
+
+
+@override_settings(JOB_LOCK_BACKEND='db')
+class DeadlineReminderTests(TestCase):
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(username='due', telegram_id=1004)
+        muted = TelegramUser.objects.create(username='muted', notify_deadline_approaching=False)
+        project = Project.objects.create(name='Deadlines', owner=self.user)
+        soon = timezone.now() + timedelta(hours=12)
+
+        def task(title, assignee=self.user, deadline=soon, status='TODO'):
+            return Task.objects.create(
+                project=project, title=title, status=status, deadline=deadline,
+                assigned_to=assignee, created_by=self.user,
+            )
+
+        self.due = [task(f'Due {i}') for i in range(5)]
+        task('Muted', assignee=muted)
+        task('Later', deadline=timezone.now() + timedelta(days=3))
+        task('Done', status='DONE')
+
+    def reminders(self):
+        return list(
+            Reminder.objects.filter(reminder_type='TASK_DEADLINE')
+            .values_list('task_id', 'user_id').order_by('task_id')
+        )
+
+    def test_two_runs_create_one_reminder_per_task(self):
+        from core_tasks.tasks import send_deadline_reminders
+
+        expected = [(task.id, self.user.id) for task in self.due]
+
+        self.assertEqual(
+            send_deadline_reminders(chunk_size=2), 'Processed 5 upcoming tasks, created 5 reminders'
+        )
+        self.assertEqual(self.reminders(), expected)
+        reminder = Reminder.objects.get(task=self.due[0])
+        self.assertEqual(reminder.remind_at, self.due[0].deadline - timedelta(hours=2))
+        self.assertEqual(reminder.message, "Task 'Due 0' is due soon!")
+
+        # The tasks are still inside the re-scanned overlap, but already have reminders
+        self.assertEqual(
+            send_deadline_reminders(chunk_size=2), 'Processed 0 upcoming tasks, created 0 reminders'
+        )
+        self.assertEqual(self.reminders(), expected)
+
+    def test_reassigned_task_counts_new_reminder(self):
+        from core_tasks.tasks import send_deadline_reminders
+
+        send_deadline_reminders()
+        other = TelegramUser.objects.create(username='next', telegram_id=1005)
+        task = self.due[0]
+        task.assigned_to = other
+        task.save()
+
+        self.assertEqual(send_deadline_reminders(), 'Processed 1 upcoming tasks, created 1 reminders')
+        self.assertEqual(
+            set(Reminder.objects.filter(task=task).values_list('user_id', flat=True)), {self.user.id, other.id}
+        )
+
+    def test_overlapping_insert_skips_existing_rows(self):
+        from core_tasks.tasks import _create_task_reminders, send_deadline_reminders
+
+        send_deadline_reminders()
+
+        # A run that selected the tasks before the first one inserted
+        created = _create_task_reminders([
+            Reminder(task=task, user=self.user, reminder_type='TASK_DEADLINE',
+                     remind_at=task.deadline, message='again')
+            for task in self.due[:2]
+        ])
+
+        self.assertEqual(created, 0)
+        self.assertEqual(len(self.reminders()), 5)
+        self.assertFalse(Reminder.objects.filter(message='again').exists())
+
+
+class IncrementalScanTests(TestCase):
+    """A job scanning overdue tasks sees only rows that are new to it."""
+
+    def setUp(self):
+        user = TelegramUser.objects.create(username='scanned')
+        project = Project.objects.create(name='Scan', owner=user)
+        self.day_ago = timezone.now() - timedelta(days=1)
+        self.tasks = [
+            Task.objects.create(project=project, title=f'Task {i}', created_by=user, deadline=deadline)
+            for i, deadline in enumerate([self.day_ago, self.day_ago, timezone.now() + timedelta(hours=1)])
+        ]
+        # The overdue tasks were last edited well before the newest row, so
+        # they fall outside the overlap that every run re-scans
+        Task.objects.filter(id__in=[t.id for t in self.tasks[:2]]).update(updated_at=self.day_ago)
+
+    def scan(self):
+        with incremental_scan('overdue_scan', Task) as state:
+            return set(
+                Task.objects.filter(new_or_changed(state, 'deadline'), deadline__lt=timezone.now())
+                .values_list('id', flat=True)
+            )
+
+    def test_second_run_skips_unchanged_rows(self):
+        self.assertEqual(self.scan(), {self.tasks[0].id, self.tasks[1].id})
+        self.assertEqual(self.scan(), set())
+
+    def test_edited_and_newly_overdue_rows_are_picked_up(self):
+        self.scan()
+
+        edited, _, upcoming = self.tasks
+        edited.title = 'Renamed'
+        edited.save()
+        # Became overdue since the last run (update() leaves updated_at alone)
+        Task.objects.filter(id=upcoming.id).update(deadline=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.scan(), {edited.id, upcoming.id})
+
+    def test_rows_committed_late_inside_the_overlap_are_picked_up(self):
+        self.scan()
+        seen = JobState.objects.get(name='overdue_scan').last_seen_updated_at
+
+        # Written by slow transactions with updated_at just before the watermark
+        late, missed, _ = self.tasks
+        Task.objects.filter(id=late.id).update(updated_at=seen - OVERLAP + timedelta(minutes=1))
+        Task.objects.filter(id=missed.id).update(updated_at=seen - OVERLAP - timedelta(minutes=1))
+
+        self.assertEqual(self.scan(), {late.id})
+
+    def test_deleting_job_state_rescans_everything(self):
+        self.scan()
+
+        JobState.objects.filter(name='overdue_scan').delete()
+
+        self.assertEqual(self.scan(), {self.tasks[0].id, self.tasks[1].id})
+
+    def test_failed_run_keeps_watermarks(self):
+        self.scan()
+        before = JobState.objects.values_list('last_run_at', 'last_seen_updated_at').get(name='overdue_scan')
+
+        with self.assertRaises(ValueError), incremental_scan('overdue_scan', Task):
+            Task.objects.filter(id=self.tasks[0].id).update(updated_at=timezone.now())
+            raise ValueError('job failed')
+
+        after = JobState.objects.values_list('last_run_at', 'last_seen_updated_at').get(name='overdue_scan')
+        self.assertEqual(after, before)
+        self.assertEqual(self.scan(), {self.tasks[0].id})
+
+
+class RetentionArchiveTests(TestCase):
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(username='retained')
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        for read in (True, True, False, True, True, True):
+            Alert.objects.create(user=self.user, alert_type='SYSTEM', title='t', message='m', is_read=read)
+
+    def archived_ids(self, report):
+        if report['archive'] is None:
+            return []
+        with gzip.open(report['archive'], 'rt', encoding='utf-8') as archive:
+            return [json.loads(line)['id'] for line in archive]
+
+    def test_archive_holds_each_deleted_row_once(self):
+        read = list(Alert.objects.filter(is_read=True).order_by('id').values_list('id', flat=True))
+
+        report = delete_in_batches(Alert.objects.filter(is_read=True), batch_size=2, archive_dir=self.archive_dir)
+
+        self.assertEqual((report['deleted'], report['archived'], report['complete']), (5, 5, True))
+        self.assertEqual(self.archived_ids(report), read)
+        self.assertEqual(list(Alert.objects.values_list('is_read', flat=True)), [False])
+
+    def test_failed_delete_is_archived_before_rows_go(self):
+        read = list(Alert.objects.filter(is_read=True).order_by('id').values_list('id', flat=True))
+        real_delete = QuerySet.delete
+        calls = []
+
+        def delete(queryset):
+            calls.append(1)
+            if len(calls) == 2:
+                raise DatabaseError('database is locked')
+            return real_delete(queryset)
+
+        with mock.patch.object(QuerySet, 'delete', delete), self.assertRaises(DatabaseError):
+            delete_in_batches(Alert.objects.filter(is_read=True), batch_size=2, archive_dir=self.archive_dir)
+
+        # The failed batch was archived before its delete, and is still in the table
+        [path] = Path(self.archive_dir).iterdir()
+        self.assertEqual(self.archived_ids({'archive': path}), read[:4])
+        self.assertEqual(Alert.objects.filter(is_read=True).count(), 3)
+
+        # The next run archives it again; deduplicated by pk the archives hold every deleted row
+        report = delete_in_batches(Alert.objects.filter(is_read=True), batch_size=2,
+                                   archive_dir=Path(self.archive_dir) / 'retry')
+        self.assertEqual(self.archived_ids(report), read[2:])
+        self.assertEqual(sorted(set(read[:4] + self.archived_ids(report))), read)
+        self.assertFalse(Alert.objects.filter(is_read=True).exists())
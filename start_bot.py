@@ -2,6 +2,7 @@
 """
 Startup script for Tasky bot.
 Handles ngrok setup and webhook configuration automatically.
+Use --polling to run with long polling instead of a webhook.
 """
 import os
 import sys
@@ -203,6 +204,18 @@ def start_server():
         ])
 
 
+def start_polling():
+    """Run the bot with long polling (no ngrok or webhook needed)."""
+    from django.core.management import call_command
+
+    print("🔄 Starting bot in polling mode")
+    print("📱 Bot is ready! Send /start to your bot on Telegram")
+    print("\nPress Ctrl+C to stop\n")
+    sys.stdout.flush()  # Force flush
+
+    call_command('run_polling')
+
+
 def main():
     """Main startup function."""
     print("=" * 60)
@@ -210,6 +223,11 @@ def main():
     print("=" * 60)
     sys.stdout.flush()  # Force flush
 
+    # Polling mode: no public URL needed
+    if '--polling' in sys.argv[1:]:
+        start_polling()
+        return
+
     # Check if webhook URL is provided
     webhook_url = os.getenv('WEBHOOK_URL')
     ngrok_process = None
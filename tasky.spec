@@ -29,6 +29,7 @@ hiddenimports = collect_submodules('django') + \
                     'core_bot',
                     'core_bot.bot',
                     'core_bot.utils',
+                    'core_bot.polling',
                     'core_bot.handlers.basic',
                     'core_bot.handlers.projects',
                     'core_bot.handlers.tasks',